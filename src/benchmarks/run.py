@@ -0,0 +1,320 @@
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterator
+
+import click
+import numpy as np
+
+from src.benchmarks.season import NUM_GAMEWEEKS, synthetic_bundle
+from src.data.league_table import construct_league_table, construct_raw_table
+from src.data.snapshot import load_snapshot
+from src.data.upcoming_fixtures import get_raw_fixtures, get_upcoming_fixtures
+from src.simulation.goals_probability_distribution import add_goal_proba_distributions
+from src.simulation.batch_simulation import prepare_fixture_arrays
+from src.simulation.engine import run_simulations, simulate_chunk
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+HORIZONS = [1, 6, 12, 38]
+SIMULATIONS = [10**2, 10**4, 10**6]
+QUICK_HORIZONS = [1, 12]
+QUICK_SIMULATIONS = [10**2, 10**4]
+HORIZON_LOOPS = 100  # simulate_horizon calls per measurement
+MIN_REPEAT_SECONDS = 1.0
+MIN_COMPARED_MEMORY = 2**20  # smaller peaks are too noisy to compare
+
+
+@click.command()
+@click.option("--quick", is_flag=True, help="Only run the small sizes.")
+@click.option(
+    "--snapshot",
+    default=None,
+    help="Benchmark on a recorded snapshot bundle instead of a synthetic season.",
+)
+@click.option("--output", default=None, help="The path to write the JSON report to.")
+@click.option(
+    "--baseline",
+    default=str(BASELINE_PATH),
+    help="The JSON report to compare against.",
+)
+@click.option(
+    "--save-baseline", is_flag=True, help="Overwrite the baseline with this run."
+)
+@click.option(
+    "--threshold",
+    default=0.25,
+    help="The relative slowdown or memory growth reported as a regression.",
+)
+@click.option("--repeat", default=3, help="The number of timings to take the best of.")
+def main(
+    quick: bool = False,
+    snapshot: str | None = None,
+    output: str | None = None,
+    baseline: str = str(BASELINE_PATH),
+    save_baseline: bool = False,
+    threshold: float = 0.25,
+    repeat: int = 3,
+):
+    horizons = QUICK_HORIZONS if quick else HORIZONS
+    simulations = QUICK_SIMULATIONS if quick else SIMULATIONS
+
+    report = run_benchmarks(horizons, simulations, snapshot, repeat)
+    click.echo(format_report(report))
+
+    if output is not None:
+        write_report(report, output)
+
+    if save_baseline:
+        write_report(report, baseline)
+        click.echo(f"Saved the baseline to {baseline}")
+        return
+
+    if Path(baseline).exists():
+        regressions = compare_reports(report, read_report(baseline), threshold)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+        click.echo(f"No regressions against {baseline}")
+
+
+def run_benchmarks(
+    horizons: list[int],
+    simulations: list[int],
+    snapshot: str | Path | None = None,
+    repeat: int = 3,
+) -> dict:
+    """
+    Times every benchmark case and measures its peak traced memory.
+    :param horizons: The horizons, in gameweeks, to benchmark.
+    :param simulations: The numbers of simulations to benchmark run_simulations with.
+    :param snapshot: A recorded snapshot bundle to use instead of a synthetic season.
+    :param repeat: The number of timings to take the best of, for cases under a second.
+    :return: The report, with environment details and a dictionary of results keyed by
+        case name, each holding seconds, rate, unit and peak_memory (bytes).
+    """
+    results = {}
+    for name, function, count, unit in benchmark_cases(horizons, simulations, snapshot):
+        seconds = time_call(function, repeat)
+        results[name] = {
+            "seconds": seconds,
+            "rate": count / seconds,
+            "unit": unit,
+            "peak_memory": peak_memory(function),
+        }
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def benchmark_cases(
+    horizons: list[int],
+    simulations: list[int],
+    snapshot: str | Path | None = None,
+) -> Iterator[tuple[str, Callable[[], object], int, str]]:
+    """
+    Builds the benchmark cases.
+    With a synthetic season, each horizon is benchmarked from the gameweek that leaves
+    exactly that many gameweeks. A recorded snapshot is used as it is, so its horizons
+    are capped by the gameweeks it has left.
+    :param horizons: The horizons, in gameweeks, to benchmark.
+    :param simulations: The numbers of simulations to benchmark run_simulations with.
+    :param snapshot: A recorded snapshot bundle to use instead of a synthetic season.
+    :return: Tuples of the case name, a function running it, the number of items it
+        processes and their unit.
+    """
+    recorded = load_snapshot(snapshot) if snapshot is not None else None
+
+    yield (
+        "cli_startup[--help]",
+        partial(
+            subprocess.run,
+            [sys.executable, "-m", "src.simulation.simulate", "--help"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            check=True,
+        ),
+        1,
+        "runs",
+    )
+
+    season = recorded or synthetic_bundle(played_gameweeks=NUM_GAMEWEEKS)
+    finished = [fixture for fixture in season["fixtures"] if fixture["finished"]]
+    yield (
+        "construct_raw_table",
+        partial(construct_raw_table, season["fixtures"]),
+        len(finished),
+        "fixtures",
+    )
+
+    for horizon in horizons:
+        bundle = recorded or synthetic_bundle(played_gameweeks=NUM_GAMEWEEKS - horizon)
+        fixtures = get_upcoming_fixtures(
+            horizon, bundle["bootstrap"], bundle["fixtures"]
+        )
+        table = construct_league_table(bundle["fixtures"], bundle["bootstrap"])
+        start = fixtures["gameweek"].min()
+        yield (
+            f"get_raw_fixtures[horizon={horizon}]",
+            partial(get_raw_fixtures, start, start + horizon - 1, bundle["fixtures"]),
+            len(bundle["fixtures"]),
+            "fixtures",
+        )
+        yield (
+            f"add_goal_proba_distributions[horizon={horizon}]",
+            partial(copy_and_add_distributions, fixtures, bundle["ratings"]),
+            len(fixtures),
+            "fixtures",
+        )
+
+        fixtures = copy_and_add_distributions(fixtures, bundle["ratings"])
+        fixture_arrays = prepare_fixture_arrays(fixtures, table.index)
+        yield (
+            f"simulate_horizon[horizon={horizon}]",
+            partial(
+                simulate_horizon_loops, fixtures, table, fixture_arrays, HORIZON_LOOPS
+            ),
+            HORIZON_LOOPS,
+            "sims",
+        )
+        for num_simulations in simulations:
+            yield (
+                f"run_simulations[horizon={horizon},sims={num_simulations}]",
+                partial(
+                    run_simulations,
+                    fixtures,
+                    table,
+                    num_simulations,
+                    cpus=1,
+                    engine="batch",
+                    progress=False,
+                ),
+                num_simulations,
+                "sims",
+            )
+
+
+def copy_and_add_distributions(fixtures, ratings):
+    """
+    Adds the goal distributions to a copy of the fixtures, leaving them reusable.
+    :param fixtures: The fixtures.
+    :param ratings: The ratings.
+    :return: The fixtures with goal probability distributions.
+    """
+    return add_goal_proba_distributions(fixtures.copy(), ratings)
+
+
+def simulate_horizon_loops(
+    fixtures, table, fixture_arrays: dict, num_simulations: int
+) -> None:
+    """
+    Runs simulate_horizon repeatedly as the loop engine does, on goals sampled in bulk
+    with a fixed seed, by simulating one chunk.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param num_simulations: The number of calls.
+    """
+    simulate_chunk(
+        num_simulations,
+        np.random.SeedSequence(0),
+        fixtures,
+        table,
+        fixture_arrays,
+        engine="loop",
+    )
+
+
+def time_call(function: Callable[[], object], repeat: int = 3) -> float:
+    """
+    Times a function, taking the best of several calls unless one call is slow.
+    :param function: The function to time.
+    :param repeat: The maximum number of calls.
+    :return: The fastest wall time in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+        if best >= MIN_REPEAT_SECONDS:
+            break
+    return best
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """
+    Measures the peak memory traced while a function runs, including NumPy arrays.
+    :param function: The function to measure.
+    :return: The peak traced memory in bytes.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare_reports(report: dict, baseline: dict, threshold: float = 0.25) -> list[str]:
+    """
+    Finds the cases that got slower or used more memory than in the baseline.
+    Cases missing from either report, and peaks under MIN_COMPARED_MEMORY, are ignored.
+    :param report: The report of this run.
+    :param baseline: The baseline report.
+    :param threshold: The relative growth reported as a regression.
+    :return: A description of each regression.
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        if name not in baseline["results"]:
+            continue
+        for metric in ["seconds", "peak_memory"]:
+            if metric == "peak_memory" and result[metric] < MIN_COMPARED_MEMORY:
+                continue
+            ratio = result[metric] / baseline["results"][name][metric]
+            if ratio > 1 + threshold:
+                regressions.append(f"{name} {metric} x{ratio:.2f} of the baseline")
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats the results as a text table.
+    :param report: The report from run_benchmarks.
+    :return: One line per case with its time, rate and peak memory.
+    """
+    width = max(map(len, report["results"]), default=0)
+    lines = []
+    for name, result in report["results"].items():
+        lines.append(
+            f"{name:<{width}}  {result['seconds'] * 1e3:>10.2f} ms  "
+            f"{result['rate']:>12,.0f} {result['unit']}/s  "
+            f"{result['peak_memory'] / 2**20:>9.2f} MiB"
+        )
+    return "\n".join(lines)
+
+
+def read_report(path: str | Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_report(report: dict, path: str | Path) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import random
+from pathlib import Path
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+NUM_GAMEWEEKS = 38
+
+
+def synthetic_bundle(played_gameweeks: int = 0, seed: int = 0) -> dict:
+    """
+    Builds a season in the snapshot bundle format, so benchmarks run offline.
+    Fixtures follow a double round robin of the teams in data/ratings.csv, and the
+    fixtures of the first played_gameweeks gameweeks are finished with seeded scores.
+    :param played_gameweeks: The number of finished gameweeks.
+    :param seed: The seed for the scores.
+    :return: The bundle, as returned by load_snapshot.
+    """
+    ratings = pd.read_csv(DATA_DIR / "ratings.csv", index_col=0)
+    manager_prices = pd.read_csv(DATA_DIR / "manager_prices.csv", index_col=0)
+    team_ids = list(range(1, len(ratings) + 1))
+
+    rng = random.Random(seed)
+    fixtures = []
+    for gameweek, pairings in enumerate(double_round_robin(team_ids), start=1):
+        finished = gameweek <= played_gameweeks
+        for home, away in pairings:
+            fixtures.append(
+                {
+                    "id": len(fixtures) + 1,
+                    "event": gameweek,
+                    "team_h": home,
+                    "team_a": away,
+                    "finished": finished,
+                    "team_h_score": (
+                        rng.choice([0, 1, 1, 2, 2, 3, 4]) if finished else None
+                    ),
+                    "team_a_score": (
+                        rng.choice([0, 0, 1, 1, 2, 3]) if finished else None
+                    ),
+                }
+            )
+
+    bootstrap = {
+        "teams": [
+            {"id": team_id, "short_name": team}
+            for team_id, team in zip(team_ids, ratings.index)
+        ],
+        "events": [
+            {"id": gameweek, "finished": gameweek <= played_gameweeks}
+            for gameweek in range(1, NUM_GAMEWEEKS + 1)
+        ],
+    }
+    return {
+        "bootstrap": bootstrap,
+        "fixtures": fixtures,
+        "ratings": ratings,
+        "manager_prices": manager_prices,
+    }
+
+
+def double_round_robin(team_ids: list[int]) -> list[list[tuple[int, int]]]:
+    """
+    Schedules every team against every other team at home and away.
+    Uses the circle method for the first half and reverses the venues for the second.
+    :param team_ids: The team IDs, an even number of them.
+    :return: The (home, away) pairings of each gameweek.
+    """
+    teams = list(team_ids)
+    first_half = []
+    for round_number in range(len(teams) - 1):
+        pairings = []
+        for i in range(len(teams) // 2):
+            home, away = teams[i], teams[-1 - i]
+            pairings.append((home, away) if round_number % 2 else (away, home))
+        first_half.append(pairings)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+
+    second_half = [[(away, home) for home, away in week] for week in first_half]
+    return first_half + second_half
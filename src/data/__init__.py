@@ -1,22 +1,37 @@
 import pandas as pd
+from pathlib import Path
 from typing import Tuple
 
 from src.data.upcoming_fixtures import get_upcoming_fixtures
-from src.data.league_table import construct_league_table
+from src.data.fpl_api import get_cache_dir
+from src.data.league_table import TABLE_STATE_FILE, construct_league_table
 from src.data.read_csv import read_ratings
 from src.data.read_csv import read_manager_prices
+from src.data.snapshot import load_snapshot
 
 
 def get_data(
     horizon: int = 12,
+    snapshot: str | Path | None = None,
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Reads data from the FPL API and other sources.
     :param horizon: The number of gameweeks to simulate.
+    :param snapshot: The path of a snapshot bundle to replay instead of the API and CSVs.
     :return: A tuple of fixtures, league table, ratings, and manager prices.
     """
+    if snapshot is not None:
+        bundle = load_snapshot(snapshot)
+        fixtures = get_upcoming_fixtures(
+            horizon=horizon,
+            bootstrap_data=bundle["bootstrap"],
+            fixtures_data=bundle["fixtures"],
+        )
+        league_table = construct_league_table(bundle["fixtures"], bundle["bootstrap"])
+        return fixtures, league_table, bundle["ratings"], bundle["manager_prices"]
+
     fixtures = get_upcoming_fixtures(horizon=horizon)
-    league_table = construct_league_table()
+    league_table = construct_league_table(state_path=get_cache_dir() / TABLE_STATE_FILE)
     ratings = read_ratings()
     manager_prices = read_manager_prices()
     return fixtures, league_table, ratings, manager_prices
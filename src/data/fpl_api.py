@@ -1,17 +1,123 @@
-import requests
-from typing import Any
+from __future__ import annotations
 
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
-def make_request(url: str) -> Any:
+if TYPE_CHECKING:
+    import requests
+
+# cached responses younger than this are used without contacting the API
+CACHE_TTL = 15 * 60
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "fpl-assistant-manager"
+
+_session: requests.Session | None = None
+_memory_cache: dict[str, dict] = {}
+
+
+def get_session() -> requests.Session:
     """
-    Makes a request to the FPL API with error handling.
+    Gets the shared HTTP session, so connections to the FPL API are pooled and reused.
+    :return: The session.
+    """
+    global _session
+    if _session is None:
+        import requests  # only needed when the API is called, not to replay a snapshot
+
+        _session = requests.Session()
+    return _session
+
+
+def get_cache_dir() -> Path:
+    """
+    Gets the directory for cached API responses, set by the FPL_CACHE_DIR environment variable.
+    :return: The cache directory.
+    """
+    return Path(os.environ.get("FPL_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+def clear_cache() -> None:
+    """
+    Clears the in-memory response cache, so the next requests go to disk or the API.
+    """
+    _memory_cache.clear()
+
+
+def make_request(url: str, ttl: float = CACHE_TTL) -> Any:
+    """
+    Makes a request to the FPL API with error handling and caching.
+    Responses are cached in memory for the rest of the run and on disk between runs.
+    A disk entry younger than ttl is used as is; an older one is revalidated with a
+    conditional request (ETag/Last-Modified) and reused if the API reports no change.
     :param url: The URL to make the request to.
+    :param ttl: The maximum age in seconds of a disk cache entry used without revalidation.
     :return: The json response from the API.
     """
-    res = requests.get(url)
-    if res.status_code != 200:
+    if url in _memory_cache:
+        return _memory_cache[url]["data"]
+
+    cache_path = get_cache_dir() / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+    entry = read_cache_entry(cache_path)
+    if entry is not None and time.time() - entry["fetched_at"] < ttl:
+        _memory_cache[url] = entry
+        return entry["data"]
+
+    headers = {}
+    if entry is not None and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry is not None and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    res = get_session().get(url, headers=headers)
+    if res.status_code == 304 and entry is not None:
+        entry["fetched_at"] = time.time()
+    elif res.status_code != 200:
         raise Exception(f'Error fetching "{url}": {res.status_code}')
-    return res.json()
+    else:
+        entry = {
+            "url": url,
+            "fetched_at": time.time(),
+            "etag": res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+            "data": res.json(),
+        }
+
+    _memory_cache[url] = entry
+    write_cache_entry(cache_path, entry)
+    return entry["data"]
+
+
+def read_cache_entry(path: Path) -> dict | None:
+    """
+    Reads a cached response from disk.
+    :param path: The path of the cache entry.
+    :return: The cache entry, or None if it is missing or unreadable.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache_entry(path: Path, entry: dict) -> None:
+    """
+    Writes a cached response to disk, atomically so concurrent runs never read a partial file.
+    Failing to write the cache is not an error, the next run just fetches again.
+    :param path: The path of the cache entry.
+    :param entry: The cache entry.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
 
 
 def get_bootstrap_json() -> dict[str, list | dict]:
@@ -35,7 +141,7 @@ def get_fixtures_json() -> list[dict]:
 
 
 def get_team_abbreviations_map(
-    bootstrap_data: dict[str, list | dict] | None = None
+    bootstrap_data: dict[str, list | dict] | None = None,
 ) -> dict[int, str]:
     """
     Fetches the team abbreviations from the FPL API.
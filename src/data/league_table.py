@@ -1,11 +1,32 @@
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
-from src.data.fpl_api import get_fixtures_json, get_team_abbreviations_map
+from src.data.fpl_api import (
+    get_fixtures_json,
+    get_team_abbreviations_map,
+    read_cache_entry,
+    write_cache_entry,
+)
+
+TABLE_STATE_FILE = "league_table.json"
+TABLE_STATE_VERSION = 1
+NUM_TEAMS = 20
+RECORD_COLUMNS = ["played", "points", "GD", "GF", "GA", "W", "D", "L"]
 
 
-def construct_league_table() -> pd.DataFrame:
+def construct_league_table(
+    raw_fixtures: list[dict] | None = None,
+    bootstrap_data: dict[str, list | dict] | None = None,
+    state_path: str | Path | None = None,
+) -> pd.DataFrame:
     """
     Constructs the league table using fixtures from the FPL API.
+    :param raw_fixtures: the fixtures data, fetched from the API if not given
+    :param bootstrap_data: the bootstrap data, fetched from the API if not given
+    :param state_path: the path to save the table to, so later calls only add new
+        results, see update_raw_table
     :return: the league table with the following columns:
         - team: the team name
         - played: the number of games played
@@ -18,10 +39,14 @@ def construct_league_table() -> pd.DataFrame:
         - L: the number of losses
         - rank: the rank of the team (1 to 20)
     """
-    raw_fixtures = get_fixtures_json()
-    table = construct_raw_table(raw_fixtures)
+    if raw_fixtures is None:
+        raw_fixtures = get_fixtures_json()
+    if state_path is None:
+        table = construct_raw_table(raw_fixtures)
+    else:
+        table = update_raw_table(raw_fixtures, state_path)
 
-    team_abbreviations_map = get_team_abbreviations_map()
+    team_abbreviations_map = get_team_abbreviations_map(bootstrap_data)
     table["team"] = table["team"].map(team_abbreviations_map)
     table = table.set_index("team", drop=True)
 
@@ -34,53 +59,130 @@ def construct_raw_table(raw_fixtures: list[dict]) -> pd.DataFrame:
     :param raw_fixtures: the raw fixtures
     :return: the league table
     """
-    table = {
-        team_id: {
-            "team": team_id,
-            "played": 0,
-            "points": 0,
-            "GD": 0,
-            "GF": 0,
-            "GA": 0,
-            "W": 0,
-            "D": 0,
-            "L": 0,
-        }
-        for team_id in range(1, 21)
+    return rank_raw_table(tally_results(finished_results(raw_fixtures)))
+
+
+def update_raw_table(raw_fixtures: list[dict], state_path: str | Path) -> pd.DataFrame:
+    """
+    Constructs the league table incrementally from the table saved by the last run.
+    Only results not in the saved table are added. The table is rebuilt from scratch if
+    a saved result has changed or is no longer finished, e.g. a new season has started.
+    :param raw_fixtures: the raw fixtures
+    :param state_path: the path of the saved table, created if missing
+    :return: the league table
+    """
+    results = finished_results(raw_fixtures)
+    current = {result_key(result): result[2:] for result in results.tolist()}
+
+    state = read_cache_entry(Path(state_path))
+    if (
+        state is None
+        or state.get("version") != TABLE_STATE_VERSION
+        or any(current.get(key) != scores for key, scores in state["results"].items())
+    ):
+        state = {"version": TABLE_STATE_VERSION, "table": {}, "results": {}}
+
+    is_new = [key not in state["results"] for key in current]
+    records = tally_results(results[is_new])
+    if state["table"]:
+        saved = pd.DataFrame.from_dict(state["table"], orient="index")
+        saved.index = saved.index.astype(int)
+        records[RECORD_COLUMNS] += saved[RECORD_COLUMNS]
+
+    if any(is_new) or not state["results"]:
+        state["table"] = records[RECORD_COLUMNS].to_dict(orient="index")
+        state["results"] = current
+        write_cache_entry(Path(state_path), state)
+
+    return rank_raw_table(records)
+
+
+def finished_results(raw_fixtures: list[dict]) -> np.ndarray:
+    """
+    Gets the results of every finished fixture, including games played out of order.
+    :param raw_fixtures: the raw fixtures
+    :return: the home team, away team, home score and away score of each result, with
+        shape (results, 4)
+    """
+    results = [
+        (
+            fixture["team_h"],
+            fixture["team_a"],
+            fixture["team_h_score"],
+            fixture["team_a_score"],
+        )
+        for fixture in raw_fixtures
+        # unscheduled postponed games have no event, even if marked finished
+        if fixture["event"] is not None and fixture["finished"]
+    ]
+    return np.array(results, dtype=np.int64).reshape(-1, 4)
+
+
+def result_key(result: list[int]) -> str:
+    """
+    Identifies a result by its home and away team, which meet once at each venue a season.
+    :param result: a row of finished_results
+    :return: the key of the result
+    """
+    return f"{result[0]}-{result[1]}"
+
+
+def tally_results(results: np.ndarray) -> pd.DataFrame:
+    """
+    Counts each team's games, goals and points from the results in one pass.
+    :param results: the results from finished_results
+    :return: the record of each team, indexed by team ID, with a team column and
+        RECORD_COLUMNS
+    """
+    home, away, home_score, away_score = results.T
+    teams = np.concatenate([home, away])
+    goals_for = np.concatenate([home_score, away_score])
+    goals_against = np.concatenate([away_score, home_score])
+
+    team_ids = np.arange(1, NUM_TEAMS + 1)
+    if not np.isin(teams, team_ids).all():
+        raise KeyError(f"Unknown team IDs {np.setdiff1d(teams, team_ids).tolist()}")
+
+    def count(weights: np.ndarray | None = None) -> np.ndarray:
+        totals = np.bincount(teams, weights=weights, minlength=NUM_TEAMS + 1)
+        return totals[1:].astype(np.int64)
+
+    goals = count(goals_for), count(goals_against)
+    wins, draws, losses = (
+        count(outcome)
+        for outcome in [
+            goals_for > goals_against,
+            goals_for == goals_against,
+            goals_for < goals_against,
+        ]
+    )
+    columns = {
+        "team": team_ids,
+        "played": count(),
+        "points": 3 * wins + draws,
+        "GD": goals[0] - goals[1],
+        "GF": goals[0],
+        "GA": goals[1],
+        "W": wins,
+        "D": draws,
+        "L": losses,
     }
-    for fixture in raw_fixtures:
-        if fixture["event"] is None:
-            continue  # skip postponed games
-
-        if not fixture["finished"]:
-            break  # stop when first unfinished game is found
-
-        for team_id, team_score, opponent_score in zip(
-            [fixture["team_h"], fixture["team_a"]],
-            [fixture["team_h_score"], fixture["team_a_score"]],
-            [fixture["team_a_score"], fixture["team_h_score"]],
-        ):
-            table_entry = table[team_id]
-
-            table_entry["played"] += 1
-            table_entry["GF"] += team_score
-            table_entry["GA"] += opponent_score
-            table_entry["GD"] = table_entry["GF"] - table_entry["GA"]
-
-            if team_score > opponent_score:
-                table_entry["W"] += 1
-                table_entry["points"] += 3
-            elif team_score == opponent_score:
-                table_entry["D"] += 1
-                table_entry["points"] += 1
-            else:
-                table_entry["L"] += 1
-
-            table[team_id] = table_entry
-
-    df = pd.DataFrame(table).T
-    df = df.sort_values(by=["points", "GD", "GF"], ascending=False)
+    return pd.DataFrame(
+        np.column_stack(list(columns.values())), index=team_ids, columns=list(columns)
+    )
+
+
+def rank_raw_table(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sorts the teams' records into the league table.
+    :param records: the record of each team, from tally_results
+    :return: the league table
+    """
+    # stable, so tied teams stay in team ID order
+    order = np.lexsort((-records["GF"], -records["GD"], -records["points"]))
     # head to head tiebreaks omitted for simplicity. should hopefully not be necessary
 
-    df["rank"] = range(1, 21)
-    return df
+    values = np.column_stack([records.to_numpy()[order], np.arange(1, NUM_TEAMS + 1)])
+    return pd.DataFrame(
+        values, index=records.index[order], columns=[*records.columns, "rank"]
+    )
@@ -1,11 +1,30 @@
+from pathlib import Path
+
 import pandas as pd
 
+from src.data.results_file import read_results
+
 
-def read_ratings() -> pd.DataFrame:
-    ratings = pd.read_csv("../../data/ratings.csv", index_col=0)
+def read_ratings(path: str | Path = "../../data/ratings.csv") -> pd.DataFrame:
+    ratings = pd.read_csv(path, index_col=0)
     return ratings
 
 
-def read_manager_prices() -> pd.DataFrame:
-    manager_prices = pd.read_csv("../../data/manager_prices.csv", index_col=0)
+def read_manager_prices(
+    path: str | Path = "../../data/manager_prices.csv",
+) -> pd.DataFrame:
+    manager_prices = pd.read_csv(path, index_col=0)
     return manager_prices
+
+
+def read_expected_points(path: str | Path = "../../data/am_pts.csv") -> pd.DataFrame:
+    """
+    Reads the mean manager points written by the simulation.
+    :param path: The path of the results file, in any format of read_results.
+    :return: The mean manager points of each team (rows) in each gameweek (columns).
+    """
+    results, _ = read_results(path)
+    columns = [col for col in results.columns if col.endswith("_Pts")]
+    expected_points = results[columns]
+    expected_points.columns = [int(col.removesuffix("_Pts")) for col in columns]
+    return expected_points
@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+METADATA_KEY = "fpl_assistant_manager"  # the Parquet schema metadata key of the run
+
+
+def results_path(path: str | Path, file_format: str) -> Path:
+    """
+    Gets the path of a results file in another format, e.g. am_pts.npz for am_pts.csv.
+    :param path: The path of the results file.
+    :param file_format: "csv", "npz" or "parquet".
+    :return: The path with the format's suffix.
+    """
+    return Path(path).with_suffix(f".{file_format}")
+
+
+def write_results(
+    results: pd.DataFrame, path: str | Path, metadata: dict | None = None
+) -> None:
+    """
+    Writes a results table, in the format given by the path's suffix.
+    CSV files hold the table only. NPZ files hold each column in its own dtype, text
+    columns, e.g. the managers, as strings, under "column_0", "column_1" and so on,
+    the index under "team", and the column names and the metadata as JSON under
+    "schema" and "metadata".
+    Parquet files, which need pyarrow (pip install -e ".[parquet]"), hold the metadata
+    in the schema.
+    :param results: The results table, indexed by team.
+    :param path: The path of the file, ending in .csv, .npz or .parquet.
+    :param metadata: The run's metadata, e.g. the seed and the number of simulations.
+    """
+    metadata = metadata or {}
+    suffix = Path(path).suffix
+    if suffix == ".csv":
+        results.to_csv(path)
+    elif suffix == ".npz":
+        columns = {}
+        for idx, col in enumerate(results.columns):
+            values = results[col].to_numpy()
+            if values.dtype == object:  # saved as strings, as pickles are not loaded
+                values = values.astype(str)
+            columns[f"column_{idx}"] = values
+        schema = {"index": results.index.name, "columns": results.columns.tolist()}
+        np.savez(
+            path,
+            team=results.index.to_numpy(dtype=str),
+            schema=np.array(json.dumps(schema)),
+            metadata=np.array(json.dumps(metadata)),
+            **columns,
+        )
+    elif suffix == ".parquet":
+        pa, pq = _import_pyarrow()
+        table = pa.Table.from_pandas(results)
+        schema_metadata = {**table.schema.metadata, METADATA_KEY: json.dumps(metadata)}
+        pq.write_table(table.replace_schema_metadata(schema_metadata), path)
+    else:
+        raise ValueError(f'Unknown results format "{suffix}" of {path}')
+
+
+def read_results(path: str | Path) -> tuple[pd.DataFrame, dict]:
+    """
+    Reads a results table written by write_results.
+    :param path: The path of the file, ending in .csv, .npz or .parquet.
+    :return: The results table, indexed by team, and the run's metadata, empty for CSV.
+    """
+    suffix = Path(path).suffix
+    if suffix == ".csv":
+        return pd.read_csv(path, index_col=0), {}
+    if suffix == ".npz":
+        with np.load(path, allow_pickle=False) as arrays:
+            schema = json.loads(arrays["schema"].item())
+            metadata = json.loads(arrays["metadata"].item())
+            team = arrays["team"].astype(object)
+            columns = {}
+            for idx, col in enumerate(schema["columns"]):
+                values = arrays[f"column_{idx}"]
+                columns[col] = (
+                    values.astype(object) if values.dtype.kind == "U" else values
+                )
+        results = pd.DataFrame(columns, index=pd.Index(team, name=schema["index"]))
+        return results, metadata
+    if suffix == ".parquet":
+        _, pq = _import_pyarrow()
+        table = pq.read_table(path)
+        metadata = json.loads(table.schema.metadata.get(METADATA_KEY.encode(), b"{}"))
+        return table.to_pandas(), metadata
+    raise ValueError(f'Unknown results format "{suffix}" of {path}')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            'Parquet results need pyarrow: pip install -e ".[parquet]"'
+        ) from None
+    return pa, pq
@@ -0,0 +1,59 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from src.data.fpl_api import get_bootstrap_json, get_fixtures_json
+from src.data.read_csv import read_manager_prices, read_ratings
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path: str | Path) -> dict:
+    """
+    Records the raw inputs of a run into a single snapshot bundle.
+    The bundle holds the bootstrap and fixtures JSON from the FPL API and the
+    ratings and manager prices CSVs. Paths ending in .gz are gzip compressed.
+    :param path: The path to write the bundle to.
+    :return: The bundle.
+    """
+    bundle = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "bootstrap": get_bootstrap_json(),
+        "fixtures": get_fixtures_json(),
+        "ratings": read_ratings().to_csv(),
+        "manager_prices": read_manager_prices().to_csv(),
+    }
+    with _open(path, "wt") as f:
+        json.dump(bundle, f)
+    return bundle
+
+
+def load_snapshot(path: str | Path) -> dict:
+    """
+    Loads a snapshot bundle written by save_snapshot.
+    :param path: The path of the bundle.
+    :return: The bundle, with the ratings and manager prices as DataFrames.
+    """
+    with _open(path, "rt") as f:
+        bundle = json.load(f)
+
+    if bundle.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f'Unsupported snapshot version {bundle.get("version")} in "{path}", '
+            f"expected {SNAPSHOT_VERSION}"
+        )
+
+    for key in ["ratings", "manager_prices"]:
+        bundle[key] = pd.read_csv(StringIO(bundle[key]), index_col=0)
+    return bundle
+
+
+def _open(path: str | Path, mode: str):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
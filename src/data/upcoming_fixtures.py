@@ -6,16 +6,23 @@ from src.data.fpl_api import (
 )
 
 
-def get_upcoming_fixtures(horizon: int = 12) -> pd.DataFrame:
+def get_upcoming_fixtures(
+    horizon: int = 12,
+    bootstrap_data: dict[str, list | dict] | None = None,
+    fixtures_data: list[dict] | None = None,
+) -> pd.DataFrame:
     """
     Fetches the upcoming fixtures from the FPL API.
     :param horizon: The number of gameweeks to fetch.
+    :param bootstrap_data: The bootstrap data, fetched from the API if not given.
+    :param fixtures_data: The fixtures data, fetched from the API if not given.
     :return: The upcoming fixtures.
     """
-    bootstrap_data = get_bootstrap_json()
+    if bootstrap_data is None:
+        bootstrap_data = get_bootstrap_json()
     horizon_start_id = get_next_gameweek_id(bootstrap_data)
     horizon_end_id = horizon_start_id + horizon - 1
-    raw_fixtures = get_raw_fixtures(horizon_start_id, horizon_end_id)
+    raw_fixtures = get_raw_fixtures(horizon_start_id, horizon_end_id, fixtures_data)
 
     team_abbreviations = get_team_abbreviations_map(bootstrap_data)
     fixtures = apply_team_abbreviations(raw_fixtures, team_abbreviations)
@@ -41,14 +48,18 @@ def get_next_gameweek_id(bootstrap_data: dict[str, list | dict]) -> int:
     return next_gameweek_id
 
 
-def get_raw_fixtures(horizon_start: int, horizon_end: int) -> pd.DataFrame:
+def get_raw_fixtures(
+    horizon_start: int, horizon_end: int, data: list[dict] | None = None
+) -> pd.DataFrame:
     """
     Fetches the raw fixtures from the FPL API.
     :param horizon_start: The ID of the first gameweek to fetch.
     :param horizon_end: The ID of the last gameweek to fetch.
+    :param data: The fixtures data, fetched from the API if not given.
     :return: The raw fixtures.
     """
-    data = get_fixtures_json()
+    if data is None:
+        data = get_fixtures_json()
     fixtures = []
     for fixture in data:
         if fixture["event"] is None:  # unscheduled postponed game
@@ -0,0 +1,108 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+CHIP_LENGTH = 3  # the Assistant Manager chip lasts three consecutive gameweeks
+
+
+def plan_chips(
+    expected_points: pd.DataFrame,
+    prices: pd.Series,
+    budget: float | None = None,
+    length: int = CHIP_LENGTH,
+    max_changes: int = 0,
+    top: int = 10,
+) -> pd.DataFrame:
+    """
+    Finds the best plans for the Assistant Manager chip: when to play it and which
+    manager to have in each of its gameweeks. Every window of consecutive gameweeks and
+    every choice of affordable managers is scored at once with prefix sums of the EVs.
+    :param expected_points: The mean manager points of each team (rows) in each
+        gameweek (columns), e.g. from read_expected_points. Missing values, e.g. blank
+        gameweeks, score no points.
+    :param prices: The price of each team's manager.
+    :param budget: The most that can be spent on a manager, or None for no limit.
+    :param length: The number of consecutive gameweeks the chip lasts.
+    :param max_changes: The most times the manager can be changed during the chip.
+    :param top: The number of plans to return.
+    :return: The best plans, best first, with the first and last gameweek of the
+        chip, the manager of each of its gameweeks, the price of the dearest manager,
+        the number of changes and the EV.
+    """
+    affordable = prices.index if budget is None else prices.index[prices <= budget]
+    points = expected_points.loc[expected_points.index.isin(affordable)]
+    teams = points.index.to_numpy()
+    if len(points.columns):
+        gameweeks = np.arange(min(points.columns), max(points.columns) + 1)
+    else:
+        gameweeks = np.arange(0)
+    num_starts = len(gameweeks) - length + 1
+    manager_columns = [f"manager_{i}" for i in range(1, length + 1)]
+    if len(teams) == 0 or num_starts < 1:
+        return pd.DataFrame(
+            columns=["start", "end", *manager_columns, "price", "changes", "EV"]
+        )
+
+    ev = points.reindex(columns=gameweeks).fillna(0.0).to_numpy()
+    cumulative = np.zeros((len(teams), len(gameweeks) + 1))
+    cumulative[:, 1:] = np.cumsum(ev, axis=1)
+
+    plans = [
+        best_plans(cumulative, (0, *changes, length), num_starts, top)
+        for num_changes in range(min(max_changes, length - 1) + 1)
+        for changes in combinations(range(1, length), num_changes)
+    ]
+    evs = np.concatenate([plan_evs for plan_evs, _, _ in plans])
+    starts = np.concatenate([plan_starts for _, plan_starts, _ in plans])
+    managers = np.concatenate([plan_managers for _, _, plan_managers in plans])
+    order = np.lexsort((starts, -evs))[:top]
+    evs, starts, managers = evs[order], starts[order], managers[order]
+
+    result = pd.DataFrame(teams[managers], columns=manager_columns)
+    result.insert(0, "start", gameweeks[starts])
+    result.insert(1, "end", gameweeks[starts] + length - 1)
+    result["price"] = prices.reindex(teams).to_numpy()[managers].max(axis=1)
+    result["changes"] = (managers[:, 1:] != managers[:, :-1]).sum(axis=1)
+    result["EV"] = evs
+    return result
+
+
+def best_plans(
+    cumulative: np.ndarray, bounds: tuple[int, ...], num_starts: int, top: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds the best plans that change manager at the given gameweeks of the chip.
+    :param cumulative: The prefix sums of each manager's EVs, with shape
+        (managers, gameweeks + 1) and a leading column of zeros.
+    :param bounds: The offsets into the chip at which each manager starts, followed by
+        the chip's length, e.g. (0, 2, 3) for a change before the third gameweek.
+    :param num_starts: The number of gameweeks the chip can start in.
+    :param top: The number of plans to return.
+    :return: The EV, start index and manager index in each gameweek of the best plans.
+    """
+    num_teams = len(cumulative)
+    num_segments = len(bounds) - 1
+    total = np.zeros((num_starts,) + (num_teams,) * num_segments)
+    for segment, (begin, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        # the EV of every manager over this part of the chip, for every start
+        sums = (
+            cumulative[:, end : end + num_starts]
+            - cumulative[:, begin : begin + num_starts]
+        )
+        shape = [num_starts] + [1] * num_segments
+        shape[segment + 1] = num_teams
+        total = total + sums.T.reshape(shape)
+        if segment:  # keeping the same manager is not a change
+            shape = [1] * (num_segments + 1)
+            shape[segment] = shape[segment + 1] = num_teams
+            total = np.where(
+                np.eye(num_teams, dtype=bool).reshape(shape), -np.inf, total
+            )
+
+    flat = total.ravel()
+    best = np.argpartition(-flat, min(top, flat.size) - 1)[:top]
+    best = best[np.isfinite(flat[best])]
+    starts, *segment_managers = np.unravel_index(best, total.shape)
+    managers = np.repeat(np.column_stack(segment_managers), np.diff(bounds), axis=1)
+    return flat[best], starts, managers
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import click
+
+from src.data.read_csv import read_expected_points, read_manager_prices
+from src.planning.chips import CHIP_LENGTH, plan_chips
+from src.simulation.tensor_file import tensor_expected_points
+
+
+@click.command()
+@click.option(
+    "--results",
+    default="../../data/am_pts.csv",
+    type=click.Path(dir_okay=False),
+    help="The mean manager points written by the simulation.",
+)
+@click.option(
+    "--tensor",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Plan from a file written by the simulation's --save-tensor instead.",
+)
+@click.option(
+    "--prices",
+    default="../../data/manager_prices.csv",
+    type=click.Path(exists=True, dir_okay=False),
+    help="The manager prices.",
+)
+@click.option(
+    "--budget",
+    default=None,
+    type=float,
+    help="The most that can be spent on a manager. No limit by default.",
+)
+@click.option(
+    "--max-changes",
+    default=0,
+    type=click.IntRange(0, CHIP_LENGTH - 1),
+    help="The most times the manager can be changed during the chip.",
+)
+@click.option(
+    "--top",
+    default=10,
+    type=click.IntRange(1),
+    help="The number of plans to show.",
+)
+@click.option(
+    "--output",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Also write the plans to this CSV file.",
+)
+def main(
+    results: str = "../../data/am_pts.csv",
+    tensor: str | None = None,
+    prices: str = "../../data/manager_prices.csv",
+    budget: float | None = None,
+    max_changes: int = 0,
+    top: int = 10,
+    output: str | None = None,
+):
+    if tensor is not None:
+        expected_points = tensor_expected_points(tensor)
+    elif not Path(results).is_file():
+        raise click.BadParameter(
+            f"{results} does not exist; run the simulation first, or pass --tensor",
+            param_hint="--results",
+        )
+    else:
+        expected_points = read_expected_points(results)
+    plans = plan_chips(
+        expected_points,
+        read_manager_prices(prices)["Price"],
+        budget=budget,
+        max_changes=max_changes,
+        top=top,
+    )
+    if plans.empty:
+        raise click.ClickException(
+            f"No affordable manager over {CHIP_LENGTH} consecutive gameweeks"
+        )
+
+    click.echo(plans.to_string(index=False, float_format="{:.2f}".format))
+    if output is not None:
+        plans.to_csv(output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from statistics import NormalDist
+
+import numpy as np
+
+
+def new_accumulator(shape: tuple[int, ...]) -> dict:
+    """
+    Creates an empty running accumulator for the mean and variance of simulation results.
+    :param shape: The shape of a single simulation's result, e.g. (teams, gameweeks).
+    :return: A dictionary with the following keys:
+        - count: the number of simulations accumulated
+        - mean: the running mean of each cell
+        - m2: the running sum of squared deviations from the mean of each cell
+    """
+    return {"count": 0, "mean": np.zeros(shape), "m2": np.zeros(shape)}
+
+
+def accumulate(accumulator: dict, results: np.ndarray) -> dict:
+    """
+    Folds a batch of simulation results into the accumulator.
+    :param accumulator: The accumulator from new_accumulator.
+    :param results: The results with shape (simulations, *shape).
+    :return: A new accumulator including the batch.
+    """
+    if len(results) == 0:
+        return accumulator
+
+    mean = results.mean(axis=0)
+    batch = {
+        "count": len(results),
+        "mean": mean,
+        "m2": ((results - mean) ** 2).sum(axis=0),
+    }
+    return merge_accumulators(accumulator, batch)
+
+
+def merge_accumulators(first: dict, second: dict) -> dict:
+    """
+    Combines two accumulators as if all of their simulations had been accumulated together,
+    using the pairwise update of Chan et al. so no individual results are needed.
+    :param first: The first accumulator.
+    :param second: The second accumulator.
+    :return: The combined accumulator.
+    """
+    count = first["count"] + second["count"]
+    if first["count"] == 0 or second["count"] == 0:
+        return dict(second if first["count"] == 0 else first)
+
+    delta = second["mean"] - first["mean"]
+    weight = second["count"] / count
+    return {
+        "count": count,
+        "mean": first["mean"] + delta * weight,
+        "m2": first["m2"] + second["m2"] + delta**2 * first["count"] * weight,
+    }
+
+
+def concatenate_accumulators(first: dict, second: dict) -> dict:
+    """
+    Joins the gameweeks of two accumulators of the same simulations, e.g. of earlier
+    gameweeks saved by one run and of later gameweeks simulated on from them.
+    :param first: The accumulator of the earlier gameweeks.
+    :param second: The accumulator of the later gameweeks.
+    :return: The accumulator of all the gameweeks.
+    """
+    if first["count"] != second["count"]:
+        raise ValueError("Only accumulators of the same simulations can be joined")
+    return {
+        "count": first["count"],
+        "mean": np.concatenate([first["mean"], second["mean"]], axis=-1),
+        "m2": np.concatenate([first["m2"], second["m2"]], axis=-1),
+    }
+
+
+def points_histogram(results: np.ndarray, num_bins: int) -> np.ndarray:
+    """
+    Counts the manager points of each cell in unit-wide bins: bin i counts the results
+    in [i, i + 1), and the last bin counts everything above it too. Histograms of
+    separate simulations are merged by adding them up.
+    :param results: The results with shape (simulations, *shape), NaN where a team has
+        no fixture, which are not counted.
+    :param num_bins: The number of bins.
+    :return: The counts, with shape (*shape, num_bins).
+    """
+    shape = results.shape[1:]
+    cells = np.broadcast_to(np.arange(np.prod(shape)).reshape(shape), results.shape)
+    counted = ~np.isnan(results)
+    bins = np.clip(results[counted], 0, num_bins - 1).astype(np.int64)
+    counts = np.bincount(
+        cells[counted] * num_bins + bins, minlength=np.prod(shape) * num_bins
+    )
+    return counts.reshape(*shape, num_bins)
+
+
+def accumulator_variance(accumulator: dict) -> np.ndarray:
+    """
+    Calculates the sample variance of each cell from the accumulator.
+    :param accumulator: The accumulator.
+    :return: The sample variance, NaN where fewer than two simulations were accumulated.
+    """
+    if accumulator["count"] < 2:
+        return np.full_like(accumulator["mean"], np.nan)
+    return accumulator["m2"] / (accumulator["count"] - 1)
+
+
+def confidence_half_width(accumulator: dict, confidence: float = 0.95) -> np.ndarray:
+    """
+    Calculates the half-width of the normal confidence interval of each cell's mean.
+    :param accumulator: The accumulator.
+    :param confidence: The confidence level, e.g. 0.95.
+    :return: The half-width of the interval, NaN where it cannot be estimated.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return z * np.sqrt(accumulator_variance(accumulator) / accumulator["count"])
+
+
+def variance_reduction_factor(accumulator: dict, chunk_size: int) -> np.ndarray:
+    """
+    Estimates how much lower the variance of each mean is than with plain sampling.
+    Plain sampling would give each chunk mean a variance of the per-simulation variance
+    divided by the chunk size; the achieved variance is measured from the spread of the
+    independent full-size chunk means.
+    :param accumulator: The accumulator from accumulate_simulations, with "chunk_means".
+    :param chunk_size: The number of simulations per chunk.
+    :return: The variance reduction factor of each cell, NaN where it cannot be measured.
+    """
+    chunk_means = accumulator["chunk_means"]
+    plain = accumulator_variance(accumulator) / chunk_size
+    if chunk_means["count"] < 3:
+        return np.full_like(plain, np.nan)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = plain / accumulator_variance(chunk_means)
+    factor[~np.isfinite(factor)] = np.nan
+    return factor
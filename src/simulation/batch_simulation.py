@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from src.simulation.league_state import pack_states, rank_tables, table_to_state
+from src.simulation.manager_points import (
+    expected_manager_points,
+    is_bonus_match,
+    manager_points_table,
+)
+from src.simulation.match_simulation import update_table
+from src.simulation.sampling import build_goal_sampler, sample_goals
+from src.simulation.timings import stage
+
+
+def prepare_fixture_arrays(
+    fixtures: pd.DataFrame, teams: pd.Index, sampling: str = "inverse"
+) -> dict:
+    """
+    Converts the fixtures into the integer and float arrays used by the batch engine.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param teams: The teams in the league table, in table order.
+    :param sampling: The goal sampling method, see build_goal_sampler.
+    :return: A dictionary with the following keys:
+        - home: the table index of the home team of each fixture
+        - away: the table index of the away team of each fixture
+        - gameweek: the position of each fixture's gameweek in gameweeks
+        - gameweeks: the sorted gameweek IDs in the horizon
+        - max_goals: the highest number of goals in the goal distributions
+        - home_sampler: the sampler of the home goals of each fixture
+        - away_sampler: the sampler of the away goals of each fixture
+        - expected_points: the expected manager points of each fixture, indexed by
+          [fixture, side (0 home, 1 away), bonus flag]
+    """
+    team_index = {team: idx for idx, team in enumerate(teams)}
+    gameweeks = np.unique(fixtures["gameweek"].to_numpy())
+
+    arrays = {
+        "home": fixtures["home"].map(team_index).to_numpy(dtype=np.int64),
+        "away": fixtures["away"].map(team_index).to_numpy(dtype=np.int64),
+        "gameweek": np.searchsorted(gameweeks, fixtures["gameweek"].to_numpy()),
+        "gameweeks": gameweeks,
+    }
+    probabilities = {}
+    for side in ["home", "away"]:
+        distributions = np.array(
+            fixtures[f"{side}_goal_distribution"].tolist(), dtype=np.float64
+        ).reshape(len(fixtures), -1)
+        # same normalisation as random.choices
+        probabilities[side] = distributions / distributions.sum(axis=1, keepdims=True)
+        arrays[f"{side}_sampler"] = build_goal_sampler(probabilities[side], sampling)
+
+    arrays["max_goals"] = probabilities["home"].shape[1] - 1
+    arrays["expected_points"] = expected_manager_points(
+        probabilities["home"], probabilities["away"]
+    )
+    return arrays
+
+
+def sample_fixture_goals(
+    fixture_arrays: dict, uniforms: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Samples the home and away goals of every fixture from a block of uniforms.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param uniforms: Uniforms with shape (2, fixtures, simulations), see draw_uniform_block.
+    :return: The home goals and the away goals, each with shape (fixtures, simulations).
+    """
+    home_goals = sample_goals(fixture_arrays["home_sampler"], uniforms[0])
+    away_goals = sample_goals(fixture_arrays["away_sampler"], uniforms[1])
+    return home_goals, away_goals
+
+
+def simulate_batch(
+    fixture_arrays: dict,
+    table: pd.DataFrame,
+    uniforms: np.ndarray,
+    estimator: str = "sampled",
+    state: dict[str, np.ndarray] | None = None,
+    states: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Simulates a batch of seasons at once, with every simulation held in NumPy arrays.
+    With the "conditional" estimator the sampled scorelines only evolve the league
+    table, and each fixture scores the exact expected manager points given the
+    start-of-gameweek ranks, which removes the scoreline noise from the estimate.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param table: The current league table, in the team order used for fixture_arrays.
+    :param uniforms: The uniforms to sample goals from, with shape
+        (2, fixtures, simulations), see draw_uniform_block.
+    :param estimator: "sampled" to score the sampled scorelines, or "conditional".
+    :param state: The table of each simulation to start from, with arrays of shape
+        (simulations, teams), e.g. from unpack_states. Updated in place. Every
+        simulation starts from the table by default.
+    :param states: An array to also store each simulation's table after every
+        gameweek in, with shape (simulations, gameweeks, 3, teams), see pack_states.
+    :return: The manager points of each team in each gameweek of each simulation, with
+        shape (simulations, teams, gameweeks). Gameweeks without a fixture for a team are NaN.
+    """
+    home, away = fixture_arrays["home"], fixture_arrays["away"]
+    fixture_gameweeks = fixture_arrays["gameweek"]
+    num_teams = len(table)
+    num_gameweeks = len(fixture_arrays["gameweeks"])
+    num_simulations = uniforms.shape[2]
+
+    with stage("simulation.sampling"):
+        home_goals, away_goals = sample_fixture_goals(fixture_arrays, uniforms)
+
+    if state is None:
+        state = table_to_state(table, num_simulations)
+    points_table = manager_points_table(fixture_arrays["max_goals"])
+
+    manager_points = np.zeros((num_simulations, num_teams, num_gameweeks))
+    has_fixture = np.zeros((num_teams, num_gameweeks), dtype=bool)
+    for week in range(num_gameweeks):
+        with stage("simulation.rank_tables"):
+            ranks = rank_tables(state["points"], state["GD"], state["GF"])
+
+        for fixture in np.flatnonzero(fixture_gameweeks == week):
+            h, a = home[fixture], away[fixture]
+            hg, ag = home_goals[fixture], away_goals[fixture]
+
+            with stage("simulation.manager_points"):
+                for side, (team, oppo, goals_for, goals_against) in enumerate(
+                    [(h, a, hg, ag), (a, h, ag, hg)]
+                ):
+                    bonus = is_bonus_match(ranks[:, team], ranks[:, oppo])
+                    bonus = bonus.astype(np.intp)
+                    if estimator == "conditional":
+                        points = fixture_arrays["expected_points"][fixture, side, bonus]
+                    else:
+                        points = points_table[goals_for, goals_against, bonus]
+                    manager_points[:, team, week] += points
+                    has_fixture[team, week] = True
+
+            with stage("simulation.update_table"):
+                update_table(state, h, hg, a, ag)
+
+        if states is not None:
+            states[:, week] = pack_states(state, states.dtype)
+
+    manager_points[:, ~has_fixture] = np.nan
+    return manager_points
@@ -0,0 +1,570 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from src.simulation.accumulators import (
+    accumulate,
+    confidence_half_width,
+    merge_accumulators,
+    new_accumulator,
+    points_histogram,
+)
+from src.simulation.batch_simulation import (
+    prepare_fixture_arrays,
+    sample_fixture_goals,
+    simulate_batch,
+)
+from src.simulation.league_state import rank_tables, table_to_state, unpack_states
+from src.simulation.manager_points import is_bonus_match, manager_points_table
+from src.simulation.match_simulation import update_table
+from src.simulation.options import CHUNK_SIZE
+from src.simulation.sampling import draw_uniform_block
+from src.simulation.tensor_file import encode_points
+from src.simulation.timings import (
+    merge_timings,
+    recording_options,
+    stage,
+    start_timings,
+    stop_timings,
+)
+
+
+def run_simulations(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    num_simulations: int,
+    cpus: int,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Runs the simulations and returns the mean manager points.
+    Takes the same arguments as accumulate_simulations.
+    :return: The mean manager points of each team (rows) in each gameweek (columns).
+    """
+    accumulator = accumulate_simulations(
+        fixtures, table, num_simulations, cpus, **kwargs
+    )
+    return results_frame(accumulator["mean"], table, fixtures)
+
+
+def accumulate_simulations(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    num_simulations: int,
+    cpus: int,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    tolerance: float | None = None,
+    confidence: float = 0.95,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    progress: bool = True,
+    tensor: np.ndarray | None = None,
+    start_states: np.ndarray | None = None,
+    states: np.ndarray | None = None,
+    spawn_key: tuple[int, ...] = (),
+    first_chunk: int = 0,
+    histogram_bins: int | None = None,
+) -> dict:
+    """
+    Runs the simulations in chunks, optionally spread over a process pool.
+    Each chunk has its own random stream derived from the seed and the chunk's position,
+    so the results only depend on the seed, the number of simulations and the chunk
+    size, not on cpus. Chunks are folded into running accumulators as they finish,
+    so memory use does not grow with the number of simulations.
+    If a tolerance is given, chunks are added until the confidence interval half-width
+    of every team/gameweek mean is within it, or num_simulations is reached. The
+    intervals treat simulations as independent, which is conservative with variance
+    reduction.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table.
+    :param num_simulations: The number of simulations to run, or the maximum with a tolerance.
+    :param cpus: The number of worker processes to use.
+    :param engine: The simulation engine, "loop", "batch" or "jit".
+    :param seed: The seed for the random number generators.
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :param chunk_size: The number of simulations per chunk.
+    :param tolerance: The target confidence interval half-width in points.
+    :param confidence: The confidence level of the intervals checked against tolerance.
+    :param sampling: The goal sampling method, see build_goal_sampler.
+    :param variance_reduction: How each chunk's uniforms are drawn, see draw_uniform_block.
+    :param progress: Whether to show a progress bar.
+    :param tensor: An array to also store every simulation's manager points in, with
+        shape (num_simulations, teams, gameweeks), e.g. from create_tensor_file. Only
+        the first accumulator["count"] simulations are written if stopped early.
+    :param start_states: The packed table of each simulation to start from instead of
+        the table, with shape (num_simulations, 3, teams), see pack_states. Needs the
+        batch engine.
+    :param states: An array to also store each simulation's packed table after every
+        gameweek in, with shape (num_simulations, gameweeks, 3, teams). Needs the
+        batch engine.
+    :param spawn_key: Prepended to the chunk index in each chunk's spawn key, to give
+        the run random streams independent of runs with another spawn key.
+    :param first_chunk: The index of the first chunk, so a shard of a larger run
+        simulates the same chunks as the larger run, see plan_chunks.
+    :param histogram_bins: The number of bins to also count each team's manager points
+        per gameweek in, if any, see points_histogram.
+    :return: The accumulator of the manager points, with shape (teams, gameweeks).
+        The accumulator of the means of full-size chunks, which are independent
+        replicates, is included under "chunk_means", and the histogram of the points,
+        with shape (teams, gameweeks, histogram_bins), under "histogram" if asked for.
+    """
+    fixture_arrays = prepare_fixture_arrays(fixtures, table.index, sampling)
+    simulate = partial(
+        accumulate_chunk,
+        fixtures=fixtures,
+        table=table,
+        fixture_arrays=fixture_arrays,
+        engine=engine,
+        estimator=estimator,
+        variance_reduction=variance_reduction,
+        timings=recording_options(),
+        results_dtype=None if tensor is None else tensor.dtype,
+        states_dtype=None if states is None else states.dtype,
+        histogram_bins=histogram_bins,
+    )
+
+    shape = (len(table), len(fixture_arrays["gameweeks"]))
+    accumulator = new_accumulator(shape)
+    chunk_means = new_accumulator(shape)
+    histogram = (
+        None if histogram_bins is None else np.zeros((*shape, histogram_bins), np.int64)
+    )
+    with tqdm(total=num_simulations, disable=not progress) as progress_bar:
+        chunks = plan_chunks(num_simulations, seed, chunk_size, spawn_key, first_chunk)
+        if start_states is not None:
+            chunks = (
+                (size, seed_sequence, start_states[idx * chunk_size :][:size])
+                for idx, (size, seed_sequence) in enumerate(chunks)
+            )
+        for chunk_accumulator in map_chunks(simulate, chunks, cpus):
+            merge_timings(chunk_accumulator.pop("timings", {}))
+            start = accumulator["count"]
+            if tensor is not None:
+                results = chunk_accumulator.pop("results")
+                tensor[start : start + len(results)] = results
+            if states is not None:
+                chunk_states = chunk_accumulator.pop("states")
+                states[start : start + len(chunk_states)] = chunk_states
+            if histogram is not None:
+                histogram += chunk_accumulator.pop("histogram")
+            accumulator = merge_accumulators(accumulator, chunk_accumulator)
+            if chunk_accumulator["count"] == chunk_size:
+                chunk_means = accumulate(chunk_means, chunk_accumulator["mean"][None])
+            progress_bar.update(chunk_accumulator["count"])
+
+            if tolerance is not None and accumulator["count"] > 1:
+                half_width = confidence_half_width(accumulator, confidence)
+                if np.nanmax(half_width, initial=0.0) <= tolerance:
+                    break
+
+    accumulator["chunk_means"] = chunk_means
+    if histogram is not None:
+        accumulator["histogram"] = histogram
+    return accumulator
+
+
+def accumulate_scenarios(
+    scenarios: dict[str, pd.DataFrame],
+    table: pd.DataFrame,
+    num_simulations: int,
+    cpus: int,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    progress: bool = True,
+) -> dict[str, dict]:
+    """
+    Runs the simulations of several scenarios together, in chunks like
+    accumulate_simulations. Every scenario's seasons in a chunk are simulated from the
+    same uniforms, so the scenarios share their random numbers: the difference between
+    two scenarios is mostly due to their ratings rather than to sampling noise.
+    :param scenarios: The fixtures with the goal probability distributions of each
+        scenario, keyed by scenario name. The first scenario is the base.
+    :param table: The current league table.
+    :param num_simulations: The number of simulations of each scenario.
+    :param cpus: The number of worker processes to use.
+    :param engine: The simulation engine, "loop", "batch" or "jit".
+    :param seed: The seed for the random number generators.
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :param chunk_size: The number of simulations per chunk.
+    :param sampling: The goal sampling method, see build_goal_sampler. Inverse CDF
+        sampling keeps the goals of each scenario monotone in the shared uniforms, which
+        couples the scenarios more tightly than alias sampling.
+    :param variance_reduction: How each chunk's uniforms are drawn, see draw_uniform_block.
+    :param progress: Whether to show a progress bar.
+    :return: The accumulator of each scenario's manager points, keyed by scenario name.
+        Every scenario but the base also has the accumulator of its difference from the
+        base under "difference".
+    """
+    fixtures = next(iter(scenarios.values()))
+    scenario_arrays = {
+        name: prepare_fixture_arrays(scenario_fixtures, table.index, sampling)
+        for name, scenario_fixtures in scenarios.items()
+    }
+    simulate = partial(
+        accumulate_scenario_chunk,
+        fixtures=fixtures,
+        table=table,
+        scenario_arrays=scenario_arrays,
+        engine=engine,
+        estimator=estimator,
+        variance_reduction=variance_reduction,
+    )
+
+    shape = (len(table), len(scenario_arrays[next(iter(scenarios))]["gameweeks"]))
+    accumulators = {name: new_accumulator(shape) for name in scenarios}
+    differences = {name: new_accumulator(shape) for name in list(scenarios)[1:]}
+    with tqdm(total=num_simulations, disable=not progress) as progress_bar:
+        chunks = plan_chunks(num_simulations, seed, chunk_size)
+        for chunk_accumulators in map_chunks(simulate, chunks, cpus):
+            for name, chunk_accumulator in chunk_accumulators.items():
+                if name in differences:
+                    differences[name] = merge_accumulators(
+                        differences[name], chunk_accumulator["difference"]
+                    )
+                accumulators[name] = merge_accumulators(
+                    accumulators[name], chunk_accumulator
+                )
+            progress_bar.update(chunk_accumulator["count"])
+
+    for name, difference in differences.items():
+        accumulators[name]["difference"] = difference
+    return accumulators
+
+
+def accumulate_scenario_chunk(
+    num_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    scenario_arrays: dict[str, dict],
+    engine: str = "loop",
+    estimator: str = "sampled",
+    variance_reduction: str = "none",
+) -> dict[str, dict]:
+    """
+    Simulates one chunk of every scenario from a single block of uniforms.
+    :param num_simulations: The number of simulations in the chunk.
+    :param seed_sequence: The seed sequence of the chunk.
+    :param fixtures: The fixtures with goal probability distributions of any scenario.
+    :param table: The current league table.
+    :param scenario_arrays: The fixture arrays of each scenario, the base first.
+    :param engine: The simulation engine, "loop", "batch" or "jit".
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :param variance_reduction: How the chunk's uniforms are drawn, see draw_uniform_block.
+    :return: The accumulator of each scenario's results, with the accumulator of the
+        difference from the base under "difference" for every scenario but the base.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    uniforms = draw_uniform_block(
+        rng, len(fixtures), num_simulations, variance_reduction
+    )
+
+    accumulators = {}
+    base = None
+    for name, fixture_arrays in scenario_arrays.items():
+        results = simulate_uniforms(
+            uniforms, fixtures, table, fixture_arrays, engine, estimator
+        )
+        accumulators[name] = accumulate(new_accumulator(results.shape[1:]), results)
+        if base is None:
+            base = results
+        else:
+            accumulators[name]["difference"] = accumulate(
+                new_accumulator(results.shape[1:]), results - base
+            )
+    return accumulators
+
+
+def results_frame(
+    values: np.ndarray, table: pd.DataFrame, fixtures: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Labels a teams x gameweeks array of results, dropping teams without any fixture.
+    :param values: The results with shape (teams, gameweeks).
+    :param table: The league table, giving the team order.
+    :param fixtures: The fixtures, giving the gameweeks.
+    :return: The results with teams as rows and gameweeks as columns.
+    """
+    gameweeks = np.unique(fixtures["gameweek"].to_numpy())
+    df = pd.DataFrame(values, index=table.index, columns=gameweeks)
+    return df.dropna(how="all")
+
+
+def plan_chunks(
+    num_simulations: int,
+    seed: int,
+    chunk_size: int = CHUNK_SIZE,
+    spawn_key: tuple[int, ...] = (),
+    first_chunk: int = 0,
+) -> Iterator[tuple[int, np.random.SeedSequence]]:
+    """
+    Splits the simulations into chunks, each with an independent seed sequence.
+    The seed sequence of chunk i is the i-th child of the root seed, so any chunk
+    can be reproduced on its own.
+    :param num_simulations: The total number of simulations.
+    :param seed: The root seed.
+    :param chunk_size: The maximum number of simulations per chunk.
+    :param spawn_key: Prepended to the chunk index in each chunk's spawn key.
+    :param first_chunk: The index of the first chunk, e.g. 10 to plan chunks 10, 11, ...
+        of a larger run.
+    :return: An iterator of (number of simulations, seed sequence) for each chunk.
+    """
+    for idx, start in enumerate(range(0, num_simulations, chunk_size), first_chunk):
+        seed_sequence = np.random.SeedSequence(seed, spawn_key=(*spawn_key, idx))
+        yield min(chunk_size, num_simulations - start), seed_sequence
+
+
+def map_chunks(function: Callable, chunks: Iterable[tuple], cpus: int) -> Iterator:
+    """
+    Applies the function to every chunk, in order, using a process pool if cpus > 1.
+    Chunks are submitted lazily, a few ahead of the one being consumed, so the caller
+    can stop early without all chunks having been simulated.
+    :param function: The function to apply, taking the chunk's tuple as arguments.
+    :param chunks: The chunks to process.
+    :param cpus: The number of worker processes to use.
+    :return: An iterator over the results in chunk order.
+    """
+    if cpus <= 1:
+        yield from (function(*chunk) for chunk in chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=cpus) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(function, *chunk))
+                if len(pending) >= 2 * cpus:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def accumulate_chunk(
+    num_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    start_states: np.ndarray | None = None,
+    timings: dict | None = None,
+    results_dtype: np.dtype | None = None,
+    states_dtype: np.dtype | None = None,
+    histogram_bins: int | None = None,
+    **kwargs,
+) -> dict:
+    """
+    Simulates one chunk and reduces it to an accumulator before returning it,
+    so only the summary is passed back from worker processes.
+    Takes the same arguments as simulate_chunk.
+    :param timings: The start_timings options to record the chunk's stages with, if any.
+    :param results_dtype: The dtype to also return the chunk's results in, if any,
+        see encode_points.
+    :param states_dtype: The dtype to also return the chunk's packed tables after every
+        gameweek in, if any, see simulate_batch.
+    :param histogram_bins: The number of bins to also count the chunk's results in,
+        if any, see points_histogram.
+    :return: The accumulator of the chunk's results, with the recorded stages under
+        "timings" if timings were given, the results under "results" if a
+        results_dtype was given, the tables under "states" if a states_dtype was and
+        the histogram under "histogram" if histogram_bins were.
+    """
+    states = None
+    if states_dtype is not None:
+        shape = (len(kwargs["fixture_arrays"]["gameweeks"]), 3, len(kwargs["table"]))
+        states = np.empty((num_simulations, *shape), dtype=states_dtype)
+    simulate = partial(
+        simulate_chunk,
+        num_simulations,
+        seed_sequence,
+        start_states=start_states,
+        states=states,
+        **kwargs,
+    )
+
+    if timings is None:
+        results = simulate()
+        accumulator = accumulate(new_accumulator(results.shape[1:]), results)
+    else:
+        start_timings(**timings)
+        try:
+            with stage("simulation.chunk"):
+                results = simulate()
+        finally:
+            stages = stop_timings()
+        accumulator = accumulate(new_accumulator(results.shape[1:]), results)
+        accumulator["timings"] = stages
+
+    if results_dtype is not None:
+        accumulator["results"] = encode_points(results, results_dtype)
+    if states is not None:
+        accumulator["states"] = states
+    if histogram_bins is not None:
+        accumulator["histogram"] = points_histogram(results, histogram_bins)
+    return accumulator
+
+
+def simulate_chunk(
+    num_simulations: int,
+    seed_sequence: np.random.SeedSequence,
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    fixture_arrays: dict,
+    engine: str = "loop",
+    estimator: str = "sampled",
+    variance_reduction: str = "none",
+    start_states: np.ndarray | None = None,
+    states: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Simulates one chunk of seasons with its own random stream.
+    :param num_simulations: The number of simulations in the chunk.
+    :param seed_sequence: The seed sequence of the chunk.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param engine: The simulation engine, "loop", "batch" or "jit".
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :param variance_reduction: How the chunk's uniforms are drawn, see draw_uniform_block.
+    :param start_states: The packed table of each simulation to start from, if not the
+        table, see pack_states.
+    :param states: An array to also store the packed tables after every gameweek in.
+    :return: The manager points with shape (simulations, teams, gameweeks).
+    """
+    rng = np.random.default_rng(seed_sequence)
+    uniforms = draw_uniform_block(
+        rng, len(fixtures), num_simulations, variance_reduction
+    )
+    start_state = None if start_states is None else unpack_states(start_states)
+    return simulate_uniforms(
+        uniforms,
+        fixtures,
+        table,
+        fixture_arrays,
+        engine,
+        estimator,
+        start_state,
+        states,
+    )
+
+
+def simulate_uniforms(
+    uniforms: np.ndarray,
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    fixture_arrays: dict,
+    engine: str = "loop",
+    estimator: str = "sampled",
+    start_state: dict[str, np.ndarray] | None = None,
+    states: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Simulates one season for each column of a block of uniforms. Simulating different
+    fixture arrays from the same block gives them common random numbers.
+    :param uniforms: The uniforms with shape (2, fixtures, simulations), see
+        draw_uniform_block.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param engine: The simulation engine, "loop", "batch" or "jit".
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :param start_state: The table of each simulation to start from, see simulate_batch.
+    :param states: An array to also store the packed tables in, see simulate_batch.
+    :return: The manager points with shape (simulations, teams, gameweeks).
+    """
+    if engine == "batch":
+        return simulate_batch(
+            fixture_arrays, table, uniforms, estimator, start_state, states
+        )
+    if start_state is not None or states is not None:
+        raise ValueError(
+            "Simulating from or storing table states needs the batch engine"
+        )
+    if engine == "jit":
+        # only the jit engine imports numba, which is slow to import
+        from src.simulation.jit_simulation import simulate_jit
+
+        return simulate_jit(fixture_arrays, table, uniforms, estimator)
+
+    num_simulations = uniforms.shape[2]
+    with stage("simulation.sampling"):
+        home_goals, away_goals = sample_fixture_goals(fixture_arrays, uniforms)
+    expected_points = None
+    if estimator == "conditional":
+        expected_points = fixture_arrays["expected_points"]
+
+    results = np.zeros((num_simulations, len(table), len(fixture_arrays["gameweeks"])))
+    for i in range(num_simulations):
+        fixture_goals = (home_goals[:, i], away_goals[:, i])
+        result = simulate_horizon(
+            fixtures,
+            table,
+            fixture_goals=fixture_goals,
+            expected_points=expected_points,
+        )
+        results[i] = result.reindex(
+            index=table.index, columns=fixture_arrays["gameweeks"]
+        ).values
+    return results
+
+
+def simulate_horizon(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    fixture_goals: tuple[np.ndarray, np.ndarray],
+    expected_points: np.ndarray | None = None,
+) -> pd.DataFrame:
+    points = {}
+    current_week = -1
+    team_index = {team: idx for idx, team in enumerate(table.index)}
+    max_goals = max(map(len, fixtures["home_goal_distribution"]), default=8) - 1
+    points_table = manager_points_table(max_goals)
+    running_table = table_to_state(table)
+    start_of_gw_rank = running_table["rank"]
+    for position, fixture in enumerate(fixtures.itertuples()):
+        if fixture.gameweek != current_week:
+            current_week = fixture.gameweek
+            with stage("simulation.rank_tables"):
+                start_of_gw_rank = rank_tables(
+                    running_table["points"], running_table["GD"], running_table["GF"]
+                )
+
+        home_goals, away_goals = (goals[position] for goals in fixture_goals)
+        home, away = team_index[fixture.home], team_index[fixture.away]
+        with stage("simulation.update_table"):
+            running_table = update_table(
+                running_table, home, home_goals, away, away_goals
+            )
+
+        teams = [fixture.home, fixture.away]
+        team_ids = [home, away]
+        goals = [home_goals, away_goals]
+        with stage("simulation.manager_points"):
+            for idx in range(2):
+                team_rank = start_of_gw_rank[team_ids[idx]]
+                oppo_rank = start_of_gw_rank[team_ids[1 - idx]]
+
+                bonus = int(is_bonus_match(team_rank, oppo_rank))
+                if expected_points is None:
+                    manager_points = points_table[goals[idx], goals[1 - idx], bonus]
+                else:
+                    manager_points = expected_points[position, idx, bonus]
+
+                points[teams[idx]] = points.get(teams[idx], {})
+                points[teams[idx]][current_week] = (
+                    points[teams[idx]].get(current_week, 0) + manager_points
+                )
+
+    df = pd.DataFrame(points).T
+    return df
@@ -1,10 +1,15 @@
-from scipy.stats import poisson
+import numpy as np
 import pandas as pd
 
 
-def predict_xg(attack_rating: float, defence_rating: float, is_home: bool) -> float:
+def predict_xg(
+    attack_rating: float | np.ndarray,
+    defence_rating: float | np.ndarray,
+    is_home: bool | np.ndarray,
+) -> float | np.ndarray:
     """
     Predicts the xG of a team based on their attack rating and defence rating.
+    Also works element-wise on arrays of ratings.
     :param attack_rating: The attack rating of the team.
     :param defence_rating: The defence rating of the team.
     :param is_home: Whether the team is at home or away.
@@ -14,46 +19,77 @@ def predict_xg(attack_rating: float, defence_rating: float, is_home: bool) -> fl
     HOME_XG = 1.712665406
     AWAY_XG = 1.351606805
     average_xg = HOME_XG + AWAY_XG / 2
-    if is_home:
-        home_away_scale = HOME_XG / average_xg
-    else:
-        home_away_scale = AWAY_XG / average_xg
+    home_away_scale = np.where(is_home, HOME_XG, AWAY_XG) / average_xg
 
     return home_away_scale * attack_rating * defence_rating
 
 
-def discrete_goal_distribution(xg: float, max_number_of_goals: int = 7) -> [float]:
+def discrete_goal_distribution(
+    xg: float | np.ndarray, max_number_of_goals: int = 7
+) -> np.ndarray:
     """
     Calculates the probability of each number of goals scored for a given xG.
     Assumes that goals are scored independently and that they are Poisson distributed.
-    :param xg: The predicted xG of the team.
+    The last entry holds the probability of max_number_of_goals or more, so the
+    distribution sums to 1.
+    :param xg: The predicted xG of the team, or an array of xGs.
     :param max_number_of_goals: The maximum number of goals to consider.
-    :return: A list of probabilities for each number of goals scored, starting from 0.
+    :return: The probabilities for each number of goals scored, starting from 0, along
+        the last axis.
     """
-    probabilities = [poisson.pmf(k=k, mu=xg) for k in range(0, max_number_of_goals + 1)]
+    mu = np.asarray(xg, dtype=np.float64)[..., np.newaxis]
+    goals = np.arange(max_number_of_goals + 1)
+    factorials = np.cumprod(np.maximum(goals, 1), dtype=np.float64)
+    probabilities = mu**goals * np.exp(-mu) / factorials
+    tail = 1.0 - probabilities[..., :-1].sum(axis=-1)
+    probabilities[..., -1] = np.maximum(tail, 0.0)
     return probabilities
 
 
+def goal_distribution_matrix(
+    ratings: pd.DataFrame, max_number_of_goals: int = 7
+) -> np.ndarray:
+    """
+    Calculates the goal distribution of every team against every opponent, home and away.
+    :param ratings: The ratings, indexed by team, with "Attack Strength" and "Defence Strength".
+    :param max_number_of_goals: The maximum number of goals to consider.
+    :return: An array indexed by [team, opponent, venue (0 home, 1 away), goals] with the
+        teams in the order of the ratings index.
+    """
+    attack = ratings["Attack Strength"].to_numpy(dtype=np.float64)
+    defence = ratings["Defence Strength"].to_numpy(dtype=np.float64)
+    is_home = np.array([True, False])
+
+    xg = predict_xg(
+        attack[:, np.newaxis, np.newaxis],
+        defence[np.newaxis, :, np.newaxis],
+        is_home[np.newaxis, np.newaxis, :],
+    )
+    return discrete_goal_distribution(xg, max_number_of_goals)
+
+
 def add_goal_proba_distributions(
     fixtures: pd.DataFrame, ratings: pd.DataFrame
 ) -> pd.DataFrame:
-    home_goal_distributions = []
-    away_goal_distributions = []
-    for fixture in fixtures.itertuples():
-        teams = [fixture.home, fixture.away]
-        for idx, (team, oppo) in enumerate(zip(teams, reversed(teams))):
-            attack_rating = ratings.loc[team, "Attack Strength"]
-            defence_rating = ratings.loc[oppo, "Defence Strength"]
-            is_home = idx == 0
-
-            xg = predict_xg(attack_rating, defence_rating, is_home)
-            goal_probabilities = discrete_goal_distribution(xg)
-
-            if is_home:
-                home_goal_distributions.append(goal_probabilities)
-            else:
-                away_goal_distributions.append(goal_probabilities)
-
-    fixtures["home_goal_distribution"] = home_goal_distributions
-    fixtures["away_goal_distribution"] = away_goal_distributions
+    """
+    Adds the home and away goal distributions of each fixture, looked up from the
+    team pairing matrix so each distribution is only calculated once.
+    :param fixtures: The fixtures.
+    :param ratings: The ratings, indexed by team.
+    :return: The fixtures with home_goal_distribution and away_goal_distribution columns.
+    """
+    distributions = goal_distribution_matrix(ratings)
+    home = _team_positions(ratings.index, fixtures["home"])
+    away = _team_positions(ratings.index, fixtures["away"])
+
+    fixtures["home_goal_distribution"] = list(distributions[home, away, 0])
+    fixtures["away_goal_distribution"] = list(distributions[away, home, 1])
     return fixtures
+
+
+def _team_positions(teams: pd.Index, fixture_teams: pd.Series) -> np.ndarray:
+    positions = teams.get_indexer(fixture_teams)
+    if (positions == -1).any():
+        missing = sorted(set(fixture_teams[positions == -1]))
+        raise KeyError(f"No ratings for teams: {missing}")
+    return positions
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from src.simulation.batch_simulation import sample_fixture_goals
+from src.simulation.league_state import GD_BITS, GF_BITS, table_to_state
+from src.simulation.manager_points import manager_points_table
+from src.simulation.timings import stage
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the kernels run as plain Python without it
+    njit = None
+
+
+def jit(function):
+    """
+    Compiles a kernel with numba if it is installed, or leaves it as plain Python.
+    :param function: The kernel, using only integer and float arrays.
+    :return: The compiled kernel, or the function itself.
+    """
+    if njit is None:
+        return function
+    return njit(cache=True, nogil=True)(function)
+
+
+def simulate_jit(
+    fixture_arrays: dict,
+    table: pd.DataFrame,
+    uniforms: np.ndarray,
+    estimator: str = "sampled",
+) -> np.ndarray:
+    """
+    Simulates a batch of seasons one season at a time, like the loop engine, in a
+    kernel compiled with numba if it is installed. The goals are sampled as in
+    simulate_batch and the fixtures played in the same order, so the results are
+    identical to simulate_batch's for the same uniforms.
+    :param fixture_arrays: The fixture arrays from prepare_fixture_arrays.
+    :param table: The current league table, in the team order used for fixture_arrays.
+    :param uniforms: The uniforms to sample goals from, with shape
+        (2, fixtures, simulations), see draw_uniform_block.
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :return: The manager points of each team in each gameweek of each simulation, with
+        shape (simulations, teams, gameweeks). Gameweeks without a fixture for a team are NaN.
+    """
+    num_teams = len(table)
+    num_gameweeks = len(fixture_arrays["gameweeks"])
+    num_simulations = uniforms.shape[2]
+
+    with stage("simulation.sampling"):
+        home_goals, away_goals = sample_fixture_goals(fixture_arrays, uniforms)
+
+    # the kernel plays each season's fixtures in gameweek order, one season at a time
+    order = np.argsort(fixture_arrays["gameweek"], kind="stable")
+    home, away = fixture_arrays["home"][order], fixture_arrays["away"][order]
+    fixture_gameweeks = fixture_arrays["gameweek"][order]
+    state = table_to_state(table, num_simulations)
+    manager_points = np.zeros((num_simulations, num_teams, num_gameweeks))
+    with stage("simulation.jit_kernel"):
+        simulate_seasons(
+            home,
+            away,
+            fixture_gameweeks,
+            np.ascontiguousarray(home_goals[order].T),
+            np.ascontiguousarray(away_goals[order].T),
+            manager_points_table(fixture_arrays["max_goals"]),
+            fixture_arrays["expected_points"][order],
+            estimator == "conditional",
+            state["points"],
+            state["GD"],
+            state["GF"],
+            manager_points,
+        )
+
+    has_fixture = np.zeros((num_teams, num_gameweeks), dtype=bool)
+    has_fixture[home, fixture_gameweeks] = True
+    has_fixture[away, fixture_gameweeks] = True
+    manager_points[:, ~has_fixture] = np.nan
+    return manager_points
+
+
+@jit
+def simulate_seasons(
+    home,
+    away,
+    fixture_gameweeks,
+    home_goals,
+    away_goals,
+    points_table,
+    expected_points,
+    conditional,
+    points,
+    gd,
+    gf,
+    manager_points,
+):
+    """
+    Plays the fixtures of each season in order, ranking its table at the start of each
+    gameweek and scoring both sides of every fixture, as simulate_horizon does.
+    :param home: The table index of the home team of each fixture, in gameweek order.
+    :param away: The table index of the away team of each fixture.
+    :param fixture_gameweeks: The position of each fixture's gameweek.
+    :param home_goals: The home goals with shape (simulations, fixtures).
+    :param away_goals: The away goals with shape (simulations, fixtures).
+    :param points_table: The manager points table from manager_points_table.
+    :param expected_points: The expected manager points of each fixture, see
+        prepare_fixture_arrays.
+    :param conditional: Whether to score the expected points instead of the sampled
+        scorelines.
+    :param points: The points of each team with shape (simulations, teams), updated
+        in place, as are gd and gf.
+    :param gd: The goal difference of each team.
+    :param gf: The goals scored by each team.
+    :param manager_points: The array to add the manager points to, with shape
+        (simulations, teams, gameweeks).
+    """
+    num_teams = points.shape[1]
+    ranks = np.empty(num_teams, dtype=np.int64)
+    for sim in range(points.shape[0]):
+        week = -1
+        for fixture in range(len(home)):
+            if fixture_gameweeks[fixture] != week:
+                week = fixture_gameweeks[fixture]
+                rank_table(points[sim], gd[sim], gf[sim], ranks)
+
+            h, a = home[fixture], away[fixture]
+            hg, ag = home_goals[sim, fixture], away_goals[sim, fixture]
+            for side in range(2):
+                team, oppo = (h, a) if side == 0 else (a, h)
+                goals_for, goals_against = (hg, ag) if side == 0 else (ag, hg)
+                bonus = 1 if ranks[team] >= ranks[oppo] + 5 else 0
+                if conditional:
+                    score = expected_points[fixture, side, bonus]
+                else:
+                    score = points_table[goals_for, goals_against, bonus]
+                manager_points[sim, team, week] += score
+
+                gf[sim, team] += goals_for
+                gd[sim, team] += goals_for - goals_against
+                if goals_for > goals_against:
+                    points[sim, team] += 3
+                elif goals_for == goals_against:
+                    points[sim, team] += 1
+
+
+@jit
+def rank_table(points, gd, gf, ranks):
+    """
+    Ranks one league table by points, then GD, then GF, breaking exact ties by table
+    order, as rank_tables does.
+    :param points: The points of each team.
+    :param gd: The goal difference of each team.
+    :param gf: The goals scored by each team.
+    :param ranks: The array to write the rank of each team (1 to number of teams) to.
+    """
+    num_teams = len(points)
+    team_bits = 1
+    while (1 << team_bits) < num_teams:
+        team_bits += 1
+
+    keys = np.empty(num_teams, dtype=np.int64)
+    for team in range(num_teams):
+        keys[team] = (
+            (points[team] << (GD_BITS + GF_BITS + team_bits))
+            + ((gd[team] + (1 << (GD_BITS - 1))) << (GF_BITS + team_bits))
+            + (gf[team] << team_bits)
+            + (1 << team_bits)
+            - 1
+            - team
+        )
+    order = np.argsort(-keys)
+    for position in range(num_teams):
+        ranks[order[position]] = position + 1
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+STATE_COLUMNS = ["points", "GD", "GF", "rank"]
+RANKING_COLUMNS = ["points", "GD", "GF"]  # the columns the ranks are computed from
+
+# bit widths used to pack GF and GD into a single sort key, see rank_tables
+GF_BITS = 16
+GD_BITS = 16
+
+
+def table_to_state(
+    table: pd.DataFrame, num_simulations: int | None = None
+) -> dict[str, np.ndarray]:
+    """
+    Converts a league table into the integer arrays used inside the simulations.
+    Teams are identified by their position in the table's index.
+    :param table: The league table from construct_league_table.
+    :param num_simulations: If given, every array is repeated once per simulation.
+    :return: A dictionary of points, GD, GF and rank arrays, with shape (teams,)
+        or (simulations, teams).
+    """
+    state = {}
+    for column in STATE_COLUMNS:
+        values = table[column].to_numpy(dtype=np.int64)
+        if num_simulations is not None:
+            values = np.broadcast_to(values, (num_simulations, len(values)))
+        state[column] = values.copy()
+    return state
+
+
+def rank_tables(points: np.ndarray, gd: np.ndarray, gf: np.ndarray) -> np.ndarray:
+    """
+    Ranks a batch of simulated league tables by points, then GD, then GF in one call.
+    The three columns and the team's index (to break exact ties by table order) are
+    packed into one int64 key per team, so a single argsort ranks every table.
+    :param points: The points of each team with shape (..., teams).
+    :param gd: The goal difference of each team with shape (..., teams).
+    :param gf: The goals scored by each team with shape (..., teams).
+    :return: The rank of each team (1 to number of teams) with the same shape.
+    """
+    num_teams = points.shape[-1]
+    team_bits = max(1, (num_teams - 1).bit_length())
+
+    key = points << (GD_BITS + GF_BITS + team_bits)
+    key += (gd + (1 << (GD_BITS - 1))) << (GF_BITS + team_bits)
+    key += gf << team_bits
+    key += (1 << team_bits) - 1 - np.arange(num_teams)
+
+    order = np.argsort(-key, axis=-1)
+    ranks = np.empty_like(order)
+    positions = np.broadcast_to(np.arange(1, num_teams + 1), order.shape)
+    np.put_along_axis(ranks, order, positions, axis=-1)
+    return ranks
+
+
+def pack_states(state: dict[str, np.ndarray], dtype=np.int16) -> np.ndarray:
+    """
+    Packs a batch of simulated table states into one compact array, e.g. to store them.
+    The ranks are left out, as unpack_states recomputes them.
+    :param state: The table states with arrays of shape (simulations, teams).
+    :param dtype: The integer dtype of the packed array.
+    :return: The points, GD and GF with shape (simulations, 3, teams).
+    """
+    return np.stack([state[column] for column in RANKING_COLUMNS], axis=-2).astype(
+        dtype
+    )
+
+
+def unpack_states(packed: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Unpacks table states packed by pack_states.
+    :param packed: The packed states with shape (simulations, 3, teams).
+    :return: A dictionary of points, GD, GF and rank arrays, with shape
+        (simulations, teams).
+    """
+    state = {
+        column: packed[..., idx, :].astype(np.int64)
+        for idx, column in enumerate(RANKING_COLUMNS)
+    }
+    state["rank"] = rank_tables(state["points"], state["GD"], state["GF"])
+    return state
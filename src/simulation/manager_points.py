@@ -1,3 +1,8 @@
+from functools import lru_cache
+
+import numpy as np
+
+
 def calculate_manager_points(
     team_rank: int, oppo_rank: int, goals_for: int, goals_against: int
 ) -> int:
@@ -26,3 +31,59 @@ def calculate_manager_points(
     # no points for a loss
 
     return points
+
+
+def is_bonus_match(team_rank: int | np.ndarray, oppo_rank: int | np.ndarray):
+    """
+    Whether the team is 5 or more places behind the opponent, which earns the bonus points.
+    :param team_rank: The rank of the team.
+    :param oppo_rank: The rank of the opponent.
+    :return: The bonus flag, as a bool or boolean array.
+    """
+    return team_rank >= oppo_rank + 5
+
+
+@lru_cache
+def manager_points_table(max_number_of_goals: int = 7) -> np.ndarray:
+    """
+    Precomputes calculate_manager_points for every possible input.
+    The ranks only matter through the bonus flag, so the table is indexed by
+    [goals_for, goals_against, bonus_flag].
+    :param max_number_of_goals: The maximum number of goals a team can score.
+    :return: A read-only integer array of shape (max goals + 1, max goals + 1, 2).
+    """
+    goals = range(max_number_of_goals + 1)
+    ranks_for_flag = [(1, 1), (6, 1)]  # (team_rank, oppo_rank) without and with bonus
+    table = np.array(
+        [
+            [
+                [
+                    calculate_manager_points(*ranks, goals_for, goals_against)
+                    for ranks in ranks_for_flag
+                ]
+                for goals_against in goals
+            ]
+            for goals_for in goals
+        ],
+        dtype=np.int64,
+    )
+    table.setflags(write=False)
+    return table
+
+
+def expected_manager_points(
+    home_goal_probabilities: np.ndarray, away_goal_probabilities: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates the exact expected manager points of both teams in each fixture,
+    with and without the bonus, from independent goal distributions.
+    :param home_goal_probabilities: The normalised home goal distributions, one row per fixture.
+    :param away_goal_probabilities: The normalised away goal distributions, one row per fixture.
+    :return: An array of shape (fixtures, 2, 2) indexed by
+        [fixture, side (0 home, 1 away), bonus flag].
+    """
+    table = manager_points_table(home_goal_probabilities.shape[1] - 1)
+    home, away = home_goal_probabilities, away_goal_probabilities
+    home_points = np.einsum("fi,fj,ijb->fb", home, away, table)
+    away_points = np.einsum("fi,fj,jib->fb", home, away, table)
+    return np.stack([home_points, away_points], axis=1)
@@ -1,26 +1,29 @@
 import random
 from typing import Tuple
 
-import pandas as pd
-
-random.seed(0)
+import numpy as np
 
 
 def simulate_match(
-    home_goal_distribution: [float], away_goal_distribution: [float]
+    home_goal_distribution: [float],
+    away_goal_distribution: [float],
+    rng: random.Random | None = None,
 ) -> Tuple[int, int]:
     """
     Simulates a match between two teams based on their goal distributions.
     :param home_goal_distribution: The goal distribution for the home team.
     :param away_goal_distribution: The goal distribution for the away team.
+    :param rng: The random number generator to use, defaults to the global random module.
     :return: The number of goals scored by the home team and the number of goals scored by the away team.
     """
-    home_goals = random.choices(
+    choices = random.choices if rng is None else rng.choices
+
+    home_goals = choices(
         population=range(len(home_goal_distribution)),
         weights=home_goal_distribution,
         k=1,
     )[0]
-    away_goals = random.choices(
+    away_goals = choices(
         population=range(len(away_goal_distribution)),
         weights=away_goal_distribution,
         k=1,
@@ -29,24 +32,27 @@ def simulate_match(
 
 
 def update_table(
-    table: pd.DataFrame,
-    home_team: str,
-    home_goals: int,
-    away_team: str,
-    away_goals: int,
-) -> pd.DataFrame:
+    table: dict[str, np.ndarray],
+    home_team: int,
+    home_goals: int | np.ndarray,
+    away_team: int,
+    away_goals: int | np.ndarray,
+) -> dict[str, np.ndarray]:
+    """
+    Updates the table state in place with the result of a match.
+    Works for a single table, or for a batch of simulated tables with array goals.
+    :param table: The table state from table_to_state.
+    :param home_team: The table index of the home team.
+    :param home_goals: The number of goals scored by the home team.
+    :param away_team: The table index of the away team.
+    :param away_goals: The number of goals scored by the away team.
+    :return: The updated table state.
+    """
     for team, gf, ga in zip(
         [home_team, away_team], [home_goals, away_goals], [away_goals, home_goals]
     ):
-        table.at[team, "GF"] += gf
-        table.at[team, "GD"] += gf - ga
-
-    if home_goals > away_goals:
-        table.at[home_team, "points"] += 3
-    elif home_goals < away_goals:
-        table.at[away_team, "points"] += 3
-    else:
-        table.at[home_team, "points"] += 1
-        table.at[away_team, "points"] += 1
+        table["GF"][..., team] += gf
+        table["GD"][..., team] += gf - ga
+        table["points"][..., team] += 3 * (gf > ga) + (gf == ga)
 
     return table
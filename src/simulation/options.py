@@ -0,0 +1,7 @@
+# the choices of the simulation settings, kept free of heavy imports for the CLI
+CHUNK_SIZE = 1_000
+ENGINES = ["loop", "batch", "jit"]
+ESTIMATORS = ["sampled", "conditional"]
+SAMPLING_METHODS = ["inverse", "alias"]
+VARIANCE_REDUCTION_METHODS = ["none", "antithetic", "stratified", "sobol"]
+OUTPUT_FORMATS = ["csv", "npz", "parquet"]
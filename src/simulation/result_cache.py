@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.simulation.accumulators import concatenate_accumulators
+from src.simulation.engine import accumulate_simulations
+from src.simulation.options import CHUNK_SIZE
+
+RESULT_CACHE_DIR = "results"  # under the API cache directory
+RESULT_CACHE_VERSION = 1
+# entries are evicted when unused for longer than this, or least recently used first
+# once the cache is bigger than this
+MAX_CACHE_AGE = 7 * 24 * 60 * 60
+MAX_CACHE_BYTES = 256 * 2**20
+
+
+def accumulate_cached_simulations(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    ratings: pd.DataFrame,
+    cache_dir: str | Path,
+    num_simulations: int,
+    cpus: int,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    tolerance: float | None = None,
+    confidence: float = 0.95,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    progress: bool = True,
+    max_bytes: int = MAX_CACHE_BYTES,
+) -> tuple[dict, int]:
+    """
+    Runs accumulate_simulations, reusing the results of an earlier run from the cache.
+    A run with the same inputs returns its saved accumulator without simulating. With
+    the batch engine each simulation's table after every gameweek is saved too, so a
+    run whose fixtures only differ from a saved run's after some gameweek reuses the
+    saved gameweeks and simulates the later ones on from the saved tables, with random
+    streams independent of the saved ones. Resuming is not done with a tolerance.
+    The tables are held in memory until they are saved, so they are only kept if they
+    fit in the cache; bigger runs are saved without them and can only be reused whole.
+    Takes the same arguments as accumulate_simulations, and:
+    :param ratings: The ratings the goal probability distributions were built from.
+    :param cache_dir: The directory of the cache.
+    :param max_bytes: The most bytes the cache can take up, see evict_cache.
+    :return: The accumulator, as from accumulate_simulations, and the number of
+        gameweeks reused from the cache.
+    """
+    settings = {
+        "num_simulations": num_simulations,
+        "engine": engine,
+        "seed": seed,
+        "estimator": estimator,
+        "chunk_size": chunk_size,
+        "tolerance": tolerance,
+        "confidence": confidence,
+        "sampling": sampling,
+        "variance_reduction": variance_reduction,
+    }
+    keys = cache_keys(fixtures, table, ratings, **settings)
+    gameweeks = np.unique(fixtures["gameweek"].to_numpy())
+    run_settings = {**settings, "cpus": cpus, "progress": progress}
+    if not keys:
+        return accumulate_simulations(fixtures, table, **run_settings), 0
+
+    cached = load_cached_results(cache_dir, keys)
+    if cached is not None and cached[2] == len(keys):
+        return cached[0], len(keys)
+
+    states = None
+    states_shape = (num_simulations, len(gameweeks), 3, len(table))
+    states_bytes = np.prod(states_shape) * np.dtype(np.int16).itemsize
+    if engine == "batch" and tolerance is None and states_bytes <= max_bytes:
+        states = np.empty(states_shape, np.int16)
+
+    reused = 0
+    if cached is not None and cached[1] is not None and states is not None:
+        cached_accumulator, cached_states, reused = cached
+        later = fixtures[fixtures["gameweek"] > gameweeks[reused - 1]]
+        accumulator = accumulate_simulations(
+            later,
+            table,
+            start_states=cached_states[:, reused - 1],
+            states=states[:, reused:],
+            spawn_key=(int(gameweeks[reused]),),
+            **run_settings,
+        )
+        states[:, :reused] = cached_states
+        accumulator = {
+            **concatenate_accumulators(cached_accumulator, accumulator),
+            "chunk_means": concatenate_accumulators(
+                cached_accumulator["chunk_means"], accumulator["chunk_means"]
+            ),
+        }
+    else:
+        accumulator = accumulate_simulations(
+            fixtures, table, states=states, **run_settings
+        )
+
+    save_cached_results(cache_dir, keys, accumulator, states)
+    evict_cache(cache_dir, max_bytes, keep=keys[-1])
+    return accumulator, reused
+
+
+def cache_keys(
+    fixtures: pd.DataFrame, table: pd.DataFrame, ratings: pd.DataFrame, **settings
+) -> list[str]:
+    """
+    Hashes the inputs of a run into one key per gameweek. The key of a gameweek covers
+    the settings, the table, the ratings and the fixtures up to that gameweek, so runs
+    only differing in later gameweeks share the keys of the earlier ones; the last key
+    covers the whole run. The horizon only matters through the fixtures it includes.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table.
+    :param ratings: The ratings the goal probability distributions were built from.
+    :param settings: The simulation settings that change the results.
+    :return: The key of each gameweek, in gameweek order.
+    """
+    digest = hashlib.sha256()
+    settings = {"version": RESULT_CACHE_VERSION, **settings}
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    digest.update(table.to_csv().encode())
+    digest.update(ratings.to_csv().encode())
+
+    keys = []
+    for _, week_fixtures in fixtures.groupby("gameweek", sort=True):
+        digest.update(week_fixtures.to_csv(index=False).encode())
+        keys.append(digest.copy().hexdigest())
+    return keys
+
+
+def load_cached_results(
+    cache_dir: str | Path, keys: list[str]
+) -> tuple[dict, np.ndarray | None, int] | None:
+    """
+    Finds the saved run sharing the most leading gameweek keys with a run.
+    Only saved runs covering all of the run's gameweeks, or with saved tables to
+    simulate on from, are used.
+    :param cache_dir: The directory of the cache.
+    :param keys: The run's gameweek keys, from cache_keys.
+    :return: The saved accumulator and packed tables of the shared gameweeks, and the
+        number of shared gameweeks; or None if no saved run shares the first gameweek.
+        The tables are None if none were saved or all the gameweeks are shared.
+    """
+    best, shared = None, 0
+    for path in Path(cache_dir).glob("*.json"):
+        entry = _read_entry(path)
+        if entry is None:
+            continue
+        common = 0
+        for saved_key, key in zip(entry["keys"], keys):
+            if saved_key != key:
+                break
+            common += 1
+        if common > shared and (common == len(keys) or entry["has_states"]):
+            best, shared = path, common
+    if best is None:
+        return None
+
+    try:
+        with np.load(best.with_suffix(".npz"), allow_pickle=False) as arrays:
+            accumulator = {
+                "count": int(arrays["count"]),
+                "mean": arrays["mean"][:, :shared],
+                "m2": arrays["m2"][:, :shared],
+                "chunk_means": {
+                    "count": int(arrays["chunk_means_count"]),
+                    "mean": arrays["chunk_means_mean"][:, :shared],
+                    "m2": arrays["chunk_means_m2"][:, :shared],
+                },
+            }
+            states = None
+            if shared < len(keys) and "states" in arrays:  # only needed to resume
+                states = arrays["states"][:, :shared]
+        os.utime(best)  # the entry was used, see evict_cache
+    except (OSError, ValueError, KeyError):
+        return None
+    return accumulator, states, shared
+
+
+def save_cached_results(
+    cache_dir: str | Path,
+    keys: list[str],
+    accumulator: dict,
+    states: np.ndarray | None = None,
+) -> None:
+    """
+    Saves a run's results to the cache, atomically so concurrent runs never read a
+    partial entry. Failing to write the cache is not an error.
+    :param cache_dir: The directory of the cache.
+    :param keys: The run's gameweek keys, from cache_keys.
+    :param accumulator: The accumulator from accumulate_simulations.
+    :param states: Each simulation's packed table after every gameweek, if kept.
+    """
+    arrays = {
+        "count": np.array(accumulator["count"]),
+        "mean": accumulator["mean"],
+        "m2": accumulator["m2"],
+    }
+    for name in ["count", "mean", "m2"]:
+        arrays[f"chunk_means_{name}"] = np.asarray(accumulator["chunk_means"][name])
+    if states is not None:
+        arrays["states"] = states[: accumulator["count"]]
+    entry = {"keys": keys, "has_states": states is not None, "saved_at": time.time()}
+
+    path = Path(cache_dir) / f"{keys[-1]}.json"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path.with_suffix(".npz"))
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def evict_cache(
+    cache_dir: str | Path,
+    max_bytes: int = MAX_CACHE_BYTES,
+    max_age: float = MAX_CACHE_AGE,
+    keep: str | None = None,
+) -> None:
+    """
+    Deletes the saved runs unused for longer than max_age, then the least recently
+    used ones until the cache is no bigger than max_bytes.
+    :param cache_dir: The directory of the cache.
+    :param max_bytes: The most bytes the saved runs can take up.
+    :param max_age: The most seconds a saved run can go unused.
+    :param keep: The key of a saved run never to delete, e.g. the one just saved,
+        even if it is bigger than max_bytes on its own.
+    """
+    entries, kept = [], 0
+    for path in Path(cache_dir).glob("*.json"):
+        try:
+            used_at = path.stat().st_mtime
+            size = path.stat().st_size + path.with_suffix(".npz").stat().st_size
+        except OSError:
+            continue
+        if path.stem == keep:
+            kept = size
+        elif time.time() - used_at > max_age:
+            _remove_entry(path)
+        else:
+            entries.append((used_at, size, path))
+
+    total = kept + sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        _remove_entry(path)
+        total -= size
+
+
+def _read_entry(path: Path) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_entry(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    path.with_suffix(".npz").unlink(missing_ok=True)
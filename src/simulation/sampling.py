@@ -0,0 +1,121 @@
+import warnings
+
+import numpy as np
+
+
+def build_goal_sampler(distributions: np.ndarray, method: str = "inverse") -> dict:
+    """
+    Builds a sampler for the goal distribution of each fixture, once per run.
+    "inverse" keeps cumulative tables and samples with a binary search; it is monotone
+    in the uniform, which variance reduction techniques rely on. "alias" builds Walker
+    alias tables (Vose's method) and samples in constant time with one uniform.
+    :param distributions: The goal distributions, one row per fixture. Rows are normalised.
+    :param method: The sampling method, "inverse" or "alias".
+    :return: The sampler, a dictionary of its method and tables.
+    """
+    probabilities = distributions / distributions.sum(axis=1, keepdims=True)
+    if method == "inverse":
+        cdf = np.cumsum(probabilities, axis=1)
+        cdf[:, -1] = 1.0
+        return {"method": method, "cdf": cdf}
+
+    if method == "alias":
+        prob, alias = build_alias_tables(probabilities)
+        return {"method": method, "prob": prob, "alias": alias}
+
+    raise ValueError(f"Unknown sampling method: {method}")
+
+
+def build_alias_tables(probabilities: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Builds Walker alias tables for each row of probabilities with Vose's method.
+    :param probabilities: The normalised distributions, one row per fixture.
+    :return: The acceptance probability and alias of each bin, with the same shape.
+    """
+    num_rows, num_bins = probabilities.shape
+    prob = np.ones((num_rows, num_bins))
+    alias = np.tile(np.arange(num_bins), (num_rows, 1))
+
+    for row in range(num_rows):
+        scaled = probabilities[row] * num_bins
+        small = [idx for idx in range(num_bins) if scaled[idx] < 1.0]
+        large = [idx for idx in range(num_bins) if scaled[idx] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            prob[row, less] = scaled[less]
+            alias[row, less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # leftovers are only off 1 by rounding, they always accept
+
+    return prob, alias
+
+
+def draw_uniform_block(
+    rng: np.random.Generator,
+    num_fixtures: int,
+    num_simulations: int,
+    variance_reduction: str = "none",
+) -> np.ndarray:
+    """
+    Draws the uniforms for every goal of a batch of simulations in one bulk call.
+    Variance reduction methods keep each uniform marginally U(0, 1) but correlate
+    them across the simulations in the block:
+        - antithetic: the second half of the simulations use 1 - u of the first half
+        - stratified: each goal's uniforms are a Latin hypercube sample, one per stratum
+        - sobol: a scrambled Sobol' sequence, best with a power of 2 simulations
+    They rely on a monotone sampler (the "inverse" method) to be effective.
+    :param rng: The random number generator.
+    :param num_fixtures: The number of fixtures.
+    :param num_simulations: The number of simulations.
+    :param variance_reduction: "none", "antithetic", "stratified" or "sobol".
+    :return: Uniforms with shape (2, fixtures, simulations), home goals first. Each
+        fixture's uniforms are contiguous, which makes sampling them faster.
+    """
+    shape = (2, num_fixtures, num_simulations)
+    if variance_reduction == "none":
+        return rng.random(shape)
+
+    if variance_reduction == "antithetic":
+        half = rng.random((2, num_fixtures, -(-num_simulations // 2)))
+        return np.concatenate([half, 1.0 - half], axis=2)[..., :num_simulations]
+
+    if variance_reduction == "stratified":
+        strata = rng.permuted(
+            np.broadcast_to(np.arange(num_simulations), shape), axis=2
+        )
+        return (strata + rng.random(shape)) / num_simulations
+
+    if variance_reduction == "sobol":
+        from scipy.stats import qmc
+
+        sobol = qmc.Sobol(d=2 * num_fixtures, scramble=True, seed=rng)
+        with warnings.catch_warnings():
+            # the balance warning for non power of 2 sizes, still unbiased after scrambling
+            warnings.simplefilter("ignore", UserWarning)
+            points = sobol.random(num_simulations)
+        return points.T.reshape(shape)
+
+    raise ValueError(f"Unknown variance reduction method: {variance_reduction}")
+
+
+def sample_goals(sampler: dict, uniforms: np.ndarray) -> np.ndarray:
+    """
+    Turns uniforms into goals for every fixture.
+    :param sampler: The sampler from build_goal_sampler.
+    :param uniforms: Uniform random numbers with shape (fixtures, simulations).
+    :return: The number of goals scored with the same shape as uniforms.
+    """
+    goals = np.empty(uniforms.shape, dtype=np.intp)
+    if sampler["method"] == "inverse":
+        for fixture, cdf in enumerate(sampler["cdf"]):
+            goals[fixture] = np.searchsorted(cdf, uniforms[fixture], side="right")
+        return goals
+
+    num_bins = sampler["prob"].shape[1]
+    for fixture, (prob, alias) in enumerate(zip(sampler["prob"], sampler["alias"])):
+        scaled = uniforms[fixture] * num_bins
+        column = scaled.astype(np.intp)
+        accept = scaled - column < prob[column]
+        goals[fixture] = np.where(accept, column, alias[column])
+    return goals
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data.read_csv import read_ratings
+from src.simulation.accumulators import accumulator_variance
+
+BASE_SCENARIO = "base"
+
+
+def build_scenarios(
+    ratings: pd.DataFrame,
+    ratings_paths: list[str | Path] = (),
+    adjustments: list[str] = (),
+) -> dict[str, pd.DataFrame]:
+    """
+    Builds the ratings of each scenario of a sweep, starting with the base ratings.
+    :param ratings: The base ratings.
+    :param ratings_paths: Ratings CSV files, each a scenario named after the file.
+    :param adjustments: Adjustments of the base ratings, each a scenario, formatted as
+        "TEAM:ATTACK:DEFENCE" where ATTACK and DEFENCE multiply the team's
+        Attack Strength and Defence Strength, e.g. "ARS:0.9:1.1".
+    :return: The ratings of each scenario, keyed by scenario name.
+    """
+    scenarios = {BASE_SCENARIO: ratings}
+    for path in ratings_paths:
+        scenarios[Path(path).stem] = read_ratings(path)
+    for adjustment in adjustments:
+        team, attack, defence = parse_adjustment(adjustment)
+        name = f"{team}_attack{attack:g}_defence{defence:g}"
+        scenarios[name] = adjust_ratings(ratings, team, attack, defence)
+
+    if len(scenarios) < 1 + len(ratings_paths) + len(adjustments):
+        raise ValueError("Every scenario needs a different name")
+    return scenarios
+
+
+def parse_adjustment(adjustment: str) -> tuple[str, float, float]:
+    """
+    Parses a ratings adjustment.
+    :param adjustment: The adjustment, formatted as "TEAM:ATTACK:DEFENCE".
+    :return: The team and the multipliers of its Attack Strength and Defence Strength.
+    """
+    try:
+        team, attack, defence = adjustment.split(":")
+        return team, float(attack), float(defence)
+    except ValueError:
+        raise ValueError(
+            f'Invalid adjustment "{adjustment}", expected TEAM:ATTACK:DEFENCE'
+        ) from None
+
+
+def adjust_ratings(
+    ratings: pd.DataFrame, team: str, attack: float = 1.0, defence: float = 1.0
+) -> pd.DataFrame:
+    """
+    Scales one team's ratings, e.g. for an injury to a key player.
+    :param ratings: The ratings, which are not modified.
+    :param team: The team to adjust.
+    :param attack: The multiplier of the team's Attack Strength.
+    :param defence: The multiplier of the team's Defence Strength.
+    :return: The adjusted ratings.
+    """
+    if team not in ratings.index:
+        raise KeyError(f'No ratings for "{team}"')
+
+    adjusted = ratings.copy()
+    adjusted.loc[team, "Attack Strength"] *= attack
+    adjusted.loc[team, "Defence Strength"] *= defence
+    return adjusted
+
+
+def common_random_numbers_gain(accumulator: dict, base: dict) -> np.ndarray:
+    """
+    Estimates how much less noisy a scenario's difference from the base is than it
+    would be with separate runs, which would add the variances of both scenarios.
+    :param accumulator: The scenario's accumulator, with its "difference" accumulator.
+    :param base: The base scenario's accumulator.
+    :return: The variance ratio of each cell, NaN where the difference never varies.
+    """
+    separate = accumulator_variance(accumulator) + accumulator_variance(base)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = separate / accumulator_variance(accumulator["difference"])
+    gain[~np.isfinite(gain)] = np.nan
+    return gain
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+from io import StringIO
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import click
+
+from src.simulation.options import (
+    CHUNK_SIZE,
+    ENGINES,
+    ESTIMATORS,
+    OUTPUT_FORMATS,
+    SAMPLING_METHODS,
+    VARIANCE_REDUCTION_METHODS,
+)
+from src.simulation.simulate import RESULTS_PATH, save_results
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# numpy and pandas are imported by the functions that use them, so --help is fast
+
+PARTIAL_VERSION = 1
+# manager points are at most 25 with 7 goals, so points of 31 and over share a bin
+HISTOGRAM_BINS = 32
+
+
+@click.group()
+def main():
+    """
+    Splits a run into shards, e.g. to spread it over several machines, and merges them.
+    Shards of the same run, whichever machines ran them, merge into the results of
+    the whole run.
+    """
+
+
+@main.command("run")
+@click.option("--shard", required=True, type=int, help="The shard to run, from 0.")
+@click.option("--num-shards", required=True, type=int, help="The number of shards.")
+@click.option(
+    "--output",
+    required=True,
+    type=click.Path(dir_okay=False),
+    help="The partial result file to write.",
+)
+@click.option("--horizon", default=12, help="The number of gameweeks to simulate.")
+@click.option(
+    "--num-simulations",
+    default=10_000,
+    help="The number of simulations to run over all the shards.",
+)
+@click.option("--cpus", default=1, help="The number of CPUs to use.")
+@click.option("--engine", default="loop", type=click.Choice(ENGINES))
+@click.option("--seed", default=0, help="The seed for the random number generators.")
+@click.option("--estimator", default="sampled", type=click.Choice(ESTIMATORS))
+@click.option(
+    "--chunk-size",
+    default=CHUNK_SIZE,
+    help="The number of simulations per chunk; shards are made of whole chunks.",
+)
+@click.option(
+    "--replay",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Run offline from a bundle recorded with simulate --snapshot, so every "
+    "shard simulates the same inputs.",
+)
+@click.option("--sampling", default="inverse", type=click.Choice(SAMPLING_METHODS))
+@click.option(
+    "--variance-reduction",
+    default="none",
+    type=click.Choice(VARIANCE_REDUCTION_METHODS),
+)
+@click.option(
+    "--histograms",
+    is_flag=True,
+    help="Also count the sampled manager points of each team in each gameweek.",
+)
+def run_command(
+    shard: int,
+    num_shards: int,
+    output: str,
+    horizon: int = 12,
+    num_simulations: int = 10_000,
+    cpus: int = 1,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    replay: str | None = None,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    histograms: bool = False,
+):
+    """Runs one shard of a run and writes its partial result file."""
+    if not 0 <= shard < num_shards:
+        raise click.UsageError("--shard must be from 0 to --num-shards - 1")
+    if histograms and estimator != "sampled":
+        raise click.UsageError("--histograms needs the sampled estimator")
+
+    from src.data import get_data
+    from src.simulation.goals_probability_distribution import (
+        add_goal_proba_distributions,
+    )
+
+    fixtures, table, ratings, manager_prices = get_data(
+        horizon=horizon, snapshot=replay
+    )
+    fixtures = add_goal_proba_distributions(fixtures, ratings)
+    accumulator = run_shard(
+        fixtures,
+        table,
+        ratings,
+        manager_prices,
+        output,
+        shard,
+        num_shards,
+        num_simulations=num_simulations,
+        cpus=cpus,
+        engine=engine,
+        seed=seed,
+        estimator=estimator,
+        chunk_size=chunk_size,
+        sampling=sampling,
+        variance_reduction=variance_reduction,
+        histogram_bins=HISTOGRAM_BINS if histograms else None,
+    )
+    click.echo(
+        f"Shard {shard} of {num_shards}: {accumulator['count']} simulations", err=True
+    )
+
+
+@main.command("merge")
+@click.argument(
+    "partials", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    "--output",
+    default=RESULTS_PATH,
+    type=click.Path(dir_okay=False),
+    help="The results file to write, like simulate's data/am_pts.csv.",
+)
+@click.option(
+    "--output-format",
+    multiple=True,
+    default=["csv"],
+    type=click.Choice(OUTPUT_FORMATS),
+    help="The formats to save the results in, next to --output. Repeatable.",
+)
+@click.option(
+    "--histograms",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Also write the merged histograms to this NPZ file.",
+)
+def merge_command(
+    partials: tuple[str, ...],
+    output: str = RESULTS_PATH,
+    output_format: tuple[str, ...] = ("csv",),
+    histograms: str | None = None,
+):
+    """Merges the partial result files of any shards of a run into its results."""
+    if "parquet" in output_format and importlib.util.find_spec("pyarrow") is None:
+        raise click.UsageError(
+            '--output-format parquet needs pyarrow: pip install -e ".[parquet]"'
+        )
+    import numpy as np
+    import pandas as pd
+
+    try:
+        accumulator, metadata = merge_partials(partials)
+    except ValueError as error:
+        raise click.UsageError(str(error))
+    if histograms is not None and "histogram" not in accumulator:
+        raise click.UsageError("The shards were run without --histograms")
+
+    results = pd.DataFrame(
+        accumulator["mean"],
+        index=pd.Index(metadata["teams"], name="team"),
+        columns=metadata["gameweeks"],
+    ).dropna(how="all")
+    prices = pd.read_csv(StringIO(metadata["manager_prices"]), index_col=0)
+    run_metadata = {
+        key: metadata[key]
+        for key in ["run_key", "seed", "engine", "estimator", "sampling"]
+        + ["variance_reduction", "chunks"]
+    }
+    save_results(
+        results,
+        prices,
+        path=output,
+        formats=output_format,
+        metadata={**run_metadata, "num_simulations": accumulator["count"]},
+    )
+    if histograms is not None:
+        np.savez(
+            histograms,
+            team=np.array(metadata["teams"]),
+            gameweek=np.array(metadata["gameweeks"]),
+            histogram=accumulator["histogram"],
+        )
+
+    total = metadata["num_simulations"]
+    click.echo(
+        f"Merged {len(partials)} shards: {accumulator['count']} of {total} simulations",
+        err=True,
+    )
+
+
+def shard_chunks(
+    num_simulations: int, chunk_size: int, shard: int, num_shards: int
+) -> tuple[int, int]:
+    """
+    Splits the chunks of a run between shards, as evenly as whole chunks allow.
+    Shard i gets a contiguous range of chunks, simulated with the same random streams
+    as in a single run, see plan_chunks, so the shards together are the run.
+    :param num_simulations: The number of simulations of the whole run.
+    :param chunk_size: The number of simulations per chunk.
+    :param shard: The shard, from 0 to num_shards - 1.
+    :param num_shards: The number of shards.
+    :return: The index of the shard's first chunk and its number of simulations,
+        which is 0 if there are more shards than chunks.
+    """
+    num_chunks = -(-num_simulations // chunk_size)
+    first_chunk = shard * num_chunks // num_shards
+    end_chunk = (shard + 1) * num_chunks // num_shards
+    end = min(end_chunk * chunk_size, num_simulations)
+    return first_chunk, max(end - first_chunk * chunk_size, 0)
+
+
+def run_shard(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    ratings: pd.DataFrame,
+    manager_prices: pd.DataFrame,
+    path: str | Path,
+    shard: int,
+    num_shards: int,
+    num_simulations: int,
+    cpus: int = 1,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    histogram_bins: int | None = None,
+    progress: bool = True,
+) -> dict:
+    """
+    Runs the chunks of one shard of a run, see shard_chunks, and writes its partial
+    result file. The file identifies the run by a hash of its inputs and settings,
+    so only shards of the same run are merged.
+    Takes the same arguments as accumulate_simulations, without a tolerance, and:
+    :param ratings: The ratings the goal probability distributions were built from.
+    :param manager_prices: The manager prices, saved with the merged results.
+    :param path: The path of the partial result file.
+    :param shard: The shard, from 0 to num_shards - 1.
+    :param num_shards: The number of shards.
+    :param num_simulations: The number of simulations of the whole run.
+    :return: The accumulator of the shard, as written to the file.
+    """
+    import numpy as np
+
+    from src.simulation.engine import accumulate_simulations
+    from src.simulation.result_cache import cache_keys
+
+    settings = {
+        "engine": engine,
+        "seed": seed,
+        "estimator": estimator,
+        "chunk_size": chunk_size,
+        "sampling": sampling,
+        "variance_reduction": variance_reduction,
+    }
+    first_chunk, shard_simulations = shard_chunks(
+        num_simulations, chunk_size, shard, num_shards
+    )
+    accumulator = accumulate_simulations(
+        fixtures,
+        table,
+        shard_simulations,
+        cpus,
+        first_chunk=first_chunk,
+        histogram_bins=histogram_bins,
+        progress=progress,
+        **settings,
+    )
+    settings["num_simulations"] = num_simulations
+    metadata = {
+        **settings,
+        "version": PARTIAL_VERSION,
+        "run_key": cache_keys(fixtures, table, ratings, **settings)[-1],
+        "chunks": [[first_chunk, first_chunk + -(-shard_simulations // chunk_size)]],
+        "teams": table.index.tolist(),
+        "gameweeks": np.unique(fixtures["gameweek"].to_numpy()).tolist(),
+        "manager_prices": manager_prices.to_csv(),
+    }
+    write_partial(path, accumulator, metadata)
+    return accumulator
+
+
+def merge_partials(paths: list[str | Path]) -> tuple[dict, dict]:
+    """
+    Merges the partial result files of shards of a run, in chunk order so the result
+    does not depend on the order of the paths. Any set of shards can be merged; the
+    result covers the shards' simulations only.
+    :param paths: The paths of the partial result files.
+    :return: The merged accumulator, as from accumulate_simulations, and the metadata
+        of the run, with the chunk ranges of the shards under "chunks".
+    :raises ValueError: If the files are of different runs, share chunks, or only some
+        have histograms.
+    """
+    import numpy as np
+
+    from src.simulation.accumulators import merge_accumulators, new_accumulator
+
+    partials = sorted(
+        (read_partial(path) for path in paths), key=lambda p: p[1]["chunks"][0]
+    )
+    metadata = partials[0][1]
+    if len({"histogram" in partial for partial, _ in partials}) > 1:
+        raise ValueError("Only some of the shards have histograms")
+
+    shape = (len(metadata["teams"]), len(metadata["gameweeks"]))
+    accumulator = {**new_accumulator(shape), "chunk_means": new_accumulator(shape)}
+    if "histogram" in partials[0][0]:
+        accumulator["histogram"] = np.zeros_like(partials[0][0]["histogram"])
+    chunks = []
+    for partial, partial_metadata in partials:
+        if partial_metadata["run_key"] != metadata["run_key"]:
+            raise ValueError("The shards are of different runs, or of different inputs")
+        for start, end in partial_metadata["chunks"]:
+            if any(start < other_end and other < end for other, other_end in chunks):
+                raise ValueError(f"Chunks {start} to {end - 1} are in several shards")
+            chunks.append([start, end])
+
+        merged = merge_accumulators(accumulator, partial)
+        merged["chunk_means"] = merge_accumulators(
+            accumulator["chunk_means"], partial["chunk_means"]
+        )
+        if "histogram" in partial:
+            merged["histogram"] = accumulator["histogram"] + partial["histogram"]
+        accumulator = merged
+
+    return accumulator, {**metadata, "chunks": sorted(chunks)}
+
+
+def write_partial(path: str | Path, accumulator: dict, metadata: dict) -> None:
+    """
+    Writes a partial result file, atomically so a merge never reads a partial file.
+    The file is an NPZ of the accumulators and histogram, with the metadata as JSON.
+    :param path: The path of the file.
+    :param accumulator: The accumulator from accumulate_simulations.
+    :param metadata: The metadata of the shard, see run_shard.
+    """
+    import numpy as np
+
+    arrays = {
+        "count": np.array(accumulator["count"]),
+        "mean": accumulator["mean"],
+        "m2": accumulator["m2"],
+        "metadata": np.array(json.dumps(metadata)),
+    }
+    for name in ["count", "mean", "m2"]:
+        arrays[f"chunk_means_{name}"] = np.asarray(accumulator["chunk_means"][name])
+    if "histogram" in accumulator:
+        arrays["histogram"] = accumulator["histogram"]
+
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_partial(path: str | Path) -> tuple[dict, dict]:
+    """
+    Reads a partial result file written by write_partial.
+    :param path: The path of the file.
+    :return: The accumulator and the metadata of the shard.
+    :raises ValueError: If the file is from another version.
+    """
+    import numpy as np
+
+    with np.load(path, allow_pickle=False) as arrays:
+        metadata = json.loads(arrays["metadata"].item())
+        if metadata.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"{path} is not a partial result file of this version")
+        accumulator = {
+            "count": int(arrays["count"]),
+            "mean": arrays["mean"],
+            "m2": arrays["m2"],
+            "chunk_means": {
+                "count": int(arrays["chunk_means_count"]),
+                "mean": arrays["chunk_means_mean"],
+                "m2": arrays["chunk_means_m2"],
+            },
+        }
+        if "histogram" in arrays:
+            accumulator["histogram"] = arrays["histogram"]
+    return accumulator, metadata
+
+
+if __name__ == "__main__":
+    main()
@@ -1,100 +1,502 @@
-import random
+from __future__ import annotations
+
+import cProfile
+import importlib.util
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 import click
-import pandas as pd
-import numpy as np
-from tqdm import tqdm
 
-from src.data import get_data
-from src.simulation.goals_probability_distribution import add_goal_proba_distributions
-from src.simulation.manager_points import calculate_manager_points
-from src.simulation.match_simulation import simulate_match, update_table
+from src.simulation.options import (
+    CHUNK_SIZE,
+    ENGINES,
+    ESTIMATORS,
+    OUTPUT_FORMATS,
+    SAMPLING_METHODS,
+    VARIANCE_REDUCTION_METHODS,
+)
+from src.simulation.timings import stage, start_timings, stop_timings, write_timings
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# pandas, numpy and scipy are imported by the stages that use them, so --help is fast
 
-random.seed(0)
+RESULTS_PATH = "../../data/am_pts.csv"
 
 
 @click.command()
 @click.option("--horizon", default=12, help="The number of gameweeks to simulate.")
 @click.option(
-    "--num-simulations", default=10_000, help="The number of simulations to run."
+    "--num-simulations",
+    default=10_000,
+    help="The number of simulations to run, or the maximum with --tolerance.",
 )
 @click.option("--cpus", default=1, help="The number of CPUs to use.")
-def main(horizon: int = 12, num_simulations: int = 100, cpus: int = 1):
-    fixtures, table, ratings, manager_prices = get_data(horizon=horizon)
-    fixtures = add_goal_proba_distributions(fixtures, ratings)
-    results = run_simulations(
-        fixtures, table, num_simulations=num_simulations, cpus=cpus
-    )
-    save_results(results, manager_prices)
+@click.option(
+    "--engine",
+    default="loop",
+    type=click.Choice(ENGINES),
+    help="The simulation engine: one season at a time, vectorised batches of seasons, "
+    "or one season at a time compiled with numba if it is installed.",
+)
+@click.option("--seed", default=0, help="The seed for the random number generators.")
+@click.option(
+    "--estimator",
+    default="sampled",
+    type=click.Choice(ESTIMATORS),
+    help="Score sampled scorelines, or the exact expected points given simulated ranks.",
+)
+@click.option(
+    "--chunk-size",
+    default=CHUNK_SIZE,
+    help="The number of simulations per chunk; bounds the memory used per worker.",
+)
+@click.option(
+    "--tolerance",
+    default=None,
+    type=float,
+    help="Simulate until every EV's confidence interval is within +/- this many points.",
+)
+@click.option(
+    "--confidence",
+    default=0.95,
+    help="The confidence level of the intervals used with --tolerance.",
+)
+@click.option(
+    "--snapshot",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Record the API responses and CSV inputs to this bundle before running.",
+)
+@click.option(
+    "--replay",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Run offline from a bundle recorded with --snapshot.",
+)
+@click.option(
+    "--sampling",
+    default="inverse",
+    type=click.Choice(SAMPLING_METHODS),
+    help="How goals are drawn: inverse CDF tables, or Walker alias tables.",
+)
+@click.option(
+    "--variance-reduction",
+    default="none",
+    type=click.Choice(VARIANCE_REDUCTION_METHODS),
+    help="Correlate the goal draws within each chunk to reduce Monte Carlo noise.",
+)
+@click.option(
+    "--timings",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Write the wall and CPU time of each stage and of the hot path to this JSON file.",
+)
+@click.option(
+    "--trace-allocations",
+    is_flag=True,
+    help="Add allocations to --timings using tracemalloc, which slows the run down.",
+)
+@click.option(
+    "--output-format",
+    multiple=True,
+    default=["csv"],
+    type=click.Choice(OUTPUT_FORMATS),
+    help="The formats to save the results in, next to data/am_pts.csv. Repeatable.",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    help="Reuse the results of an earlier run with the same inputs, or of its "
+    "gameweeks before the first changed one.",
+)
+@click.option(
+    "--save-tensor",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Also write every simulation's manager points to this memory-mapped file.",
+)
+@click.option(
+    "--scenario",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Also simulate the ratings in this CSV, with common random numbers. Repeatable.",
+)
+@click.option(
+    "--adjust",
+    multiple=True,
+    help="Also simulate the ratings with one team's Attack and Defence Strength "
+    "multiplied, as TEAM:ATTACK:DEFENCE, e.g. ARS:0.9:1.1. Repeatable.",
+)
+@click.option(
+    "--profile",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Write cProfile stats of the main process to this file.",
+)
+def main(
+    horizon: int = 12,
+    num_simulations: int = 100,
+    cpus: int = 1,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    tolerance: float | None = None,
+    confidence: float = 0.95,
+    snapshot: str | None = None,
+    replay: str | None = None,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    output_format: tuple[str, ...] = ("csv",),
+    cache: bool = False,
+    save_tensor: str | None = None,
+    scenario: tuple[str, ...] = (),
+    adjust: tuple[str, ...] = (),
+    timings: str | None = None,
+    trace_allocations: bool = False,
+    profile: str | None = None,
+):
+    settings = {
+        key: value
+        for key, value in locals().items()
+        if key not in ["timings", "trace_allocations", "profile"]
+    }
+    if timings is not None:
+        start_timings(trace_allocations)
+    profiler = cProfile.Profile() if profile is not None else None
+    if profiler is not None:
+        profiler.enable()
 
+    try:
+        run(**settings)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        if timings is not None:
+            write_timings(stop_timings(), timings, **settings)
 
-def run_simulations(
-    fixtures: pd.DataFrame,
-    table: pd.DataFrame,
-    num_simulations: int,
-    cpus: int,
-) -> pd.DataFrame:
-    initial_result = simulate_horizon(fixtures, table)
-    results = np.zeros((num_simulations, *initial_result.shape))
-    results[0] = initial_result.values
-    # TODO: Parallelize
-    for i in tqdm(range(1, num_simulations), initial=1, total=num_simulations):
-        result = simulate_horizon(fixtures, table)
-        results[i] = result.values
-
-    mean_results = results.mean(axis=0)
-    df = pd.DataFrame(
-        mean_results, index=initial_result.index, columns=initial_result.columns
+
+def run(
+    horizon: int = 12,
+    num_simulations: int = 100,
+    cpus: int = 1,
+    engine: str = "loop",
+    seed: int = 0,
+    estimator: str = "sampled",
+    chunk_size: int = CHUNK_SIZE,
+    tolerance: float | None = None,
+    confidence: float = 0.95,
+    snapshot: str | None = None,
+    replay: str | None = None,
+    sampling: str = "inverse",
+    variance_reduction: str = "none",
+    output_format: tuple[str, ...] = ("csv",),
+    cache: bool = False,
+    save_tensor: str | None = None,
+    scenario: tuple[str, ...] = (),
+    adjust: tuple[str, ...] = (),
+) -> None:
+    """
+    Runs the pipeline of main: fetches the data, simulates and saves the results.
+    Each stage imports what it needs, so e.g. replaying a snapshot never loads requests.
+    Takes the same arguments as main's options.
+    """
+    if (scenario or adjust) and tolerance is not None:
+        raise click.UsageError("--tolerance cannot be used with scenarios")
+    if (scenario or adjust) and save_tensor is not None:
+        raise click.UsageError("--save-tensor cannot be used with scenarios")
+    if cache and (scenario or adjust or save_tensor is not None):
+        raise click.UsageError("--cache cannot be used with scenarios or --save-tensor")
+    if "parquet" in output_format and importlib.util.find_spec("pyarrow") is None:
+        raise click.UsageError(
+            '--output-format parquet needs pyarrow: pip install -e ".[parquet]"'
+        )
+    if engine == "jit" and importlib.util.find_spec("numba") is None:
+        click.echo(
+            "numba is not installed, so --engine jit runs uncompiled, which is slow: "
+            'pip install -e ".[jit]"',
+            err=True,
+        )
+    metadata = {
+        "run_id": uuid.uuid4().hex,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "seed": seed,
+        "horizon": horizon,
+        "engine": engine,
+        "estimator": estimator,
+        "sampling": sampling,
+        "variance_reduction": variance_reduction,
+    }
+
+    if snapshot is not None:
+        with stage("snapshot"):
+            from src.data.snapshot import save_snapshot
+
+            save_snapshot(snapshot)
+        replay = snapshot
+
+    with stage("get_data"):
+        from src.data import get_data
+
+        fixtures, table, ratings, manager_prices = get_data(
+            horizon=horizon, snapshot=replay
+        )
+
+    if scenario or adjust:
+        run_scenarios(
+            fixtures,
+            table,
+            ratings,
+            manager_prices,
+            ratings_paths=scenario,
+            adjustments=adjust,
+            num_simulations=num_simulations,
+            cpus=cpus,
+            engine=engine,
+            seed=seed,
+            estimator=estimator,
+            chunk_size=chunk_size,
+            sampling=sampling,
+            variance_reduction=variance_reduction,
+            output_format=output_format,
+            metadata=metadata,
+        )
+        return
+
+    with stage("goal_distributions"):
+        from src.simulation.goals_probability_distribution import (
+            add_goal_proba_distributions,
+        )
+
+        fixtures = add_goal_proba_distributions(fixtures, ratings)
+    with stage("simulation"):
+        from src.simulation.engine import accumulate_simulations, results_frame
+
+        tensor = None
+        if save_tensor is not None:
+            from src.simulation.tensor_file import (
+                create_tensor_file,
+                tensor_dtype,
+                tensor_metadata,
+            )
+
+            shape = (num_simulations, len(table), fixtures["gameweek"].nunique())
+            header = tensor_metadata(
+                fixtures,
+                table,
+                ratings,
+                seed=seed,
+                engine=engine,
+                estimator=estimator,
+                chunk_size=chunk_size,
+                sampling=sampling,
+                variance_reduction=variance_reduction,
+            )
+            tensor = create_tensor_file(
+                save_tensor, shape, tensor_dtype(estimator), header
+            )
+        simulation_settings = dict(
+            num_simulations=num_simulations,
+            cpus=cpus,
+            engine=engine,
+            seed=seed,
+            estimator=estimator,
+            chunk_size=chunk_size,
+            tolerance=tolerance,
+            confidence=confidence,
+            sampling=sampling,
+            variance_reduction=variance_reduction,
+        )
+        if cache:
+            from src.data.fpl_api import get_cache_dir
+            from src.simulation.result_cache import (
+                RESULT_CACHE_DIR,
+                accumulate_cached_simulations,
+            )
+
+            accumulator, reused = accumulate_cached_simulations(
+                fixtures,
+                table,
+                ratings,
+                get_cache_dir() / RESULT_CACHE_DIR,
+                **simulation_settings,
+            )
+            gameweeks = sorted(fixtures["gameweek"].unique())
+            if reused == len(gameweeks):
+                click.echo("Reused the cached results", err=True)
+            elif reused:
+                click.echo(
+                    f"Reused the cached results up to gameweek {gameweeks[reused - 1]}",
+                    err=True,
+                )
+        else:
+            accumulator = accumulate_simulations(
+                fixtures, table, tensor=tensor, **simulation_settings
+            )
+        if tensor is not None:
+            from src.simulation.tensor_file import close_tensor_file
+
+            close_tensor_file(save_tensor, tensor, accumulator["count"])
+    results = results_frame(accumulator["mean"], table, fixtures)
+
+    import numpy as np
+
+    from src.simulation.accumulators import (
+        confidence_half_width,
+        variance_reduction_factor,
     )
-    return df
-
-
-def simulate_horizon(fixtures: pd.DataFrame, table: pd.DataFrame) -> pd.DataFrame:
-    points = {}
-    current_week = -1
-    running_table = table.copy()
-    start_of_gw_table = table.copy()
-    for fixture in fixtures.itertuples():
-        if fixture.gameweek != current_week:
-            current_week = fixture.gameweek
-            running_table = running_table.sort_values(
-                by=["points", "GD", "GF"], ascending=False
+
+    intervals = None
+    if tolerance is not None:
+        half_width = confidence_half_width(accumulator, confidence)
+        intervals = results_frame(half_width, table, fixtures)
+        if np.nanmax(half_width, initial=0.0) > tolerance:
+            click.echo(
+                f"Stopped at {accumulator['count']} simulations without reaching "
+                f"+/-{tolerance} (widest interval +/-{np.nanmax(half_width):.3f})",
+                err=True,
+            )
+
+    if variance_reduction != "none":
+        factor = variance_reduction_factor(accumulator, chunk_size)
+        if np.isnan(factor).all():
+            click.echo(
+                "Variance reduction needs at least 3 full chunks to measure", err=True
+            )
+        else:
+            click.echo(
+                f"Variance reduction vs plain sampling ({variance_reduction}): median "
+                f"x{np.nanmedian(factor):.2f}, worst x{np.nanmin(factor):.2f}",
+                err=True,
             )
-            running_table["rank"] = range(1, 21)
-            start_of_gw_table = running_table.copy()
 
-        home_goals, away_goals = simulate_match(
-            fixture.home_goal_distribution, fixture.away_goal_distribution
+    with stage("save_results"):
+        save_results(
+            results,
+            manager_prices,
+            intervals=intervals,
+            formats=output_format,
+            metadata={**metadata, "num_simulations": accumulator["count"]},
         )
-        running_table = update_table(
-            running_table, fixture.home, home_goals, fixture.away, away_goals
+
+
+def run_scenarios(
+    fixtures: pd.DataFrame,
+    table: pd.DataFrame,
+    ratings: pd.DataFrame,
+    manager_prices: pd.DataFrame,
+    ratings_paths: tuple[str, ...] = (),
+    adjustments: tuple[str, ...] = (),
+    output_format: tuple[str, ...] = ("csv",),
+    metadata: dict | None = None,
+    **kwargs,
+) -> None:
+    """
+    Simulates the base ratings and every scenario of a sweep in one pass with common
+    random numbers, see accumulate_scenarios. The base results are saved as usual and
+    each scenario's next to them, as am_pts_{scenario}.csv.
+    :param fixtures: The fixtures.
+    :param table: The current league table.
+    :param ratings: The base ratings.
+    :param manager_prices: The manager prices.
+    :param ratings_paths: Ratings CSV files, see build_scenarios.
+    :param adjustments: Adjustments of the base ratings, see build_scenarios.
+    :param output_format: The formats to save the results in, see save_results.
+    :param metadata: The run's metadata, saved with each scenario's results.
+    :param kwargs: The simulation settings, see accumulate_scenarios.
+    """
+    with stage("goal_distributions"):
+        from src.simulation.goals_probability_distribution import (
+            add_goal_proba_distributions,
         )
+        from src.simulation.scenarios import build_scenarios
 
-        teams = [fixture.home, fixture.away]
-        goals = [home_goals, away_goals]
-        for idx in range(2):
-            team_rank = start_of_gw_table.at[teams[idx], "rank"]
-            oppo_rank = start_of_gw_table.at[teams[1 - idx], "rank"]
+        try:
+            scenarios = build_scenarios(ratings, ratings_paths, adjustments)
+        except (KeyError, ValueError) as error:
+            raise click.UsageError(str(error))
+        scenarios = {
+            name: add_goal_proba_distributions(fixtures.copy(), scenario_ratings)
+            for name, scenario_ratings in scenarios.items()
+        }
+    with stage("simulation"):
+        from src.simulation.engine import accumulate_scenarios, results_frame
 
-            manager_points = calculate_manager_points(
-                team_rank, oppo_rank, goals[idx], goals[1 - idx]
-            )
+        accumulators = accumulate_scenarios(scenarios, table, **kwargs)
 
-            points[teams[idx]] = points.get(teams[idx], {})
-            points[teams[idx]][current_week] = (
-                points[teams[idx]].get(current_week, 0) + manager_points
+    import numpy as np
+
+    from src.simulation.scenarios import BASE_SCENARIO, common_random_numbers_gain
+
+    base = accumulators[BASE_SCENARIO]
+    with stage("save_results"):
+        for name, accumulator in accumulators.items():
+            results = results_frame(accumulator["mean"], table, fixtures)
+            path = RESULTS_PATH
+            if name != BASE_SCENARIO:
+                path = Path(RESULTS_PATH).with_name(f"am_pts_{name}.csv")
+            save_results(
+                results,
+                manager_prices,
+                path=path,
+                formats=output_format,
+                metadata={
+                    **(metadata or {}),
+                    "num_simulations": accumulator["count"],
+                    "scenario": name,
+                },
             )
 
-    df = pd.DataFrame(points).T
-    return df
+    for name, accumulator in accumulators.items():
+        if name == BASE_SCENARIO:
+            continue
+        change = np.nanmax(np.abs(accumulator["mean"] - base["mean"]), initial=0.0)
+        gain = common_random_numbers_gain(accumulator, base)
+        click.echo(
+            f'Scenario "{name}": largest EV change {change:.3f} points, difference '
+            f"variance x{np.nanmedian(gain):.1f} lower than with separate runs",
+            err=True,
+        )
+
+
+def save_results(
+    results: pd.DataFrame,
+    prices: pd.DataFrame,
+    path=RESULTS_PATH,
+    intervals: pd.DataFrame | None = None,
+    formats: tuple[str, ...] = ("csv",),
+    metadata: dict | None = None,
+) -> None:
+    """
+    Joins the manager prices with the mean points and writes them to a CSV file,
+    and/or to binary files that read back faster, see write_results.
+    :param results: The mean manager points of each team in each gameweek.
+    :param prices: The manager prices.
+    :param path: The path of the CSV file; the other formats swap its suffix.
+    :param intervals: Optional confidence interval half-widths, written as a
+        {gw}_CI column after each {gw}_Pts column.
+    :param formats: The formats to write, from "csv", "npz" and "parquet".
+    :param metadata: The run's metadata, stored in the binary formats.
+    """
+    from src.data.results_file import results_path, write_results
 
+    columns = {col: f"{col}_Pts" for col in results.columns}
+    output = results.rename(columns=columns)
+    if intervals is not None:
+        intervals = intervals.rename(columns={col: f"{col}_CI" for col in intervals})
+        output = output.join(intervals)
+        output = output[
+            [name for col in results.columns for name in (f"{col}_Pts", f"{col}_CI")]
+        ]
 
-def save_results(results: pd.DataFrame, prices: pd.DataFrame, path="../../data/am_pts.csv") -> None:
-    results = results.rename(columns={
-        col: f"{col}_Pts"
-        for col in results.columns
-    })
-    prices = prices.join(results)
-    prices.to_csv(path)
+    prices = prices.join(output)
+    for file_format in formats:
+        write_results(prices, results_path(path, file_format), metadata)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TENSOR_MAGIC = b"FPLSIMS\x00"
+TENSOR_VERSION = 1
+HEADER_ALIGNMENT = 64  # the data starts on a cache line, like .npy files
+MISSING_POINTS = np.iinfo(np.int8).min  # a team without a fixture in a gameweek
+
+
+def tensor_dtype(estimator: str) -> np.dtype:
+    """
+    Chooses the dtype of a tensor file: sampled manager points are small integers,
+    conditional expected points are not.
+    :param estimator: "sampled" or "conditional", see simulate_batch.
+    :return: int8 for the sampled estimator, float32 for the conditional one.
+    """
+    return np.dtype(np.int8 if estimator == "sampled" else np.float32)
+
+
+def tensor_metadata(
+    fixtures: pd.DataFrame, table: pd.DataFrame, ratings: pd.DataFrame, **settings
+) -> dict:
+    """
+    Describes a run for the header of its tensor file.
+    :param fixtures: The fixtures with goal probability distributions.
+    :param table: The current league table, giving the team order.
+    :param ratings: The ratings the goal probability distributions were built from.
+    :param settings: The run's settings, e.g. the seed and the engine.
+    :return: The metadata, with the teams, the gameweeks, the fixtures and the SHA-256
+        of the ratings CSV.
+    """
+    return {
+        **settings,
+        "teams": table.index.tolist(),
+        "gameweeks": np.unique(fixtures["gameweek"].to_numpy()).tolist(),
+        "fixtures": [
+            [int(gameweek), home, away]
+            for gameweek, home, away in fixtures[["gameweek", "home", "away"]].values
+        ],
+        "ratings_sha256": hashlib.sha256(ratings.to_csv().encode()).hexdigest(),
+    }
+
+
+def create_tensor_file(
+    path: str | Path, shape: tuple[int, ...], dtype: np.dtype, metadata: dict
+) -> np.memmap:
+    """
+    Creates a tensor file: a JSON header followed by the raw C-order array, which is
+    memory-mapped so simulations can be written to it without holding them in memory.
+    :param path: The path of the file.
+    :param shape: The shape of the array, (simulations, teams, gameweeks).
+    :param dtype: The dtype of the array, see tensor_dtype.
+    :param metadata: The metadata to store in the header, see tensor_metadata.
+    :return: The writable memory-mapped array, which must be passed to close_tensor_file.
+    """
+    dtype = np.dtype(dtype)
+    header = _encode_header(
+        {**metadata, "version": TENSOR_VERSION, "dtype": dtype.str, "shape": shape}
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+    return np.memmap(path, dtype, mode="r+", offset=len(header), shape=shape)
+
+
+def close_tensor_file(path: str | Path, tensor: np.memmap, count: int) -> None:
+    """
+    Flushes a tensor file, shrinking it to the simulations written if the run
+    stopped early, e.g. on reaching its tolerance.
+    :param path: The path of the file.
+    :param tensor: The array returned by create_tensor_file.
+    :param count: The number of simulations written.
+    """
+    tensor.flush()
+    if count == len(tensor):
+        return
+
+    metadata, offset = _read_header(path)
+    metadata["shape"][0] = count
+    header = _encode_header(metadata, length=offset)
+    with open(path, "r+b") as f:
+        f.write(header)
+        f.truncate(offset + count * tensor[0].nbytes)
+
+
+def open_tensor_file(path: str | Path) -> tuple[np.memmap, dict]:
+    """
+    Opens a tensor file read-only. Nothing is read until the array is sliced.
+    :param path: The path of the file.
+    :return: The memory-mapped array and the metadata from the header.
+    """
+    metadata, offset = _read_header(path)
+    tensor = np.memmap(
+        path,
+        np.dtype(metadata["dtype"]),
+        mode="r",
+        offset=offset,
+        shape=tuple(metadata["shape"]),
+    )
+    return tensor, metadata
+
+
+def encode_points(results: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+    Converts simulated manager points to the dtype of a tensor file.
+    :param results: The manager points, NaN where a team has no fixture.
+    :param dtype: The dtype of the tensor file.
+    :return: The points as dtype, with MISSING_POINTS for NaN in integer dtypes.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "f":
+        return results.astype(dtype)
+
+    missing = np.isnan(results)
+    if np.nanmax(np.abs(results), initial=0) >= abs(MISSING_POINTS):
+        raise ValueError(f"Manager points do not fit in {dtype}")
+    return np.where(missing, MISSING_POINTS, results).astype(dtype)
+
+
+def decode_points(values: np.ndarray) -> np.ndarray:
+    """
+    Converts a slice of a tensor file back to manager points.
+    :param values: The slice of the tensor file.
+    :return: The manager points as floats, NaN where a team has no fixture.
+    """
+    if values.dtype.kind == "f":
+        return np.asarray(values, dtype=np.float64)
+    return np.where(values == MISSING_POINTS, np.nan, values)
+
+
+def tensor_expected_points(path: str | Path, chunk_size: int = 10_000) -> pd.DataFrame:
+    """
+    Computes the mean manager points of a tensor file a slice at a time, so the
+    whole file is never loaded at once.
+    :param path: The path of the file.
+    :param chunk_size: The number of simulations per slice.
+    :return: The mean manager points of each team (rows) in each gameweek (columns),
+        as written by the simulation.
+    """
+    tensor, metadata = open_tensor_file(path)
+    total = np.zeros(tensor.shape[1:])
+    for start in range(0, len(tensor), chunk_size):
+        total += decode_points(tensor[start : start + chunk_size]).sum(axis=0)
+    mean = pd.DataFrame(
+        total / len(tensor), index=metadata["teams"], columns=metadata["gameweeks"]
+    )
+    return mean.rename_axis(index="team").dropna(how="all")
+
+
+def _encode_header(metadata: dict, length: int | None = None) -> bytes:
+    text = json.dumps(metadata).encode()
+    size = len(TENSOR_MAGIC) + 8 + len(text) + 1
+    if length is None:
+        length = -(-size // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+    text = text.ljust(length - len(TENSOR_MAGIC) - 8 - 1) + b"\n"
+    return TENSOR_MAGIC + length.to_bytes(8, "little") + text
+
+
+def _read_header(path: str | Path) -> tuple[dict, int]:
+    with open(path, "rb") as f:
+        if f.read(len(TENSOR_MAGIC)) != TENSOR_MAGIC:
+            raise ValueError(f"{path} is not a tensor file")
+        offset = int.from_bytes(f.read(8), "little")
+        metadata = json.loads(f.read(offset - len(TENSOR_MAGIC) - 8))
+    if metadata["version"] != TENSOR_VERSION:
+        raise ValueError(f"Unsupported tensor file version {metadata['version']}")
+    return metadata, offset
@@ -0,0 +1,128 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Iterator
+
+_recorders: list[dict] = []  # the active recorders, innermost last
+_open_peaks: list[int] = []  # the running peak of each open stage, innermost last
+_not_recording = nullcontext()
+
+
+def start_timings(trace_allocations: bool = False) -> None:
+    """
+    Starts recording stage timings; stages then record into this recorder until
+    stop_timings is called. Recorders nest, so a chunk can record its own stages.
+    :param trace_allocations: Whether to also trace allocations with tracemalloc,
+        which slows down allocation-heavy Python code.
+    """
+    started_tracing = trace_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _recorders.append(
+        {
+            "stages": {},
+            "trace_allocations": trace_allocations,
+            "started_tracing": started_tracing,
+        }
+    )
+
+
+def stop_timings() -> dict:
+    """
+    Stops the innermost recorder.
+    :return: The recorded stages, keyed by stage name, each a dictionary with calls,
+        wall_seconds, cpu_seconds and, when tracing allocations, allocated_bytes (the
+        memory still held after the stage, summed over calls) and peak_bytes (the most
+        held at once during a call), both relative to the start of each call.
+    """
+    recorder = _recorders.pop()
+    if recorder["started_tracing"]:
+        tracemalloc.stop()
+    return recorder["stages"]
+
+
+def recording_options() -> dict | None:
+    """
+    Gets the options of the innermost recorder, to start a matching one elsewhere.
+    :return: The keyword arguments for start_timings, or None if not recording.
+    """
+    if not _recorders:
+        return None
+    return {"trace_allocations": _recorders[-1]["trace_allocations"]}
+
+
+def stage(name: str) -> ContextManager:
+    """
+    Times a block of code as a stage, adding to its totals if it runs more than once.
+    Does nothing unless timings are being recorded.
+    :param name: The name of the stage, dotted for stages inside another stage.
+    :return: The context manager timing the block.
+    """
+    if not _recorders:
+        return _not_recording
+    return _record_stage(_recorders[-1], name)
+
+
+@contextmanager
+def _record_stage(recorder: dict, name: str) -> Iterator[None]:
+    trace_allocations = recorder["trace_allocations"]
+    if trace_allocations:
+        current, peak = tracemalloc.get_traced_memory()
+        if _open_peaks:  # keep the enclosing stage's peak before resetting it
+            _open_peaks[-1] = max(_open_peaks[-1], peak)
+        tracemalloc.reset_peak()
+        _open_peaks.append(current)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        totals = recorder["stages"].setdefault(
+            name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+        )
+        totals["calls"] += 1
+        totals["wall_seconds"] += time.perf_counter() - wall
+        totals["cpu_seconds"] += time.process_time() - cpu
+
+        if trace_allocations:
+            end, peak = tracemalloc.get_traced_memory()
+            peak = max(_open_peaks.pop(), peak)
+            if _open_peaks:
+                _open_peaks[-1] = max(_open_peaks[-1], peak)
+            tracemalloc.reset_peak()
+            totals["allocated_bytes"] = totals.get("allocated_bytes", 0) + end - current
+            totals["peak_bytes"] = max(totals.get("peak_bytes", 0), peak - current)
+
+
+def merge_timings(stages: dict) -> None:
+    """
+    Adds stages recorded elsewhere, e.g. in a worker process, to the active recorder.
+    :param stages: The stages returned by stop_timings.
+    """
+    if not _recorders:
+        return
+
+    recorded = _recorders[-1]["stages"]
+    for name, totals in stages.items():
+        if name not in recorded:
+            recorded[name] = dict(totals)
+            continue
+        for key, value in totals.items():
+            if key == "peak_bytes":
+                recorded[name][key] = max(recorded[name].get(key, 0), value)
+            else:
+                recorded[name][key] = recorded[name].get(key, 0) + value
+
+
+def write_timings(stages: dict, path: str | Path, **settings) -> None:
+    """
+    Writes the recorded stages to a JSON file.
+    :param stages: The stages returned by stop_timings.
+    :param path: The path of the JSON file.
+    :param settings: The run's settings, included under "settings".
+    """
+    with open(path, "w") as f:
+        json.dump({"settings": settings, "stages": stages}, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,66 @@
+import pytest
+
+from src.benchmarks.run import compare_reports, run_benchmarks
+from src.benchmarks.season import double_round_robin, synthetic_bundle
+from src.data.league_table import construct_raw_table
+
+
+def test_double_round_robin_schedule():
+    """Test every team plays every other team home and away, once per gameweek"""
+    schedule = double_round_robin(list(range(1, 21)))
+
+    assert len(schedule) == 38
+    for week in schedule:
+        teams = [team for pairing in week for team in pairing]
+        assert sorted(teams) == list(range(1, 21))
+    pairings = [pairing for week in schedule for pairing in week]
+    assert len(set(pairings)) == 380
+
+
+def test_synthetic_bundle_played_gameweeks():
+    """Test only the played gameweeks are finished and give a full table"""
+    bundle = synthetic_bundle(played_gameweeks=5)
+
+    finished = [fixture for fixture in bundle["fixtures"] if fixture["finished"]]
+    assert len(finished) == 50
+    assert (construct_raw_table(bundle["fixtures"])["played"] == 5).all()
+
+
+def test_run_benchmarks_quick():
+    """Test the smallest suite reports a time, rate and peak memory for every case"""
+    report = run_benchmarks(horizons=[1], simulations=[10], repeat=1)
+
+    assert list(report["results"]) == [
+        "cli_startup[--help]",
+        "construct_raw_table",
+        "get_raw_fixtures[horizon=1]",
+        "add_goal_proba_distributions[horizon=1]",
+        "simulate_horizon[horizon=1]",
+        "run_simulations[horizon=1,sims=10]",
+    ]
+    for result in report["results"].values():
+        assert result["seconds"] > 0
+        assert result["rate"] > 0
+        assert result["peak_memory"] > 0
+
+
+@pytest.mark.parametrize(
+    "seconds, peak_memory, expected",
+    [
+        (1.1, 2**21, []),
+        (1.5, 2**21, ["case seconds x1.50 of the baseline"]),
+        (1.0, 2**22, ["case peak_memory x2.00 of the baseline"]),
+        (1.0, 2**19, []),
+    ],
+)
+def test_compare_reports(seconds, peak_memory, expected):
+    """Test only growth beyond the threshold is reported, ignoring new cases and small peaks"""
+    baseline = {"results": {"case": {"seconds": 1.0, "peak_memory": 2**21}}}
+    report = {
+        "results": {
+            "case": {"seconds": seconds, "peak_memory": peak_memory},
+            "new case": {"seconds": 9.0, "peak_memory": 900},
+        }
+    }
+
+    assert compare_reports(report, baseline, threshold=0.25) == expected
@@ -0,0 +1,12 @@
+import pytest
+
+from src.data.fpl_api import clear_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_api_cache(tmp_path, monkeypatch):
+    """Keeps cached API responses out of the user's cache and between tests"""
+    monkeypatch.setenv("FPL_CACHE_DIR", str(tmp_path / "fpl_cache"))
+    clear_cache()
+    yield
+    clear_cache()
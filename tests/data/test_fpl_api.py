@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, Mock
 from src.data.fpl_api import (
+    clear_cache,
     get_bootstrap_json,
     get_fixtures_json,
     make_request,
@@ -22,13 +23,21 @@ def mock_successful_response():
     """Creates a mock response object with success status code"""
     mock = Mock()
     mock.status_code = 200
+    mock.headers = {"ETag": '"v1"'}
     mock.json.return_value = {"test": "data"}
     return mock
 
 
+def mock_session(*responses):
+    """Creates a mock session returning the given responses in order"""
+    session = Mock()
+    session.get.side_effect = list(responses)
+    return patch("src.data.fpl_api.get_session", return_value=session)
+
+
 def test_make_request_success(mock_successful_response):
     """Test successful API request"""
-    with patch("requests.get", return_value=mock_successful_response):
+    with mock_session(mock_successful_response):
         result = make_request("https://test-url.com")
 
     assert result == {"test": "data"}
@@ -39,7 +48,7 @@ def test_make_request_failure():
     mock_failed_response = Mock()
     mock_failed_response.status_code = 404
 
-    with patch("requests.get", return_value=mock_failed_response):
+    with mock_session(mock_failed_response):
         with pytest.raises(Exception) as exc_info:
             make_request("https://test-url.com")
 
@@ -50,10 +59,10 @@ def test_get_bootstrap_json(mock_successful_response):
     """Test bootstrap JSON endpoint"""
     expected_url = "https://fantasy.premierleague.com/api/bootstrap-static/"
 
-    with patch("requests.get", return_value=mock_successful_response) as mock_get:
+    with mock_session(mock_successful_response) as mock_get_session:
         result = get_bootstrap_json()
 
-        mock_get.assert_called_once_with(expected_url)
+        mock_get_session().get.assert_called_once_with(expected_url, headers={})
         assert result == {"test": "data"}
 
 
@@ -61,10 +70,10 @@ def test_get_fixtures_json(mock_successful_response):
     """Test fixtures JSON endpoint"""
     expected_url = "https://fantasy.premierleague.com/api/fixtures/"
 
-    with patch("requests.get", return_value=mock_successful_response) as mock_get:
+    with mock_session(mock_successful_response) as mock_get_session:
         result = get_fixtures_json()
 
-        mock_get.assert_called_once_with(expected_url)
+        mock_get_session().get.assert_called_once_with(expected_url, headers={})
         assert result == {"test": "data"}
 
 
@@ -86,3 +95,65 @@ def test_get_team_abbreviations_map_without_data(mock_bootstrap):
     mock_bootstrap.assert_called_once()
     expected = {1: "ARS", 2: "AVL", 3: "BOU"}
     assert result == expected
+
+
+def test_make_request_memory_cache(mock_successful_response):
+    """Test an endpoint is only fetched once per run"""
+    with mock_session(mock_successful_response) as mock_get_session:
+        first = make_request("https://test-url.com")
+        second = make_request("https://test-url.com")
+
+        assert mock_get_session().get.call_count == 1
+    assert first == second == {"test": "data"}
+
+
+def test_make_request_disk_cache_within_ttl(mock_successful_response):
+    """Test a fresh disk cache entry is used by a later run without any request"""
+    with mock_session(mock_successful_response):
+        make_request("https://test-url.com")
+    clear_cache()  # simulate a new run
+
+    with mock_session() as mock_get_session:
+        result = make_request("https://test-url.com")
+
+        mock_get_session().get.assert_not_called()
+    assert result == {"test": "data"}
+
+
+def test_make_request_conditional_request_not_modified(mock_successful_response):
+    """Test an expired entry is revalidated with its ETag and reused on a 304"""
+    not_modified = Mock()
+    not_modified.status_code = 304
+
+    with mock_session(mock_successful_response):
+        make_request("https://test-url.com")
+    clear_cache()
+
+    with mock_session(not_modified) as mock_get_session:
+        result = make_request("https://test-url.com", ttl=0)
+
+        mock_get_session().get.assert_called_once_with(
+            "https://test-url.com", headers={"If-None-Match": '"v1"'}
+        )
+    assert result == {"test": "data"}
+
+
+def test_make_request_conditional_request_modified(mock_successful_response):
+    """Test an expired entry is replaced when the API returns new data"""
+    updated = Mock()
+    updated.status_code = 200
+    updated.headers = {"Last-Modified": "Sat, 14 Dec 2024 12:00:00 GMT"}
+    updated.json.return_value = {"test": "new data"}
+
+    with mock_session(mock_successful_response):
+        make_request("https://test-url.com")
+    clear_cache()
+
+    with mock_session(updated):
+        result = make_request("https://test-url.com", ttl=0)
+    clear_cache()
+
+    assert result == {"test": "new data"}
+    with mock_session() as mock_get_session:
+        assert make_request("https://test-url.com") == {"test": "new data"}
+        mock_get_session().get.assert_not_called()
@@ -1,8 +1,14 @@
+import numpy as np
 import pytest
 import pandas as pd
 from unittest.mock import patch, Mock
 
-from src.data.league_table import construct_league_table, construct_raw_table
+import src.data.league_table as league_table
+from src.data.league_table import (
+    construct_league_table,
+    construct_raw_table,
+    update_raw_table,
+)
 
 
 @pytest.fixture
@@ -292,3 +298,130 @@ def test_construct_raw_table_validation():
 
     with pytest.raises(KeyError):
         construct_raw_table(invalid_fixtures)
+
+
+@pytest.fixture
+def season_fixtures():
+    fixtures = []
+    for event, (home, away, home_score, away_score) in enumerate(
+        [(1, 2, 2, 0), (3, 4, 1, 1), (2, 3, 0, 3), (4, 1, 2, 1), (5, 6, 4, 4)], start=1
+    ):
+        fixtures.append(
+            {
+                "event": event,
+                "finished": False,
+                "team_h": home,
+                "team_a": away,
+                "team_h_score": None,
+                "team_a_score": None,
+                "result": (home_score, away_score),
+            }
+        )
+    return fixtures
+
+
+def finish(fixtures, count):
+    for fixture in fixtures[:count]:
+        fixture["finished"] = True
+        fixture["team_h_score"], fixture["team_a_score"] = fixture["result"]
+    return fixtures
+
+
+def test_update_raw_table_only_tallies_new_results(season_fixtures, tmp_path):
+    """Test each update adds only the newly finished results and matches a rebuild"""
+    state_path = tmp_path / "league_table.json"
+    tallied = []
+    tally_results = league_table.tally_results
+
+    def spy(results):
+        tallied.append(len(results))
+        return tally_results(results)
+
+    with patch("src.data.league_table.tally_results", side_effect=spy):
+        for count in [2, 2, 4, 5]:
+            table = update_raw_table(finish(season_fixtures, count), state_path)
+
+    assert tallied == [2, 0, 2, 1]
+    pd.testing.assert_frame_equal(table, construct_raw_table(season_fixtures))
+
+
+def test_update_raw_table_rebuilds_on_changed_result(season_fixtures, tmp_path):
+    """Test a corrected past result rebuilds the table instead of double counting"""
+    state_path = tmp_path / "league_table.json"
+    update_raw_table(finish(season_fixtures, 3), state_path)
+
+    season_fixtures[0]["team_h_score"] = 0
+    table = update_raw_table(season_fixtures, state_path)
+
+    pd.testing.assert_frame_equal(table, construct_raw_table(season_fixtures))
+    assert table.loc[1, "points"] == 1
+    assert table.loc[1, "played"] == 1
+
+
+def test_update_raw_table_ignores_unreadable_state(season_fixtures, tmp_path):
+    """Test a corrupt saved table is replaced by a full rebuild"""
+    state_path = tmp_path / "league_table.json"
+    state_path.write_text("{not json")
+
+    table = update_raw_table(finish(season_fixtures, 3), state_path)
+
+    pd.testing.assert_frame_equal(table, construct_raw_table(season_fixtures))
+    assert state_path.exists()
+
+
+def test_construct_raw_table_counts_games_played_out_of_order(sample_fixtures):
+    """Test finished games after an unfinished one, e.g. rearranged games, are counted"""
+    sample_fixtures.append(
+        {
+            "event": 5,
+            "finished": True,
+            "team_h": 2,
+            "team_a": 4,
+            "team_h_score": 3,
+            "team_a_score": 1,
+        }
+    )
+
+    table = construct_raw_table(sample_fixtures)
+
+    assert table.loc[2, "played"] == 2
+    assert table.loc[2, "points"] == 3
+    assert table.loc[4, "L"] == 1
+    assert table["played"].sum() == 6
+
+
+def test_construct_raw_table_matches_loop_tally():
+    """Test the vectorised tally matches a fixture by fixture tally over a season"""
+    rng = np.random.default_rng(0)
+    fixtures = [
+        {
+            "event": event,
+            "finished": True,
+            "team_h": int(home),
+            "team_a": int(away),
+            "team_h_score": int(rng.poisson(1.5)),
+            "team_a_score": int(rng.poisson(1.2)),
+        }
+        for event in range(1, 39)
+        for home, away in rng.permutation(np.arange(1, 21)).reshape(10, 2)
+    ]
+
+    table = construct_raw_table(fixtures)
+
+    for team_id, row in table.iterrows():
+        points = goals_for = goals_against = 0
+        for fixture in fixtures:
+            for team, score, conceded in [
+                (fixture["team_h"], fixture["team_h_score"], fixture["team_a_score"]),
+                (fixture["team_a"], fixture["team_a_score"], fixture["team_h_score"]),
+            ]:
+                if team == team_id:
+                    points += 3 * (score > conceded) + (score == conceded)
+                    goals_for += score
+                    goals_against += conceded
+        assert (row["points"], row["GF"], row["GA"]) == (
+            points,
+            goals_for,
+            goals_against,
+        )
+    assert (table["W"] + table["D"] + table["L"] == table["played"]).all()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.read_csv import read_expected_points
+from src.data.results_file import read_results, results_path, write_results
+
+
+@pytest.fixture
+def results():
+    return pd.DataFrame(
+        {
+            "Manager": ["Arteta", "Emery"],
+            "Price": [1.5, 1.0],
+            "16_Pts": [5.25, np.nan],
+            "16_CI": [0.1, np.nan],
+            "17_Pts": [6.0, 3.125],
+            "17_CI": [0.3, 0.4],
+        },
+        index=pd.Index(["ARS", "AVL"], name="team"),
+    )
+
+
+@pytest.mark.parametrize("file_format", ["csv", "npz", "parquet"])
+def test_results_round_trip(results, tmp_path, file_format):
+    """Test each format reads back the same table, and the metadata where stored"""
+    if file_format == "parquet":
+        pytest.importorskip("pyarrow")
+    path = results_path(tmp_path / "am_pts.csv", file_format)
+    metadata = {"run_id": "abc", "seed": 3, "num_simulations": 1000, "horizon": 2}
+
+    write_results(results, path, metadata)
+    saved, saved_metadata = read_results(path)
+
+    pd.testing.assert_frame_equal(saved, results)
+    assert saved_metadata == ({} if file_format == "csv" else metadata)
+
+
+def test_npz_keeps_column_dtypes(results, tmp_path):
+    """Test NPZ files keep each column's dtype instead of casting them to float"""
+    results = results.assign(Fixtures=np.array([2, 1], dtype=np.int32), Home=True)
+    path = tmp_path / "am_pts.npz"
+
+    write_results(results, path)
+    saved, _ = read_results(path)
+
+    pd.testing.assert_frame_equal(saved, results)
+    assert saved["Fixtures"].dtype == np.int32
+
+
+def test_read_expected_points_from_npz(results, tmp_path):
+    """Test the planner's input can be read from an NPZ file"""
+    path = tmp_path / "am_pts.npz"
+    write_results(results, path)
+
+    expected_points = read_expected_points(path)
+
+    assert list(expected_points.columns) == [16, 17]
+    assert expected_points.loc["AVL", 17] == 3.125
+
+
+def test_write_results_unknown_format(results, tmp_path):
+    """Test an unknown suffix is rejected"""
+    with pytest.raises(ValueError):
+        write_results(results, tmp_path / "am_pts.xlsx")
@@ -0,0 +1,117 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from src.data import get_data
+from src.data.snapshot import SNAPSHOT_VERSION, load_snapshot, save_snapshot
+
+TEAMS = ["ARS", "AVL", "BOU", "BRE", "BHA", "CHE", "CRY", "EVE", "FUL", "IPS"]
+TEAMS += ["LEI", "LIV", "MCI", "MUN", "NEW", "NFO", "SOU", "TOT", "WHU", "WOL"]
+
+MOCK_BOOTSTRAP_DATA = {
+    "events": [
+        {"id": 1, "finished": True},
+        {"id": 2, "finished": False},
+        {"id": 3, "finished": False},
+    ],
+    "teams": [{"id": idx + 1, "short_name": name} for idx, name in enumerate(TEAMS)],
+}
+
+MOCK_FIXTURES_DATA = [
+    {
+        "id": 1,
+        "event": 1,
+        "finished": True,
+        "team_h": 1,
+        "team_a": 2,
+        "team_h_score": 3,
+        "team_a_score": 1,
+    },
+    {
+        "id": 2,
+        "event": 2,
+        "finished": False,
+        "team_h": 2,
+        "team_a": 3,
+        "team_h_score": None,
+        "team_a_score": None,
+    },
+    {
+        "id": 3,
+        "event": 3,
+        "finished": False,
+        "team_h": 3,
+        "team_a": 1,
+        "team_h_score": None,
+        "team_a_score": None,
+    },
+]
+
+MOCK_RATINGS = pd.DataFrame(
+    {"Attack Strength": [1.99, 1.65], "Defence Strength": [0.83, 1.48]},
+    index=pd.Index(["ARS", "AVL"], name="Team"),
+)
+
+MOCK_MANAGER_PRICES = pd.DataFrame(
+    {"Manager": ["Arteta", "Emery"], "Price": [1.5, 1.0]},
+    index=pd.Index(["ARS", "AVL"], name="team"),
+)
+
+
+@pytest.fixture
+def recorded_sources():
+    with (
+        patch("src.data.snapshot.get_bootstrap_json", return_value=MOCK_BOOTSTRAP_DATA),
+        patch("src.data.snapshot.get_fixtures_json", return_value=MOCK_FIXTURES_DATA),
+        patch("src.data.snapshot.read_ratings", return_value=MOCK_RATINGS),
+        patch(
+            "src.data.snapshot.read_manager_prices", return_value=MOCK_MANAGER_PRICES
+        ),
+    ):
+        yield
+
+
+@pytest.mark.parametrize("filename", ["snapshot.json", "snapshot.json.gz"])
+def test_snapshot_round_trip(tmp_path, recorded_sources, filename):
+    """Test a saved bundle loads back with the same API data and CSV frames"""
+    path = tmp_path / filename
+    save_snapshot(path)
+
+    bundle = load_snapshot(path)
+
+    assert bundle["version"] == SNAPSHOT_VERSION
+    assert bundle["bootstrap"] == MOCK_BOOTSTRAP_DATA
+    assert bundle["fixtures"] == MOCK_FIXTURES_DATA
+    assert_frame_equal(bundle["ratings"], MOCK_RATINGS)
+    assert_frame_equal(bundle["manager_prices"], MOCK_MANAGER_PRICES)
+
+
+def test_load_snapshot_unsupported_version(tmp_path):
+    """Test bundles from another format version are rejected"""
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps({"version": SNAPSHOT_VERSION + 1}))
+
+    with pytest.raises(ValueError) as exc_info:
+        load_snapshot(path)
+
+    assert "Unsupported snapshot version" in str(exc_info.value)
+
+
+def test_get_data_replays_snapshot_offline(tmp_path, recorded_sources):
+    """Test get_data builds every input from the bundle without using the network"""
+    path = tmp_path / "snapshot.json"
+    save_snapshot(path)
+
+    with patch("src.data.fpl_api.get_session", side_effect=AssertionError):
+        fixtures, table, ratings, prices = get_data(horizon=1, snapshot=path)
+
+    assert fixtures.to_dict("records") == [
+        {"gameweek": 2, "home": "AVL", "away": "BOU"}
+    ]
+    assert table.loc["ARS", "points"] == 3
+    assert table.loc["ARS", "rank"] == 1
+    assert_frame_equal(ratings, MOCK_RATINGS)
+    assert_frame_equal(prices, MOCK_MANAGER_PRICES)
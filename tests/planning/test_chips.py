@@ -0,0 +1,130 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from src.planning.chips import plan_chips
+from src.planning.plan import main
+
+
+@pytest.fixture
+def expected_points():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        rng.uniform(0, 10, size=(5, 8)),
+        index=pd.Index(["ARS", "AVL", "BOU", "BRE", "BHA"], name="team"),
+        columns=range(16, 24),
+    )
+
+
+@pytest.fixture
+def prices():
+    return pd.Series(
+        [1.5, 1.0, 0.5, 0.5, 1.0], index=["ARS", "AVL", "BOU", "BRE", "BHA"]
+    )
+
+
+@pytest.mark.parametrize("max_changes", [0, 1, 2])
+def test_plan_chips_matches_brute_force(expected_points, prices, max_changes):
+    """Test the plans match scoring every window and choice of managers one by one"""
+    plans = plan_chips(
+        expected_points, prices, budget=1.0, max_changes=max_changes, top=1_000
+    )
+
+    scored = []
+    affordable = prices.index[prices <= 1.0]
+    for start in range(16, 22):
+        for managers in product(affordable, repeat=3):
+            changes = (managers[0] != managers[1]) + (managers[1] != managers[2])
+            if changes <= max_changes:
+                ev = sum(
+                    expected_points.loc[team, start + i]
+                    for i, team in enumerate(managers)
+                )
+                scored.append(ev)
+    assert len(plans) == len(scored)
+    np.testing.assert_allclose(plans["EV"], sorted(scored, reverse=True))
+    assert (plans["price"] <= 1.0).all()
+    assert (plans["changes"] <= max_changes).all()
+
+
+def test_plan_chips_best_plan(expected_points, prices):
+    """Test the best plan names its gameweeks and managers"""
+    expected_points.loc["BOU", [19, 20, 21]] = 20.0
+
+    best = plan_chips(expected_points, prices, top=1).iloc[0]
+
+    assert (best["start"], best["end"]) == (19, 21)
+    assert [best["manager_1"], best["manager_2"], best["manager_3"]] == ["BOU"] * 3
+    assert best["EV"] == pytest.approx(60.0)
+    assert best["changes"] == 0
+
+
+def test_plan_chips_blank_gameweeks(prices):
+    """Test blank gameweeks, missing or NaN, score no points but still count"""
+    expected_points = pd.DataFrame(
+        {16: [5.0, 1.0], 17: [np.nan, 1.0], 19: [5.0, 1.0]}, index=["ARS", "AVL"]
+    )
+
+    plans = plan_chips(expected_points, prices, top=10)
+
+    assert plans["start"].tolist() == [16, 17, 16, 17]
+    assert plans["EV"].tolist() == [5.0, 5.0, 2.0, 2.0]
+
+
+def test_plan_chips_nothing_affordable(expected_points, prices):
+    """Test no plans are returned when no manager is within budget"""
+    assert plan_chips(expected_points, prices, budget=0.4).empty
+
+
+def test_plan_cli(expected_points, prices, tmp_path):
+    """Test the command reads the simulation output and writes the plans"""
+    results = tmp_path / "am_pts.csv"
+    prices_path = tmp_path / "manager_prices.csv"
+    output = tmp_path / "plans.csv"
+    prices.rename("Price").rename_axis("team").to_frame().join(
+        expected_points.rename(columns=lambda gw: f"{gw}_Pts")
+    ).to_csv(results)
+    prices.rename("Price").rename_axis("team").to_csv(prices_path)
+
+    result = CliRunner().invoke(
+        main,
+        [
+            f"--results={results}",
+            f"--prices={prices_path}",
+            "--budget=1",
+            "--top=3",
+            f"--output={output}",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    plans = pd.read_csv(output)
+    pd.testing.assert_frame_equal(
+        plans, plan_chips(expected_points, prices, budget=1.0, top=3)
+    )
+
+
+def test_plan_cli_missing_results(prices, tmp_path):
+    """Test a missing results file without --tensor is a usage error, not a traceback"""
+    prices_path = tmp_path / "manager_prices.csv"
+    prices.rename("Price").rename_axis("team").to_csv(prices_path)
+
+    result = CliRunner().invoke(
+        main, [f"--results={tmp_path / 'am_pts.csv'}", f"--prices={prices_path}"]
+    )
+
+    assert result.exit_code == 2
+    assert "--results" in result.output
+    assert "does not exist" in result.output
+
+
+@pytest.mark.parametrize("top", ["0", "-1"])
+def test_plan_cli_rejects_no_plans(top):
+    """Test --top must ask for at least one plan"""
+    result = CliRunner().invoke(main, [f"--top={top}"])
+
+    assert result.exit_code == 2
+    assert "--top" in result.output
@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.benchmarks.season import synthetic_bundle
+from src.data.snapshot import SNAPSHOT_VERSION
+
+
+@pytest.fixture
+def table():
+    return pd.DataFrame(
+        {
+            "points": [10, 10, 7, 3],
+            "GD": [5, 3, 0, -8],
+            "GF": [9, 9, 4, 2],
+            "rank": [1, 2, 3, 4],
+        },
+        index=pd.Index(["ARS", "AVL", "BOU", "BRE"], name="team"),
+    )
+
+
+@pytest.fixture
+def fixtures():
+    certain_one_nil = [0.0, 1.0, 0.0]
+    certain_nil = [1.0, 0.0, 0.0]
+    return pd.DataFrame(
+        {
+            "gameweek": [16, 16, 17],
+            "home": ["ARS", "BOU", "BRE"],
+            "away": ["AVL", "BRE", "ARS"],
+            "home_goal_distribution": [certain_one_nil, certain_nil, certain_one_nil],
+            "away_goal_distribution": [certain_nil, certain_nil, certain_nil],
+        }
+    )
+
+
+@pytest.fixture
+def uncertain_fixtures(fixtures):
+    return fixtures.assign(
+        home_goal_distribution=[[0.4, 0.35, 0.25]] * 3,
+        away_goal_distribution=[[0.5, 0.3, 0.2]] * 3,
+    )
+
+
+@pytest.fixture
+def ratings():
+    return pd.DataFrame(
+        {"Attack Strength": [1.5, 1.0], "Defence Strength": [0.8, 1.2]},
+        index=pd.Index(["ARS", "AVL"], name="Team"),
+    )
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    bundle = synthetic_bundle(played_gameweeks=33)
+    bundle["version"] = SNAPSHOT_VERSION
+    for key in ["ratings", "manager_prices"]:
+        bundle[key] = bundle[key].to_csv()
+    path = tmp_path / "snapshot.json"
+    path.write_text(json.dumps(bundle))
+    return path
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    path = tmp_path / "a" / "b"  # results are saved to ../../data
+    path.mkdir(parents=True)
+    (tmp_path / "data").mkdir()
+    return path
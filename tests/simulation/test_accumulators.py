@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.simulation.accumulators import (
+    accumulate,
+    accumulator_variance,
+    merge_accumulators,
+    new_accumulator,
+    variance_reduction_factor,
+)
+
+
+@pytest.fixture
+def results():
+    rng = np.random.default_rng(0)
+    return rng.poisson(5.0, size=(1_000, 3, 4)).astype(float)
+
+
+def test_accumulate_in_chunks_matches_dense(results):
+    """Test folding chunks of different sizes gives the dense mean and variance"""
+    accumulator = new_accumulator((3, 4))
+    for start, stop in [(0, 1), (1, 300), (300, 301), (301, 1_000)]:
+        accumulator = accumulate(accumulator, results[start:stop])
+
+    assert accumulator["count"] == 1_000
+    assert np.allclose(accumulator["mean"], results.mean(axis=0))
+    assert np.allclose(accumulator_variance(accumulator), results.var(axis=0, ddof=1))
+
+
+def test_merge_accumulators_is_order_independent(results):
+    """Test merging partial accumulators in either order gives the same statistics"""
+    first = accumulate(new_accumulator((3, 4)), results[:400])
+    second = accumulate(new_accumulator((3, 4)), results[400:])
+
+    forward = merge_accumulators(first, second)
+    backward = merge_accumulators(second, first)
+
+    assert forward["count"] == backward["count"] == 1_000
+    assert np.allclose(forward["mean"], backward["mean"])
+    assert np.allclose(forward["m2"], backward["m2"])
+
+
+def test_accumulate_empty_and_nan_cells():
+    """Test empty batches are ignored and blank (NaN) cells stay NaN"""
+    results = np.array([[1.0, np.nan], [3.0, np.nan]])
+    accumulator = accumulate(new_accumulator((2,)), results[:0])
+    accumulator = accumulate(accumulator, results)
+
+    assert accumulator["count"] == 2
+    assert accumulator["mean"][0] == 2.0
+    assert np.isnan(accumulator["mean"][1])
+    assert np.isnan(accumulator_variance(new_accumulator((2,)))).all()
+
+
+def test_variance_reduction_factor_is_one_for_plain_sampling():
+    """Test independent chunks of plain samples show no variance reduction"""
+    rng = np.random.default_rng(0)
+    accumulator = new_accumulator((2,))
+    chunk_means = new_accumulator((2,))
+    for _ in range(400):
+        chunk = rng.normal(size=(50, 2))
+        accumulator = accumulate(accumulator, chunk)
+        chunk_means = accumulate(chunk_means, chunk.mean(axis=0)[None])
+    accumulator["chunk_means"] = chunk_means
+
+    assert np.allclose(variance_reduction_factor(accumulator, 50), 1.0, atol=0.2)
+
+
+def test_variance_reduction_factor_needs_three_chunks(results):
+    """Test the factor is NaN until enough chunk means are collected"""
+    accumulator = accumulate(new_accumulator((3, 4)), results)
+    accumulator["chunk_means"] = accumulate(
+        new_accumulator((3, 4)), results[:2].mean(axis=0)[None]
+    )
+
+    assert np.isnan(variance_reduction_factor(accumulator, 500)).all()
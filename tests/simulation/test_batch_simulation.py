@@ -0,0 +1,77 @@
+import numpy as np
+
+from src.simulation.batch_simulation import (
+    prepare_fixture_arrays,
+    simulate_batch,
+)
+from src.simulation.league_state import unpack_states
+
+
+def test_prepare_fixture_arrays(fixtures, table):
+    """Test fixtures are converted to table indices and normalised CDFs"""
+    arrays = prepare_fixture_arrays(fixtures, table.index)
+
+    assert arrays["home"].tolist() == [0, 2, 3]
+    assert arrays["away"].tolist() == [1, 3, 0]
+    assert arrays["gameweek"].tolist() == [0, 0, 1]
+    assert arrays["gameweeks"].tolist() == [16, 17]
+    assert arrays["max_goals"] == 2
+    assert np.allclose(arrays["home_sampler"]["cdf"][:, -1], 1.0)
+    assert arrays["expected_points"].shape == (3, 2, 2)
+
+
+def test_simulate_batch_deterministic_fixtures(fixtures, table):
+    """Test points, ranks and blank gameweeks for fixtures with certain results"""
+    arrays = prepare_fixture_arrays(fixtures, table.index)
+
+    uniforms = np.random.default_rng(0).random((2, 3, 3))
+
+    result = simulate_batch(arrays, table, uniforms)
+
+    assert result.shape == (3, 4, 2)
+    # GW16: ARS beat AVL 1-0, BOU and BRE draw 0-0
+    assert (result[:, 0, 0] == 1 + 2 + 6).all()
+    assert (result[:, 1, 0] == 0).all()
+    assert (result[:, 2, 0] == 2 + 3).all()
+    assert (result[:, 3, 0] == 2 + 3).all()  # 4th vs 3rd is not 5 places behind
+    # GW17: BRE (4th) beat ARS (1st) 1-0, no bonus as only 3 places behind
+    assert (result[:, 3, 1] == 1 + 2 + 6).all()
+    assert (result[:, 0, 1] == 0).all()
+    # AVL and BOU have no GW17 fixture
+    assert np.isnan(result[:, 1, 1]).all()
+    assert np.isnan(result[:, 2, 1]).all()
+
+
+def test_simulate_batch_conditional_matches_certain_results(fixtures, table):
+    """Test the conditional estimator equals the sampled points when results are certain"""
+    arrays = prepare_fixture_arrays(fixtures, table.index)
+
+    sampled = simulate_batch(arrays, table, np.random.default_rng(0).random((2, 3, 3)))
+    conditional = simulate_batch(
+        arrays,
+        table,
+        np.random.default_rng(1).random((2, 3, 3)),
+        estimator="conditional",
+    )
+
+    assert np.allclose(sampled, conditional, equal_nan=True)
+
+
+def test_simulate_batch_resumes_from_states(fixtures, table):
+    """Test simulating on from the stored tables matches simulating straight through"""
+    arrays = prepare_fixture_arrays(fixtures, table.index)
+    uniforms = np.random.default_rng(0).random((2, 3, 5))
+    states = np.empty((5, 2, 3, 4), dtype=np.int16)
+
+    full = simulate_batch(arrays, table, uniforms, states=states)
+    later = fixtures[fixtures["gameweek"] > 16]
+    resumed = simulate_batch(
+        prepare_fixture_arrays(later, table.index),
+        table,
+        uniforms[:, 2:],
+        state=unpack_states(states[:, 0]),
+    )
+
+    np.testing.assert_array_equal(resumed, full[:, :, 1:])
+    # points, GD and GF after GW17: BRE beat ARS, after ARS beat AVL and BOU drew BRE
+    assert states[0, 1].tolist() == [[13, 10, 8, 7], [5, 2, 0, -7], [10, 9, 4, 3]]
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from src.simulation.engine import (
+    accumulate_scenarios,
+    accumulate_simulations,
+    plan_chunks,
+    run_simulations,
+)
+
+
+def test_plan_chunks_sizes_and_seeds():
+    """Test chunks cover every simulation with independent seed sequences"""
+    chunks = list(plan_chunks(2_500, seed=0, chunk_size=1_000))
+
+    assert [size for size, _ in chunks] == [1_000, 1_000, 500]
+    states = [tuple(seq.generate_state(2)) for _, seq in chunks]
+    assert len(set(states)) == 3
+
+    children = np.random.SeedSequence(0).spawn(3)
+    assert states == [tuple(child.generate_state(2)) for child in children]
+
+
+@pytest.mark.parametrize("engine", ["loop", "batch", "jit"])
+def test_run_simulations_independent_of_cpus(uncertain_fixtures, table, engine):
+    """Test the same seed gives identical results whatever the number of CPUs"""
+    kwargs = dict(engine=engine, chunk_size=10, progress=False)
+    single = run_simulations(uncertain_fixtures, table, 50, 1, seed=7, **kwargs)
+    pooled = run_simulations(uncertain_fixtures, table, 50, 2, seed=7, **kwargs)
+    other_seed = run_simulations(uncertain_fixtures, table, 50, 2, seed=8, **kwargs)
+
+    assert single.equals(pooled)
+    assert not single.equals(other_seed)
+
+
+def test_run_simulations_output_shape(fixtures, table):
+    """Test the mean results have one row per team with a fixture and one column per gameweek"""
+    result = run_simulations(fixtures, table, 20, cpus=1, engine="batch")
+
+    assert list(result.columns) == [16, 17]
+    assert set(result.index) == {"ARS", "AVL", "BOU", "BRE"}
+    assert result.loc["ARS", 16] == 9
+    assert np.isnan(result.loc["AVL", 17])
+
+
+def test_accumulate_simulations_stops_at_tolerance(fixtures, table):
+    """Test adaptive runs stop once the intervals are narrow enough, independently of cpus"""
+    fixtures = fixtures.copy()
+    fixtures.at[0, "home_goal_distribution"] = [0.5, 0.5, 0.0]
+    kwargs = dict(engine="batch", chunk_size=100, tolerance=0.2, seed=1)
+
+    single = accumulate_simulations(fixtures, table, 100_000, cpus=1, **kwargs)
+    pooled = accumulate_simulations(fixtures, table, 100_000, cpus=2, **kwargs)
+
+    # ARS scores 0 or 1 goals against AVL, so only that cell has any variance
+    assert 100 < single["count"] < 100_000
+    assert single["count"] == pooled["count"]
+    assert np.array_equal(single["mean"], pooled["mean"], equal_nan=True)
+
+
+def test_accumulate_simulations_stops_at_maximum(fixtures, table):
+    """Test an unreachable tolerance stops at num_simulations"""
+    fixtures = fixtures.copy()
+    fixtures.at[0, "home_goal_distribution"] = [0.5, 0.5, 0.0]
+
+    result = accumulate_simulations(
+        fixtures, table, 300, cpus=1, engine="batch", chunk_size=100, tolerance=1e-6
+    )
+
+    assert result["count"] == 300
+
+
+@pytest.mark.parametrize("engine", ["loop", "batch", "jit"])
+def test_accumulate_scenarios_base_matches_single_run(fixtures, table, engine):
+    """Test the base scenario matches a single run and identical scenarios don't differ"""
+    accumulators = accumulate_scenarios(
+        {"base": fixtures, "same": fixtures.copy()},
+        table,
+        num_simulations=20,
+        cpus=1,
+        engine=engine,
+        chunk_size=10,
+        progress=False,
+    )
+    accumulator = accumulate_simulations(
+        fixtures, table, 20, cpus=1, engine=engine, chunk_size=10, progress=False
+    )
+
+    np.testing.assert_array_equal(accumulators["base"]["mean"], accumulator["mean"])
+    np.testing.assert_array_equal(accumulators["same"]["mean"], accumulator["mean"])
+    assert "difference" not in accumulators["base"]
+    assert np.nanmax(np.abs(accumulators["same"]["difference"]["mean"])) == 0
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.goals_probability_distribution import (
+    add_goal_proba_distributions,
+    discrete_goal_distribution,
+    goal_distribution_matrix,
+    predict_xg,
+)
+
+
+@pytest.fixture
+def ratings():
+    return pd.DataFrame(
+        {"Attack Strength": [1.99, 1.65, 1.57], "Defence Strength": [0.83, 1.48, 1.48]},
+        index=pd.Index(["ARS", "AVL", "BOU"], name="Team"),
+    )
+
+
+def test_discrete_goal_distribution_poisson_with_tail():
+    """Test the Poisson probabilities, with the mass above the cap in the last bin"""
+    xg = 1.7
+
+    result = discrete_goal_distribution(xg, max_number_of_goals=7)
+
+    assert len(result) == 8
+    for k in range(7):
+        assert result[k] == pytest.approx(math.exp(-xg) * xg**k / math.factorial(k))
+    assert result.sum() == pytest.approx(1.0)
+
+
+def test_discrete_goal_distribution_vectorised():
+    """Test arrays of xG give one distribution per xG along the last axis"""
+    xg = np.array([[0.5, 1.0], [2.0, 3.5]])
+
+    result = discrete_goal_distribution(xg, max_number_of_goals=5)
+
+    assert result.shape == (2, 2, 6)
+    assert np.allclose(result.sum(axis=-1), 1.0)
+    assert np.allclose(result[1, 0], discrete_goal_distribution(2.0, 5))
+
+
+def test_discrete_goal_distribution_matches_scipy():
+    """Test the NumPy Poisson probabilities match scipy, including zero xG"""
+    stats = pytest.importorskip("scipy.stats")
+    xg = np.array([0.0, 0.3, 1.2, 2.9, 6.0])
+
+    result = discrete_goal_distribution(xg, max_number_of_goals=7)
+
+    expected = stats.poisson.pmf(np.arange(8), xg[:, None])
+    expected[:, -1] = stats.poisson.sf(6, xg)
+    assert np.allclose(result, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_goal_distribution_matrix_matches_scalar_calls(ratings):
+    """Test every pairing and venue matches the per-team calculation"""
+    matrix = goal_distribution_matrix(ratings)
+
+    assert matrix.shape == (3, 3, 2, 8)
+    for team, oppo, venue in [(0, 1, 0), (1, 0, 1), (2, 0, 0), (0, 2, 1)]:
+        xg = predict_xg(
+            ratings.iloc[team]["Attack Strength"],
+            ratings.iloc[oppo]["Defence Strength"],
+            venue == 0,
+        )
+        assert np.allclose(matrix[team, oppo, venue], discrete_goal_distribution(xg))
+
+
+def test_add_goal_proba_distributions(ratings):
+    """Test fixtures get the home and away distributions of their pairing"""
+    fixtures = pd.DataFrame(
+        {"gameweek": [16, 16], "home": ["ARS", "BOU"], "away": ["AVL", "ARS"]}
+    )
+    matrix = goal_distribution_matrix(ratings)
+
+    result = add_goal_proba_distributions(fixtures, ratings)
+
+    assert np.allclose(result.loc[0, "home_goal_distribution"], matrix[0, 1, 0])
+    assert np.allclose(result.loc[0, "away_goal_distribution"], matrix[1, 0, 1])
+    assert np.allclose(result.loc[1, "home_goal_distribution"], matrix[2, 0, 0])
+    assert np.allclose(result.loc[1, "away_goal_distribution"], matrix[0, 2, 1])
+
+
+def test_add_goal_proba_distributions_unknown_team(ratings):
+    """Test a fixture with an unrated team raises a KeyError naming it"""
+    fixtures = pd.DataFrame({"gameweek": [16], "home": ["ARS"], "away": ["XYZ"]})
+
+    with pytest.raises(KeyError) as exc_info:
+        add_goal_proba_distributions(fixtures, ratings)
+
+    assert "XYZ" in str(exc_info.value)
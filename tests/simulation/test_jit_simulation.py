@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from src.benchmarks.season import synthetic_bundle
+from src.data.league_table import construct_league_table
+from src.data.upcoming_fixtures import get_upcoming_fixtures
+from src.simulation.batch_simulation import prepare_fixture_arrays, simulate_batch
+from src.simulation.engine import accumulate_simulations
+from src.simulation.goals_probability_distribution import add_goal_proba_distributions
+from src.simulation.jit_simulation import rank_table, simulate_jit
+from src.simulation.league_state import rank_tables
+
+
+@pytest.mark.parametrize("estimator", ["sampled", "conditional"])
+def test_simulate_jit_matches_batch(uncertain_fixtures, table, estimator):
+    """Test the season-at-a-time kernel gives the batch engine's points exactly"""
+    arrays = prepare_fixture_arrays(uncertain_fixtures.iloc[::-1], table.index)
+    uniforms = np.random.default_rng(0).random((2, 3, 50))
+
+    jit = simulate_jit(arrays, table, uniforms, estimator)
+    batch = simulate_batch(arrays, table, uniforms, estimator)
+
+    np.testing.assert_array_equal(jit, batch)
+    assert np.isnan(jit[:, 1, 1]).all()
+
+
+@pytest.mark.parametrize("estimator", ["sampled", "conditional"])
+def test_simulate_jit_matches_batch_with_bonus_matches(estimator):
+    """Test the kernel matches the batch engine on 20 teams, where bonuses are earned"""
+    bundle = synthetic_bundle(played_gameweeks=20)
+    table = construct_league_table(bundle["fixtures"], bundle["bootstrap"])
+    fixtures = get_upcoming_fixtures(3, bundle["bootstrap"], bundle["fixtures"])
+    fixtures = add_goal_proba_distributions(fixtures, bundle["ratings"])
+    arrays = prepare_fixture_arrays(fixtures, table.index)
+    uniforms = np.random.default_rng(0).random((2, len(fixtures), 200))
+
+    jit = simulate_jit(arrays, table, uniforms, estimator)
+    batch = simulate_batch(arrays, table, uniforms, estimator)
+
+    ranks = table["rank"].to_numpy()
+    gaps = np.abs(ranks[arrays["home"]] - ranks[arrays["away"]])
+    assert (gaps[arrays["gameweek"] == 0] >= 5).any()
+    np.testing.assert_array_equal(jit, batch)
+
+
+def test_rank_table_matches_rank_tables():
+    """Test ranking one table in the kernel agrees with rank_tables, ties included"""
+    rng = np.random.default_rng(0)
+    points = rng.integers(0, 4, (100, 20))
+    gd = rng.integers(-3, 4, (100, 20))
+    gf = rng.integers(0, 3, (100, 20))
+    ranks = np.empty(20, dtype=np.int64)
+
+    for idx in range(100):
+        rank_table(points[idx], gd[idx], gf[idx], ranks)
+        assert ranks.tolist() == rank_tables(points[idx], gd[idx], gf[idx]).tolist()
+
+
+def test_jit_engine_rejects_table_states(fixtures, table):
+    """Test storing table states is left to the batch engine"""
+    states = np.empty((10, 2, 3, 4), dtype=np.int16)
+
+    with pytest.raises(ValueError, match="batch engine"):
+        accumulate_simulations(
+            fixtures, table, 10, cpus=1, engine="jit", states=states, progress=False
+        )
@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.simulation.league_state import rank_tables, table_to_state
+from src.simulation.match_simulation import update_table
+
+
+def test_table_to_state_single(table):
+    """Test a table converts to one integer array per column in table order"""
+    state = table_to_state(table)
+
+    assert state["points"].tolist() == [10, 10, 7, 3]
+    assert state["GD"].tolist() == [5, 3, 0, -8]
+    assert state["GF"].tolist() == [9, 9, 4, 2]
+    assert state["rank"].tolist() == [1, 2, 3, 4]
+    assert state["points"].dtype == np.int64
+
+
+def test_table_to_state_batch_is_writable_copy(table):
+    """Test batched states repeat the table per simulation and can be updated independently"""
+    state = table_to_state(table, num_simulations=3)
+
+    assert state["points"].shape == (3, 4)
+    state["points"][0, 0] += 3
+    assert state["points"][:, 0].tolist() == [13, 10, 10]
+    assert table.loc["ARS", "points"] == 10
+
+
+def test_update_table_single(table):
+    """Test a home win updates points, GD and GF of both teams"""
+    state = table_to_state(table)
+
+    update_table(state, 2, 3, 0, 1)
+
+    assert state["points"].tolist() == [10, 10, 10, 3]
+    assert state["GD"].tolist() == [3, 3, 2, -8]
+    assert state["GF"].tolist() == [10, 9, 7, 2]
+
+
+def test_update_table_batch(table):
+    """Test a batch of results updates each simulated table separately"""
+    state = table_to_state(table, num_simulations=3)
+
+    update_table(state, 0, np.array([2, 1, 0]), 1, np.array([0, 1, 3]))
+
+    assert state["points"][:, 0].tolist() == [13, 11, 10]
+    assert state["points"][:, 1].tolist() == [10, 11, 13]
+    assert state["GD"][:, 1].tolist() == [1, 3, 6]
+
+
+def test_rank_tables_sorts_by_points_gd_gf():
+    """Test every simulated table is ranked by points, then GD, then GF"""
+    points = np.array([[3, 6, 6, 0], [0, 0, 0, 0]])
+    gd = np.array([[1, 2, 2, 0], [0, 1, 1, 0]])
+    gf = np.array([[1, 2, 5, 0], [0, 1, 3, 0]])
+
+    ranks = rank_tables(points, gd, gf)
+
+    assert ranks.tolist() == [[3, 2, 1, 4], [3, 2, 1, 4]]
+
+
+def test_rank_tables_ties_and_negative_gd():
+    """Test exact ties keep table order and negative goal differences sort correctly"""
+    points = np.array([5, 5, 5, 5])
+    gd = np.array([-3, 0, -3, -12])
+    gf = np.array([4, 4, 4, 1])
+
+    ranks = rank_tables(points, gd, gf)
+
+    assert ranks.tolist() == [2, 1, 3, 4]
+
+
+def test_rank_tables_matches_lexsort():
+    """Test the packed-key ranking agrees with a lexicographic sort on random tables"""
+    rng = np.random.default_rng(0)
+    points = rng.integers(0, 60, (500, 20))
+    gd = rng.integers(-40, 40, (500, 20))
+    gf = rng.integers(0, 60, (500, 20))
+
+    ranks = rank_tables(points, gd, gf)
+
+    order = np.lexsort((-gf, -gd, -points), axis=-1)
+    expected = np.argsort(order, axis=-1) + 1
+    assert (ranks == expected).all()
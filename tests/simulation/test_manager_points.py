@@ -0,0 +1,77 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from src.simulation.manager_points import (
+    calculate_manager_points,
+    expected_manager_points,
+    is_bonus_match,
+    manager_points_table,
+)
+
+
+def test_calculate_manager_points_examples():
+    """Test manager points for a win, a bonus draw and a heavy loss"""
+    assert calculate_manager_points(1, 2, 3, 0) == 3 + 2 + 6
+    assert calculate_manager_points(15, 3, 1, 1) == 1 + 3 + 5
+    assert calculate_manager_points(4, 10, 0, 5) == 0
+
+
+def test_manager_points_table_matches_calculate_manager_points():
+    """Test the lookup table agrees with calculate_manager_points on every input"""
+    table = manager_points_table(7)
+
+    for team_rank, oppo_rank, goals_for, goals_against in itertools.product(
+        range(1, 21), range(1, 21), range(8), range(8)
+    ):
+        bonus = int(is_bonus_match(team_rank, oppo_rank))
+        expected = calculate_manager_points(
+            team_rank, oppo_rank, goals_for, goals_against
+        )
+        assert table[goals_for, goals_against, bonus] == expected
+
+
+def test_manager_points_table_array_indexing():
+    """Test the table can be indexed with arrays of goals and bonus flags"""
+    table = manager_points_table(7)
+    team_rank = np.array([1, 12, 12])
+    oppo_rank = np.array([2, 2, 2])
+    goals_for = np.array([2, 2, 0])
+    goals_against = np.array([1, 2, 0])
+
+    bonus = is_bonus_match(team_rank, oppo_rank).astype(np.intp)
+    result = table[goals_for, goals_against, bonus]
+
+    assert result.tolist() == [8, 10, 10]
+
+
+def test_manager_points_table_is_cached_and_read_only():
+    """Test the table is built once per size and cannot be modified"""
+    table = manager_points_table(7)
+
+    assert manager_points_table(7) is table
+    assert table.shape == (8, 8, 2)
+    with pytest.raises(ValueError):
+        table[0, 0, 0] = 1
+
+
+def test_expected_manager_points_matches_enumeration():
+    """Test the expected points equal the probability-weighted sum over all scorelines"""
+    rng = np.random.default_rng(0)
+    home = rng.dirichlet(np.ones(8), size=3)
+    away = rng.dirichlet(np.ones(8), size=3)
+
+    result = expected_manager_points(home, away)
+
+    assert result.shape == (3, 2, 2)
+    for fixture, side, bonus in itertools.product(range(3), range(2), range(2)):
+        team_rank, oppo_rank = (6, 1) if bonus else (1, 1)
+        expected = 0.0
+        for home_goals, away_goals in itertools.product(range(8), range(8)):
+            goals = [home_goals, away_goals]
+            probability = home[fixture, home_goals] * away[fixture, away_goals]
+            expected += probability * calculate_manager_points(
+                team_rank, oppo_rank, goals[side], goals[1 - side]
+            )
+        assert result[fixture, side, bonus] == pytest.approx(expected)
@@ -0,0 +1,154 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+import src.simulation.result_cache as result_cache
+from src.simulation.engine import accumulate_simulations
+from src.simulation.result_cache import (
+    accumulate_cached_simulations,
+    cache_keys,
+    evict_cache,
+)
+
+
+@pytest.fixture
+def simulated(monkeypatch):
+    """Records the fixtures of every simulation run"""
+    runs = []
+
+    def spy(fixtures, *args, **kwargs):
+        runs.append(fixtures)
+        return accumulate_simulations(fixtures, *args, **kwargs)
+
+    monkeypatch.setattr(result_cache, "accumulate_simulations", spy)
+    return runs
+
+
+def run(fixtures, table, ratings, cache_dir, **kwargs):
+    return accumulate_cached_simulations(
+        fixtures,
+        table,
+        ratings,
+        cache_dir,
+        num_simulations=20,
+        cpus=1,
+        engine="batch",
+        chunk_size=10,
+        progress=False,
+        **kwargs,
+    )
+
+
+def test_cache_keys_share_unchanged_gameweeks(uncertain_fixtures, table, ratings):
+    """Test a change in a gameweek only changes the keys from that gameweek on"""
+    keys = cache_keys(uncertain_fixtures, table, ratings, seed=0)
+    changed = uncertain_fixtures.copy()
+    changed.loc[2, "home"] = "AVL"
+
+    changed_keys = cache_keys(changed, table, ratings, seed=0)
+
+    assert len(keys) == 2
+    assert changed_keys[0] == keys[0]
+    assert changed_keys[1] != keys[1]
+    assert cache_keys(uncertain_fixtures, table, ratings, seed=1)[0] != keys[0]
+
+
+def test_cached_run_is_reused(uncertain_fixtures, table, ratings, tmp_path, simulated):
+    """Test a run with the same inputs returns the saved results without simulating"""
+    first, reused_first = run(uncertain_fixtures, table, ratings, tmp_path)
+    second, reused_second = run(uncertain_fixtures, table, ratings, tmp_path)
+
+    assert (reused_first, reused_second) == (0, 2)
+    assert len(simulated) == 1
+    for key in ["mean", "m2"]:
+        np.testing.assert_array_equal(second[key], first[key])
+        np.testing.assert_array_equal(
+            second["chunk_means"][key], first["chunk_means"][key]
+        )
+
+
+def test_changed_gameweek_resumes_from_saved_tables(
+    uncertain_fixtures, table, ratings, tmp_path, simulated
+):
+    """Test only the gameweeks from the first changed one are simulated again"""
+    first, _ = run(uncertain_fixtures, table, ratings, tmp_path)
+    changed = uncertain_fixtures.assign(
+        home_goal_distribution=[[0.4, 0.35, 0.25]] * 2 + [[0.0, 0.0, 1.0]]
+    )
+
+    second, reused = run(changed, table, ratings, tmp_path)
+
+    assert reused == 1
+    assert simulated[1]["gameweek"].tolist() == [17]
+    assert second["count"] == 20
+    np.testing.assert_array_equal(second["mean"][:, 0], first["mean"][:, 0])
+    assert second["mean"][3, 1] > first["mean"][3, 1]  # BRE now score twice in GW17
+
+
+def test_resumed_run_matches_full_run_for_certain_results(
+    fixtures, table, ratings, tmp_path
+):
+    """Test resuming from the saved tables gives the results of a full simulation"""
+    changed = fixtures.copy()
+    changed.loc[2, ["home", "away"]] = ["ARS", "BRE"]
+    run(fixtures, table, ratings, tmp_path)
+
+    resumed, reused = run(changed, table, ratings, tmp_path)
+    full = accumulate_simulations(
+        changed, table, 20, cpus=1, engine="batch", chunk_size=10, progress=False
+    )
+
+    assert reused == 1
+    np.testing.assert_array_equal(resumed["mean"], full["mean"])
+
+
+def test_shorter_horizon_reuses_longer_run(
+    uncertain_fixtures, table, ratings, tmp_path, simulated
+):
+    """Test a run over the first gameweeks of a saved run is not simulated again"""
+    first, _ = run(uncertain_fixtures, table, ratings, tmp_path)
+    shorter = uncertain_fixtures[uncertain_fixtures["gameweek"] == 16]
+
+    second, reused = run(shorter, table, ratings, tmp_path)
+
+    assert reused == 1
+    assert len(simulated) == 1
+    np.testing.assert_array_equal(second["mean"], first["mean"][:, :1])
+
+
+def test_evict_cache_by_age_then_size(uncertain_fixtures, table, ratings, tmp_path):
+    """Test old entries are evicted, then the least recently used over the size"""
+    for seed in range(3):
+        run(uncertain_fixtures, table, ratings, tmp_path, seed=seed)
+    entries = sorted(tmp_path.glob("*.json"))
+    now = time.time()
+    for age, path in zip([10, 100, 10_000], entries):
+        os.utime(path, (now - age, now - age))
+    size = entries[0].stat().st_size + entries[0].with_suffix(".npz").stat().st_size
+
+    evict_cache(tmp_path, max_bytes=size + 1, max_age=1_000)
+
+    assert sorted(tmp_path.glob("*.json")) == entries[:1]
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+
+def test_run_bigger_than_cache_is_still_reused(
+    uncertain_fixtures, table, ratings, tmp_path, simulated
+):
+    """Test a run too big to keep its tables is saved without them and hit exactly"""
+    run(uncertain_fixtures, table, ratings, tmp_path, seed=1)
+    max_bytes = 200  # less than either run's tables, which take 960 bytes
+
+    first, _ = run(uncertain_fixtures, table, ratings, tmp_path, max_bytes=max_bytes)
+    second, reused = run(
+        uncertain_fixtures, table, ratings, tmp_path, max_bytes=max_bytes
+    )
+
+    assert reused == 2
+    assert len(simulated) == 2
+    np.testing.assert_array_equal(second["mean"], first["mean"])
+    [entry] = tmp_path.glob("*.json")  # the other run was evicted to make room
+    assert not json.loads(entry.read_text())["has_states"]
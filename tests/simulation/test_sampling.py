@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from src.simulation.sampling import (
+    build_alias_tables,
+    build_goal_sampler,
+    draw_uniform_block,
+    sample_goals,
+)
+
+
+@pytest.fixture
+def distributions():
+    rng = np.random.default_rng(0)
+    return rng.dirichlet(np.ones(8), size=5)
+
+
+def test_inverse_sampler_boundaries():
+    """Test uniforms are mapped to the goal count whose CDF bucket contains them"""
+    sampler = build_goal_sampler(np.array([[0.2, 0.5, 0.3]]), "inverse")
+    uniforms = np.array([[0.0, 0.19, 0.2, 0.69, 0.7, 0.999]])
+
+    goals = sample_goals(sampler, uniforms)
+
+    assert goals.tolist() == [[0, 0, 1, 1, 2, 2]]
+
+
+def test_inverse_sampler_normalises_weights():
+    """Test unnormalised weights are treated like random.choices weights"""
+    sampler = build_goal_sampler(np.array([[1.0, 3.0]]), "inverse")
+
+    assert sampler["cdf"].tolist() == [[0.25, 1.0]]
+
+
+def test_alias_tables_reproduce_distribution(distributions):
+    """Test the alias tables assign each bin exactly its probability"""
+    prob, alias = build_alias_tables(distributions)
+
+    num_bins = distributions.shape[1]
+    for row in range(len(distributions)):
+        implied = prob[row].copy()
+        np.add.at(implied, alias[row], 1.0 - prob[row])
+        assert np.allclose(implied / num_bins, distributions[row])
+
+
+@pytest.mark.parametrize("method", ["inverse", "alias"])
+def test_sampler_frequencies(distributions, method):
+    """Test sampled goal frequencies match the distributions"""
+    sampler = build_goal_sampler(distributions, method)
+    uniforms = np.random.default_rng(1).random((len(distributions), 200_000))
+
+    goals = sample_goals(sampler, uniforms)
+
+    for row, row_goals in enumerate(goals):
+        frequencies = np.bincount(row_goals, minlength=8) / len(row_goals)
+        assert np.allclose(frequencies, distributions[row], atol=0.005)
+
+
+def test_build_goal_sampler_unknown_method(distributions):
+    """Test an unknown sampling method is rejected"""
+    with pytest.raises(ValueError):
+        build_goal_sampler(distributions, "rejection")
+
+
+def test_draw_uniform_block_shape():
+    """Test the block holds home and away uniforms for every fixture and simulation"""
+    uniforms = draw_uniform_block(np.random.default_rng(0), 10, 50)
+
+    assert uniforms.shape == (2, 10, 50)
+    assert ((uniforms >= 0) & (uniforms < 1)).all()
+
+
+@pytest.mark.parametrize("method", ["antithetic", "stratified", "sobol"])
+def test_variance_reduced_uniforms_are_uniform(method):
+    """Test each fixture's uniforms stay marginally uniform with variance reduction"""
+    uniforms = draw_uniform_block(np.random.default_rng(0), 3, 4_096, method)
+
+    assert uniforms.shape == (2, 3, 4_096)
+    assert ((uniforms >= 0) & (uniforms < 1)).all()
+    deciles = np.stack(
+        [np.histogram(row, bins=10, range=(0, 1))[0] for row in uniforms.reshape(6, -1)]
+    )
+    assert np.allclose(deciles / 4_096, 0.1, atol=0.02)
+
+
+def test_antithetic_uniforms_are_mirrored():
+    """Test the second half of an antithetic block mirrors the first"""
+    uniforms = draw_uniform_block(np.random.default_rng(0), 2, 10, "antithetic")
+
+    assert np.allclose(uniforms[..., 5:], 1.0 - uniforms[..., :5])
+
+
+def test_stratified_uniforms_cover_every_stratum():
+    """Test stratified uniforms put exactly one draw in each of the N strata"""
+    uniforms = draw_uniform_block(np.random.default_rng(0), 4, 25, "stratified")
+
+    strata = np.sort(np.floor(uniforms * 25), axis=-1)
+    assert (strata == np.arange(25)).all()
+
+
+def test_draw_uniform_block_unknown_method():
+    """Test an unknown variance reduction method is rejected"""
+    with pytest.raises(ValueError):
+        draw_uniform_block(np.random.default_rng(0), 2, 10, "control")
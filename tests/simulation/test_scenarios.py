@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.engine import accumulate_scenarios
+from src.simulation.scenarios import (
+    BASE_SCENARIO,
+    adjust_ratings,
+    build_scenarios,
+    common_random_numbers_gain,
+    parse_adjustment,
+)
+
+
+def test_build_scenarios_names(ratings, tmp_path):
+    """Test the base comes first, then the CSV scenarios and the adjustments"""
+    path = tmp_path / "optimistic.csv"
+    ratings.to_csv(path)
+
+    scenarios = build_scenarios(ratings, [path], ["ARS:0.9:1.1"])
+
+    assert list(scenarios) == [BASE_SCENARIO, "optimistic", "ARS_attack0.9_defence1.1"]
+    pd.testing.assert_frame_equal(scenarios["optimistic"], ratings)
+    assert scenarios["ARS_attack0.9_defence1.1"].loc["ARS", "Attack Strength"] == 1.35
+
+
+def test_build_scenarios_rejects_duplicate_names(ratings):
+    """Test two scenarios with the same name are an error"""
+    with pytest.raises(ValueError):
+        build_scenarios(ratings, adjustments=["ARS:0.9:1", "ARS:0.90:1.0"])
+
+
+@pytest.mark.parametrize("adjustment", ["ARS", "ARS:0.9", "ARS:high:1.1"])
+def test_parse_adjustment_invalid(adjustment):
+    """Test malformed adjustments are rejected"""
+    with pytest.raises(ValueError):
+        parse_adjustment(adjustment)
+
+
+def test_adjust_ratings(ratings):
+    """Test only the adjusted team changes, in a copy"""
+    adjusted = adjust_ratings(ratings, "AVL", attack=0.5, defence=2.0)
+
+    assert adjusted.loc["AVL"].tolist() == [0.5, 2.4]
+    assert adjusted.loc["ARS"].tolist() == ratings.loc["ARS"].tolist()
+    assert ratings.loc["AVL"].tolist() == [1.0, 1.2]
+    with pytest.raises(KeyError):
+        adjust_ratings(ratings, "BOU")
+
+
+def test_common_random_numbers_gain(fixtures, table):
+    """Test scenarios sharing random numbers have much less noisy differences"""
+    base = fixtures.assign(
+        home_goal_distribution=[[0.4, 0.35, 0.25]] * 3,
+        away_goal_distribution=[[0.5, 0.3, 0.2]] * 3,
+    )
+    stronger_home = base.assign(home_goal_distribution=[[0.35, 0.35, 0.3]] * 3)
+
+    accumulators = accumulate_scenarios(
+        {BASE_SCENARIO: base, "stronger_home": stronger_home},
+        table,
+        num_simulations=2_000,
+        cpus=1,
+        engine="batch",
+        progress=False,
+    )
+    gain = common_random_numbers_gain(
+        accumulators["stronger_home"], accumulators[BASE_SCENARIO]
+    )
+
+    assert np.nanmedian(gain) > 2
@@ -0,0 +1,152 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.simulation.accumulators import points_histogram
+from src.simulation.engine import accumulate_simulations
+from src.simulation.shards import merge_partials, run_shard, shard_chunks
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def run_shards(fixtures, table, ratings, directory, num_shards, **kwargs):
+    paths = []
+    for shard in range(num_shards):
+        paths.append(directory / f"shard_{shard}.npz")
+        run_shard(
+            fixtures,
+            table,
+            ratings,
+            pd.DataFrame({"Price": [1.0]}, index=["ARS"]),
+            paths[-1],
+            shard,
+            num_shards,
+            num_simulations=25,
+            chunk_size=10,
+            progress=False,
+            **kwargs,
+        )
+    return paths
+
+
+@pytest.mark.parametrize("num_simulations, num_shards", [(25, 3), (100, 4), (5, 3)])
+def test_shard_chunks_cover_the_run(num_simulations, num_shards):
+    """Test the shards take consecutive whole chunks adding up to the run"""
+    shards = [
+        shard_chunks(num_simulations, 10, shard, num_shards)
+        for shard in range(num_shards)
+    ]
+
+    assert shards[0][0] == 0
+    for (first, size), (next_first, _) in zip(shards, shards[1:]):
+        assert first * 10 + size == next_first * 10
+    assert sum(size for _, size in shards) == num_simulations
+
+
+def test_merged_shards_match_single_run(uncertain_fixtures, table, ratings, tmp_path):
+    """Test merging the shards gives the results of running all the chunks at once"""
+    paths = run_shards(
+        uncertain_fixtures, table, ratings, tmp_path, 3, engine="batch", seed=3
+    )
+    single = accumulate_simulations(
+        uncertain_fixtures,
+        table,
+        25,
+        cpus=1,
+        engine="batch",
+        seed=3,
+        chunk_size=10,
+        progress=False,
+    )
+
+    merged, metadata = merge_partials(paths[::-1])
+
+    assert merged["count"] == 25
+    assert metadata["chunks"] == [[0, 1], [1, 2], [2, 3]]
+    np.testing.assert_allclose(merged["mean"], single["mean"])
+    np.testing.assert_allclose(merged["m2"], single["m2"])
+    assert merged["chunk_means"]["count"] == single["chunk_means"]["count"] == 2
+    np.testing.assert_allclose(merged["chunk_means"]["m2"], single["chunk_means"]["m2"])
+
+
+def test_merged_histograms_count_every_simulation(
+    uncertain_fixtures, table, ratings, tmp_path
+):
+    """Test the shards' histograms add up to one count per simulation and fixture"""
+    paths = run_shards(
+        uncertain_fixtures, table, ratings, tmp_path, 2, histogram_bins=32
+    )
+
+    merged, _ = merge_partials(paths)
+
+    assert merged["histogram"].shape == (4, 2, 32)
+    assert merged["histogram"][:, 0].sum(axis=-1).tolist() == [25] * 4
+    assert merged["histogram"][:, 1].sum(axis=-1).tolist() == [25, 0, 0, 25]
+    mean = (merged["histogram"] * np.arange(32)).sum(axis=-1)[:, 0] / 25
+    np.testing.assert_allclose(mean, merged["mean"][:, 0])
+
+
+def test_points_histogram_bins():
+    """Test points are counted in unit bins, with NaN skipped and high points capped"""
+    results = np.array([[[0.0, np.nan]], [[2.0, 1.0]], [[40.0, 1.0]]])
+
+    histogram = points_histogram(results, num_bins=4)
+
+    assert histogram.tolist() == [[[1, 0, 1, 1], [0, 2, 0, 0]]]
+
+
+def test_merge_rejects_overlapping_or_different_shards(
+    uncertain_fixtures, table, ratings, tmp_path
+):
+    """Test shards sharing chunks, or of a run with other settings, are not merged"""
+    paths = run_shards(uncertain_fixtures, table, ratings, tmp_path, 2)
+    (tmp_path / "other").mkdir()
+    other = run_shards(
+        uncertain_fixtures, table, ratings, tmp_path / "other", 2, seed=1
+    )
+
+    with pytest.raises(ValueError, match="several shards"):
+        merge_partials([paths[0], paths[0]])
+    with pytest.raises(ValueError, match="different runs"):
+        merge_partials([paths[0], other[1]])
+
+
+def test_shards_run_as_separate_processes(snapshot, run_dir, tmp_path):
+    """Test shards run in parallel processes merge into the single run's CSV"""
+    settings = ["--replay", str(snapshot), "--num-simulations", "50"]
+    settings += ["--chunk-size", "10", "--engine", "batch"]
+
+    def cli(module, *args):
+        command = [sys.executable, "-m", module, *args]
+        return subprocess.Popen(
+            command, cwd=run_dir, env={"PYTHONPATH": str(REPO_ROOT)}
+        )
+
+    shards = [
+        cli(
+            "src.simulation.shards",
+            "run",
+            *settings,
+            "--shard",
+            str(shard),
+            "--num-shards",
+            "2",
+            "--output",
+            str(tmp_path / f"shard_{shard}.npz"),
+        )
+        for shard in range(2)
+    ]
+    assert [shard.wait() for shard in shards] == [0, 0]
+    paths = [str(tmp_path / f"shard_{shard}.npz") for shard in range(2)]
+    merged_path = tmp_path / "merged.csv"
+    merge = cli("src.simulation.shards", "merge", *paths, "--output", merged_path)
+    single_run = cli("src.simulation.simulate", *settings)
+    assert [merge.wait(), single_run.wait()] == [0, 0]
+
+    merged = pd.read_csv(merged_path, index_col=0)
+    single = pd.read_csv(tmp_path / "data" / "am_pts.csv", index_col=0)
+    pd.testing.assert_frame_equal(merged, single)
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from src.data.results_file import read_results
+from src.simulation.simulate import save_results
+
+
+def test_save_results_with_intervals(tmp_path):
+    """Test confidence intervals are written next to the points of each gameweek"""
+    prices = pd.DataFrame(
+        {"Manager": ["Arteta", "Emery"], "Price": [1.5, 1.0]},
+        index=pd.Index(["ARS", "AVL"], name="team"),
+    )
+    results = pd.DataFrame({16: [5.0, 4.0], 17: [6.0, 3.0]}, index=["ARS", "AVL"])
+    intervals = pd.DataFrame({16: [0.1, 0.2], 17: [0.3, 0.4]}, index=["ARS", "AVL"])
+    path = tmp_path / "am_pts.csv"
+
+    save_results(results, prices, path=path, intervals=intervals)
+
+    saved = pd.read_csv(path, index_col=0)
+    assert list(saved.columns) == [
+        "Manager",
+        "Price",
+        "16_Pts",
+        "16_CI",
+        "17_Pts",
+        "17_CI",
+    ]
+    assert saved.loc["AVL", "17_CI"] == 0.4
+
+
+def test_save_results_formats(tmp_path):
+    """Test each requested format is written next to the CSV path, with the metadata"""
+    prices = pd.DataFrame(
+        {"Manager": ["Arteta", "Emery"], "Price": [1.5, 1.0]},
+        index=pd.Index(["ARS", "AVL"], name="team"),
+    )
+    results = pd.DataFrame({16: [5.0, 4.0]}, index=["ARS", "AVL"])
+    path = tmp_path / "am_pts.csv"
+
+    save_results(results, prices, path=path, formats=("npz",), metadata={"seed": 1})
+
+    assert not path.exists()
+    saved, metadata = read_results(tmp_path / "am_pts.npz")
+    assert saved.loc["ARS", "16_Pts"] == 5.0
+    assert metadata == {"seed": 1}
@@ -0,0 +1,55 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ["numpy", "pandas", "scipy", "requests", "tqdm", "numba"]
+
+
+def loaded_heavy_modules(
+    args: list[str], cwd: Path, module: str = "src.simulation.simulate"
+) -> list[str]:
+    """Runs the CLI in a fresh interpreter and lists the heavy modules it imported"""
+    code = (
+        "import sys\n"
+        f"from {module} import main\n"
+        f"main({args!r}, standalone_mode=False)\n"
+        f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        env={"PYTHONPATH": str(REPO_ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1].replace("'", '"'))
+
+
+def test_help_imports_no_heavy_modules():
+    """Test --help only needs click, not the simulation's dependencies"""
+    assert loaded_heavy_modules(["--help"], REPO_ROOT) == []
+
+
+@pytest.mark.parametrize("command", [[], ["run"], ["merge"]])
+def test_shards_help_imports_no_heavy_modules(command):
+    """Test the shards CLI's --help only needs click too"""
+    args = [*command, "--help"]
+    assert loaded_heavy_modules(args, REPO_ROOT, "src.simulation.shards") == []
+
+
+def test_replay_does_not_import_scipy_or_requests(snapshot, run_dir, tmp_path):
+    """Test replaying a snapshot leaves scipy, numba and the HTTP client unloaded"""
+    loaded = loaded_heavy_modules(
+        ["--replay", str(snapshot), "--num-simulations", "10", "--engine", "batch"],
+        run_dir,
+    )
+
+    assert "scipy" not in loaded
+    assert "requests" not in loaded
+    assert "numba" not in loaded  # only the jit engine needs it
+    assert (tmp_path / "data" / "am_pts.csv").exists()
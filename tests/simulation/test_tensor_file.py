@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from src.simulation.engine import accumulate_simulations
+from src.simulation.tensor_file import (
+    HEADER_ALIGNMENT,
+    close_tensor_file,
+    create_tensor_file,
+    decode_points,
+    encode_points,
+    open_tensor_file,
+    tensor_dtype,
+    tensor_expected_points,
+    tensor_metadata,
+)
+
+
+def test_tensor_file_round_trip(fixtures, table, ratings, tmp_path):
+    """Test the points and metadata read back as written, blanks included"""
+    path = tmp_path / "sims.bin"
+    results = np.array([[[6.0, np.nan], [0.0, 13.0]], [[-1.0, 2.0], [np.nan, 3.0]]])
+    metadata = tensor_metadata(fixtures, table, ratings, seed=7)
+
+    tensor = create_tensor_file(path, results.shape, np.int8, metadata)
+    tensor[:] = encode_points(results, np.int8)
+    close_tensor_file(path, tensor, len(results))
+    values, header = open_tensor_file(path)
+
+    assert values.dtype == np.int8
+    assert values.offset % HEADER_ALIGNMENT == 0
+    np.testing.assert_array_equal(decode_points(values[:]), results)
+    assert header["seed"] == 7
+    assert header["teams"] == ["ARS", "AVL", "BOU", "BRE"]
+    assert header["fixtures"][0] == [16, "ARS", "AVL"]
+    assert len(header["ratings_sha256"]) == 64
+
+
+def test_close_tensor_file_shrinks_to_count(fixtures, table, ratings, tmp_path):
+    """Test a run stopping early leaves a file with only the simulations written"""
+    path = tmp_path / "sims.bin"
+    metadata = tensor_metadata(fixtures, table, ratings)
+    tensor = create_tensor_file(path, (10, 4, 2), np.float32, metadata)
+    tensor[:3] = 1.0
+
+    close_tensor_file(path, tensor, 3)
+    values, header = open_tensor_file(path)
+
+    assert values.shape == (3, 4, 2)
+    assert header["shape"] == [3, 4, 2]
+    assert path.stat().st_size == values.offset + values.nbytes
+    assert (values == 1.0).all()
+
+
+def test_encode_points_out_of_range():
+    """Test points that would wrap around in int8 are rejected"""
+    with pytest.raises(ValueError):
+        encode_points(np.array([200.0]), np.int8)
+
+
+def test_open_tensor_file_rejects_other_files(tmp_path):
+    """Test a file without the tensor header is not mapped"""
+    path = tmp_path / "sims.bin"
+    path.write_bytes(b"not a tensor file")
+
+    with pytest.raises(ValueError):
+        open_tensor_file(path)
+
+
+@pytest.mark.parametrize("estimator", ["sampled", "conditional"])
+@pytest.mark.parametrize("cpus", [1, 2])
+def test_accumulate_simulations_saves_tensor(
+    fixtures, table, ratings, tmp_path, estimator, cpus
+):
+    """Test every simulation is saved in order and averages to the saved means"""
+    path = tmp_path / "sims.bin"
+    metadata = tensor_metadata(fixtures, table, ratings, estimator=estimator)
+    tensor = create_tensor_file(path, (25, 4, 2), tensor_dtype(estimator), metadata)
+
+    accumulator = accumulate_simulations(
+        fixtures,
+        table,
+        25,
+        cpus=cpus,
+        engine="batch",
+        estimator=estimator,
+        chunk_size=10,
+        progress=False,
+        tensor=tensor,
+    )
+    close_tensor_file(path, tensor, accumulator["count"])
+    expected_points = tensor_expected_points(path, chunk_size=7)
+
+    np.testing.assert_allclose(
+        expected_points.reindex(table.index).to_numpy(), accumulator["mean"]
+    )
+    assert list(expected_points.columns) == [16, 17]
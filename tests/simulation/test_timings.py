@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.simulation.engine import accumulate_simulations
+from src.simulation.timings import (
+    merge_timings,
+    stage,
+    start_timings,
+    stop_timings,
+    write_timings,
+)
+
+
+def test_stage_without_recorder_does_nothing():
+    """Test stages run their block without recording when timings are off"""
+    with stage("idle"):
+        value = 1
+
+    assert value == 1
+
+
+def test_nested_stages_record_calls_and_allocations():
+    """Test nested stages add up calls and keep the enclosing stage's peak"""
+    start_timings(trace_allocations=True)
+    with stage("outer"):
+        for _ in range(3):
+            with stage("outer.inner"):
+                block = np.ones(100_000)
+                del block
+    stages = stop_timings()
+
+    assert stages["outer"]["calls"] == 1
+    assert stages["outer.inner"]["calls"] == 3
+    assert stages["outer"]["wall_seconds"] >= stages["outer.inner"]["wall_seconds"]
+    assert stages["outer.inner"]["peak_bytes"] >= 800_000
+    assert stages["outer"]["peak_bytes"] >= stages["outer.inner"]["peak_bytes"]
+    assert abs(stages["outer.inner"]["allocated_bytes"]) < 100_000
+
+
+def test_merge_timings_adds_totals():
+    """Test stages from another recorder are summed, keeping the largest peak"""
+    start_timings()
+    with stage("stage"):
+        pass
+    merge_timings(
+        {
+            "stage": {"calls": 2, "wall_seconds": 1.0, "cpu_seconds": 1.0},
+            "other": {"calls": 1, "wall_seconds": 0.5, "cpu_seconds": 0.5},
+        }
+    )
+    stages = stop_timings()
+
+    assert stages["stage"]["calls"] == 3
+    assert stages["stage"]["wall_seconds"] > 1.0
+    assert stages["other"]["calls"] == 1
+
+
+@pytest.mark.parametrize("engine", ["loop", "batch"])
+@pytest.mark.parametrize("cpus", [1, 2])
+def test_accumulate_simulations_records_hot_path(fixtures, table, engine, cpus):
+    """Test the hot path stages are recorded, including from worker processes"""
+    start_timings()
+    accumulate_simulations(
+        fixtures, table, 20, cpus=cpus, engine=engine, chunk_size=10, progress=False
+    )
+    stages = stop_timings()
+
+    assert stages["simulation.chunk"]["calls"] == 2
+    for name in [
+        "simulation.sampling",
+        "simulation.rank_tables",
+        "simulation.update_table",
+        "simulation.manager_points",
+    ]:
+        assert stages[name]["calls"] > 0
+
+
+def test_write_timings(tmp_path):
+    """Test the report is written as JSON with the run's settings"""
+    path = tmp_path / "timings.json"
+
+    write_timings({"stage": {"calls": 1}}, path, horizon=12, engine="batch")
+
+    assert json.loads(path.read_text()) == {
+        "settings": {"horizon": 12, "engine": "batch"},
+        "stages": {"stage": {"calls": 1}},
+    }